@@ -1,24 +1,69 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Iterable
 
-import duckdb
 import pandas as pd
 
+from chicago_crime import db
 from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import catalog_date_range, catalog_files, catalog_has_data, is_hive_layout
+from chicago_crime.ingest.rollup import current_rollup_files, rollup_filter_options
+
+_RAW_EXPRS = {
+    "count": "COUNT(*)",
+    "arrests": "SUM(CASE WHEN c.arrest THEN 1 ELSE 0 END)",
+    "day": "date_trunc('day', c.date)",
+    "week": "date_trunc('week', c.date)",
+    "dow": "strftime(c.date, '%w')",
+    "hour": "strftime(c.date, '%H')",
+    "community_area": "c.community_area",
+    "row_count": "1",
+    "row_arrests": "CASE WHEN c.arrest THEN 1 ELSE 0 END",
+}
+
+_ROLLUP_EXPRS = {
+    "count": "CAST(SUM(c.count) AS BIGINT)",
+    "arrests": "CAST(SUM(c.arrest_count) AS BIGINT)",
+    "day": "timezone('UTC', CAST(c.day AS TIMESTAMP))",
+    "week": "timezone('UTC', date_trunc('week', c.day))",
+    "dow": "CAST(c.dow AS VARCHAR)",
+    "hour": "lpad(CAST(c.hour AS VARCHAR), 2, '0')",
+    "community_area": "c.community_area",
+    "row_count": "c.count",
+    "row_arrests": "c.arrest_count",
+}
+
+
+@dataclass
+class DashboardBundle:
+    time_series: pd.DataFrame = field(default_factory=pd.DataFrame)
+    top_types: pd.DataFrame = field(default_factory=pd.DataFrame)
+    heatmap: pd.DataFrame = field(default_factory=pd.DataFrame)
+    arrest_rate: pd.DataFrame = field(default_factory=pd.DataFrame)
+    community_areas: pd.DataFrame = field(default_factory=pd.DataFrame)
+    total: int = 0
+
+
+def _lake_files(date_start: datetime | None = None, date_end: datetime | None = None) -> list[str]:
+    settings = get_settings()
+    return catalog_files(settings.lake_dir, date_start, date_end)
 
 
-def _lake_glob() -> str:
+def _lake_has_data(date_start: datetime | None = None, date_end: datetime | None = None) -> bool:
     settings = get_settings()
-    return str(settings.lake_dir / "**" / "*.parquet")
+    if date_start is None and date_end is None:
+        return catalog_has_data(settings.lake_dir)
+    return bool(_lake_files(date_start, date_end))
 
 
-def _lake_has_data() -> bool:
+def _read_lake(files: list[str]) -> str:
     settings = get_settings()
-    if not settings.lake_dir.exists():
-        return False
-    return any(settings.lake_dir.rglob("*.parquet"))
+    # Rewritten partitions no longer carry year/month/day in the file body, so older files can differ in columns.
+    if files and is_hive_layout(settings.lake_dir, files):
+        return "read_parquet(?, hive_partitioning = true, union_by_name = true)"
+    return "read_parquet(?, union_by_name = true)"
 
 
 def _community_dim_path() -> str:
@@ -51,47 +96,82 @@ def _acs_dim_exists() -> bool:
     return settings.acs_dim_path.exists()
 
 
-def _base_from_clause() -> tuple[str, list]:
-    clause = "FROM read_parquet(?) AS c"
-    params: list = [_lake_glob()]
+def _base_from_clause(
+    date_start: datetime | None = None,
+    date_end: datetime | None = None,
+) -> tuple[str, list]:
+    # Only files whose catalogued date span overlaps the filter are opened at all.
+    files = _lake_files(date_start, date_end)
+    clause = f"FROM {_read_lake(files)} AS c"
+    params: list = [files]
     if _community_dim_exists():
-        clause += " LEFT JOIN read_parquet(?) AS ca ON TRY_CAST(c.community_area AS INTEGER) = ca.community_area"
+        clause += " LEFT JOIN read_parquet(?) AS ca ON c.community_area = ca.community_area"
         params.append(_community_dim_path())
     if _population_dim_exists():
-        clause += " LEFT JOIN read_parquet(?) AS pop ON TRY_CAST(c.community_area AS INTEGER) = pop.community_area"
+        clause += " LEFT JOIN read_parquet(?) AS pop ON c.community_area = pop.community_area"
         params.append(_population_dim_path())
     if _acs_dim_exists():
-        clause += " LEFT JOIN read_parquet(?) AS acs ON TRY_CAST(c.community_area AS INTEGER) = acs.community_area"
+        clause += " LEFT JOIN read_parquet(?) AS acs ON c.community_area = acs.community_area"
         params.append(_acs_dim_path())
     return clause, params
 
 
-def _community_area_name_expr() -> str:
+def _utc_naive(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _rollup_files(date_start: datetime | None, date_end: datetime | None) -> list[str] | None:
+    # The rollup is keyed by hour, so it can only answer ranges that start and end on hour boundaries.
+    if date_start is not None and (date_start.minute, date_start.second, date_start.microsecond) != (0, 0, 0):
+        return None
+    if date_end is not None and (date_end.minute, date_end.second) != (59, 59):
+        return None
+    settings = get_settings()
+    return current_rollup_files(settings.lake_dir) or None
+
+
+def _aggregate_source(
+    date_start: datetime | None,
+    date_end: datetime | None,
+    primary_types: Iterable[str] | None,
+    district: str | None,
+    arrest: bool | None,
+    domestic: bool | None,
+) -> tuple[str, str, list, dict[str, str]]:
+    rollup_files = _rollup_files(date_start, date_end)
+    if rollup_files is None:
+        clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
+        from_clause, base_params = _base_from_clause(date_start, date_end)
+        return from_clause, clause, base_params + params, _RAW_EXPRS
+
+    clause, params = _build_filters(
+        _utc_naive(date_start),
+        _utc_naive(date_end),
+        primary_types,
+        district,
+        arrest,
+        domestic,
+        date_expr="(c.day + to_hours(c.hour))",
+    )
+    from_clause = "FROM read_parquet(?) AS c"
+    base_params: list = [rollup_files]
+    if _community_dim_exists():
+        from_clause += " LEFT JOIN read_parquet(?) AS ca ON c.community_area = ca.community_area"
+        base_params.append(_community_dim_path())
+    return from_clause, clause, base_params + params, _ROLLUP_EXPRS
+
+
+def _community_area_name_expr(area_expr: str) -> str:
     if _community_dim_exists():
-        return "COALESCE(ca.community_area_name, CONCAT('CA ', TRY_CAST(c.community_area AS VARCHAR)))"
-    return "CONCAT('CA ', TRY_CAST(c.community_area AS VARCHAR))"
+        return f"COALESCE(ca.community_area_name, CONCAT('CA ', CAST({area_expr} AS VARCHAR)))"
+    return f"CONCAT('CA ', CAST({area_expr} AS VARCHAR))"
 
 
 def get_available_date_range() -> tuple[datetime | None, datetime | None]:
-    if not _lake_has_data():
-        return None, None
-    con = duckdb.connect()
-    result = con.execute(
-        "SELECT MIN(date) AS min_date, MAX(date) AS max_date FROM read_parquet(?)",
-        [_lake_glob()],
-    ).fetchone()
-    con.close()
-    if not result:
-        return None, None
-    min_date, max_date = result
-    if isinstance(min_date, datetime) and min_date.tzinfo is None:
-        min_date = min_date.replace(tzinfo=timezone.utc)
-    if isinstance(max_date, datetime) and max_date.tzinfo is None:
-        max_date = max_date.replace(tzinfo=timezone.utc)
-    return (
-        min_date.astimezone(timezone.utc) if isinstance(min_date, datetime) else None,
-        max_date.astimezone(timezone.utc) if isinstance(max_date, datetime) else None,
-    )
+    settings = get_settings()
+    return catalog_date_range(settings.lake_dir)
 
 
 def _build_filters(
@@ -101,14 +181,15 @@ def _build_filters(
     district: str | None,
     arrest: bool | None,
     domestic: bool | None,
+    date_expr: str = "c.date",
 ) -> tuple[str, list]:
     filters = []
     params: list = []
     if date_start:
-        filters.append("c.date >= ?")
+        filters.append(f"{date_expr} >= ?")
         params.append(date_start)
     if date_end:
-        filters.append("c.date <= ?")
+        filters.append(f"{date_expr} <= ?")
         params.append(date_end)
     if primary_types:
         primary_list = list(primary_types)
@@ -143,12 +224,21 @@ def filter_crimes(
     district: str | None,
     arrest: bool | None,
     domestic: bool | None,
+    bbox: tuple[float, float, float, float] | None = None,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
     clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    con = duckdb.connect()
-    from_clause, base_params = _base_from_clause()
+    if bbox is not None:
+        # (south, west, north, east); literals are cast to FLOAT so the filter reaches row-group statistics.
+        clause = _append_condition(
+            clause,
+            "c.latitude BETWEEN CAST(? AS FLOAT) AND CAST(? AS FLOAT) "
+            "AND c.longitude BETWEEN CAST(? AS FLOAT) AND CAST(? AS FLOAT)",
+        )
+        south, west, north, east = bbox
+        params.extend([south, north, west, east])
+    from_clause, base_params = _base_from_clause(date_start, date_end)
     select_parts = ["c.*"]
     if _community_dim_exists():
         select_parts.append("ca.community_area_name AS community_area_name")
@@ -162,8 +252,7 @@ def filter_crimes(
         select_parts.append("acs.* EXCLUDE (community_area)")
     select_list = ", ".join(select_parts)
     query = f"SELECT {select_list} {from_clause} {clause}"
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, base_params + params).fetchdf()
     return df
 
 
@@ -176,18 +265,17 @@ def time_series_counts(
     domestic: bool | None,
     grain: str = "day",
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    bucket = "date_trunc('day', date)" if grain == "day" else "date_trunc('week', date)"
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
+    bucket = exprs["day"] if grain == "day" else exprs["week"]
     query = (
-        f"SELECT {bucket} AS bucket, COUNT(*) AS count "
+        f"SELECT {bucket} AS bucket, {exprs['count']} AS count "
         f"{from_clause} {clause} GROUP BY 1 ORDER BY 1"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
@@ -200,17 +288,16 @@ def top_n_primary_types(
     domestic: bool | None,
     n: int = 15,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
     query = (
-        f"SELECT c.primary_type AS primary_type, COUNT(*) AS count "
+        f"SELECT c.primary_type AS primary_type, {exprs['count']} AS count "
         f"{from_clause} {clause} GROUP BY 1 ORDER BY 2 DESC LIMIT {n}"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
@@ -222,17 +309,16 @@ def dow_hour_heatmap(
     arrest: bool | None,
     domestic: bool | None,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
     query = (
-        "SELECT strftime(c.date, '%w') AS dow, strftime(c.date, '%H') AS hour, COUNT(*) AS count "
+        f"SELECT {exprs['dow']} AS dow, {exprs['hour']} AS hour, {exprs['count']} AS count "
         f"{from_clause} {clause} GROUP BY 1, 2 ORDER BY 1, 2"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
@@ -244,17 +330,16 @@ def arrest_rate_by_type(
     arrest: bool | None,
     domestic: bool | None,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
     query = (
-        "SELECT c.primary_type AS primary_type, AVG(CASE WHEN c.arrest THEN 1 ELSE 0 END) AS arrest_rate "
+        f"SELECT c.primary_type AS primary_type, {exprs['arrests']}::DOUBLE / {exprs['count']} AS arrest_rate "
         f"{from_clause} {clause} GROUP BY 1 ORDER BY 2 DESC"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
@@ -266,20 +351,19 @@ def community_area_counts(
     arrest: bool | None,
     domestic: bool | None,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
     clause = _append_condition(clause, "c.community_area IS NOT NULL")
     query = (
-        "SELECT TRY_CAST(c.community_area AS INTEGER) AS community_area, "
-        f"{_community_area_name_expr()} AS community_area_name, COUNT(*) AS crime_count "
+        f"SELECT {exprs['community_area']} AS community_area, "
+        f"{_community_area_name_expr(exprs['community_area'])} AS community_area_name, {exprs['count']} AS crime_count "
         f"{from_clause} {clause} "
         "GROUP BY 1, 2 ORDER BY 3 DESC"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
@@ -291,66 +375,144 @@ def community_area_arrest_rate(
     arrest: bool | None,
     domestic: bool | None,
 ) -> pd.DataFrame:
-    if not _lake_has_data():
+    if not _lake_has_data(date_start, date_end):
         return pd.DataFrame()
-    clause, params = _build_filters(date_start, date_end, primary_types, district, arrest, domestic)
-    from_clause, base_params = _base_from_clause()
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
     clause = _append_condition(clause, "c.community_area IS NOT NULL")
     query = (
-        "SELECT TRY_CAST(c.community_area AS INTEGER) AS community_area, "
-        f"{_community_area_name_expr()} AS community_area_name, "
-        "SUM(CASE WHEN c.arrest THEN 1 ELSE 0 END)::DOUBLE / COUNT(*) AS arrest_rate, "
-        "COUNT(*) AS crime_count "
+        f"SELECT {exprs['community_area']} AS community_area, "
+        f"{_community_area_name_expr(exprs['community_area'])} AS community_area_name, "
+        f"{exprs['arrests']}::DOUBLE / {exprs['count']} AS arrest_rate, "
+        f"{exprs['count']} AS crime_count "
         f"{from_clause} {clause} "
         "GROUP BY 1, 2 ORDER BY 4 DESC"
     )
-    con = duckdb.connect()
-    df = con.execute(query, base_params + params).fetchdf()
-    con.close()
+    df = db.execute(query, params).fetchdf()
     return df
 
 
+DAILY_PARTIAL_COLUMNS = [
+    "kind", "day", "primary_type", "hour", "community_area", "community_area_name", "count", "arrests"
+]
+
+
+def daily_partials(
+    date_start: datetime | None,
+    date_end: datetime | None,
+    primary_types: Iterable[str] | None,
+    district: str | None,
+    arrest: bool | None,
+    domestic: bool | None,
+) -> pd.DataFrame:
+    # Counts and arrests per day for each dashboard grouping; sums of these rebuild any range of whole days.
+    if not _lake_has_data(date_start, date_end):
+        return pd.DataFrame(columns=DAILY_PARTIAL_COLUMNS)
+    from_clause, clause, params, exprs = _aggregate_source(
+        date_start, date_end, primary_types, district, arrest, domestic
+    )
+    query = (
+        "WITH filtered AS ("
+        f"SELECT {exprs['day']} AS day, c.primary_type AS primary_type, {exprs['hour']} AS hour, "
+        f"{exprs['community_area']} AS community_area, "
+        f"{_community_area_name_expr(exprs['community_area'])} AS community_area_name, "
+        f"{exprs['row_count']} AS n, {exprs['row_arrests']} AS arrests "
+        f"{from_clause} {clause}"
+        ") "
+        "SELECT CASE WHEN GROUPING(primary_type) = 0 THEN 'type' WHEN GROUPING(hour) = 0 THEN 'hour' "
+        "WHEN GROUPING(community_area) = 0 THEN 'area' ELSE 'day' END AS kind, "
+        "day, primary_type, hour, community_area, community_area_name, "
+        "CAST(SUM(n) AS BIGINT) AS count, CAST(SUM(arrests) AS BIGINT) AS arrests "
+        "FROM filtered "
+        "GROUP BY GROUPING SETS ((day), (day, primary_type), (day, hour), (day, community_area, community_area_name))"
+    )
+    return db.execute(query, params).fetchdf()
+
+
+def bundle_from_daily(partials: pd.DataFrame, n: int = 15) -> DashboardBundle:
+    days = partials[partials["kind"] == "day"]
+    if days.empty:
+        return DashboardBundle()
+    types = partials[partials["kind"] == "type"].groupby("primary_type", as_index=False)[["count", "arrests"]].sum()
+    hours = partials[partials["kind"] == "hour"]
+    # strftime('%w') numbering: Sunday is 0.
+    hours = hours.assign(dow=((hours["day"].dt.dayofweek + 1) % 7).astype(str))
+    areas = partials[(partials["kind"] == "area") & partials["community_area"].notna()]
+    areas = areas.groupby(["community_area", "community_area_name"], as_index=False)[["count", "arrests"]].sum()
+
+    time_series = (
+        days.groupby("day", as_index=False)["count"].sum().rename(columns={"day": "bucket"})
+    ).sort_values("bucket", ignore_index=True)
+    top_types = types[["primary_type", "count"]].sort_values("count", ascending=False, ignore_index=True).head(n)
+    heatmap = hours.groupby(["dow", "hour"], as_index=False)["count"].sum().sort_values(
+        ["dow", "hour"], ignore_index=True
+    )
+    arrest_rate = types.assign(arrest_rate=types["arrests"] / types["count"])[["primary_type", "arrest_rate"]]
+    arrest_rate = arrest_rate.sort_values("arrest_rate", ascending=False, ignore_index=True)
+    community_areas = areas.assign(
+        community_area=areas["community_area"].astype(int),
+        arrest_rate=areas["arrests"] / areas["count"],
+        crime_count=areas["count"],
+    )[["community_area", "community_area_name", "arrest_rate", "crime_count"]]
+    community_areas = community_areas.sort_values("crime_count", ascending=False, ignore_index=True)
+    return DashboardBundle(
+        time_series=time_series,
+        top_types=top_types,
+        heatmap=heatmap,
+        arrest_rate=arrest_rate,
+        community_areas=community_areas,
+        total=int(days["count"].sum()),
+    )
+
+
 def distinct_primary_types() -> list[str]:
     if not _lake_has_data():
         return []
-    con = duckdb.connect()
-    rows = con.execute(
+    rows = db.execute(
         "SELECT DISTINCT primary_type FROM read_parquet(?) WHERE primary_type IS NOT NULL ORDER BY 1",
-        [_lake_glob()],
+        [_lake_files()],
     ).fetchall()
-    con.close()
     return [row[0] for row in rows if row and row[0]]
 
 
-def distinct_districts() -> list[str]:
-    if not _lake_has_data():
-        return []
-    con = duckdb.connect()
-    rows = con.execute(
-        "SELECT DISTINCT district FROM read_parquet(?) WHERE district IS NOT NULL ORDER BY 1",
-        [_lake_glob()],
-    ).fetchall()
-    con.close()
+def _district_values(values: Iterable) -> list[int]:
     districts: list[int] = []
-    for row in rows:
-        if not row or row[0] is None:
+    for value in values:
+        if value is None:
             continue
         try:
-            districts.append(int(row[0]))
+            districts.append(int(value))
         except (TypeError, ValueError):
             continue
     return districts
 
 
+def distinct_districts() -> list[str]:
+    if not _lake_has_data():
+        return []
+    rows = db.execute(
+        "SELECT DISTINCT district FROM read_parquet(?) WHERE district IS NOT NULL ORDER BY 1",
+        [_lake_files()],
+    ).fetchall()
+    return _district_values(row[0] for row in rows if row)
+
+
+def filter_options() -> tuple[list[str], list[int]]:
+    # Ingest records distinct values in the rollup manifest; scanning the lake is only the fallback.
+    options = rollup_filter_options(get_settings().lake_dir)
+    if options is None:
+        return distinct_primary_types(), distinct_districts()
+    return options["primary_types"], sorted(set(_district_values(options["districts"])))
+
+
 def get_available_community_areas() -> list[dict[str, str]]:
     if not _community_dim_exists():
         return []
-    con = duckdb.connect()
-    rows = con.execute(
+    rows = db.execute(
         "SELECT community_area, community_area_name FROM read_parquet(?) ORDER BY 1",
         [_community_dim_path()],
     ).fetchall()
-    con.close()
     return [
         {"label": name, "value": int(area)}
         for area, name in rows
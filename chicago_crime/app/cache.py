@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow.feather as feather
+from plotly.graph_objects import Figure
+
+_MB = 1024 * 1024
+
+_caches: dict[tuple[Path, int, str], "DiskCache"] = {}
+_caches_lock = threading.Lock()
+
+
+class DiskCache:
+    # One file per entry under a shared directory, so every worker process on the host sees the same cache.
+    def __init__(self, directory: Path, max_bytes: int, suffix: str) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        # Running size of the directory, so a write only walks it once the budget looks exceeded. Other workers write
+        # here too, so the directory can run over by what they wrote since; the walk in evict() re-syncs from disk.
+        self._total = sum(size for _, size, _ in self.entries())
+
+    def _path(self, key: tuple) -> Path:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}{self.suffix}"
+
+    def get_bytes(self, key: tuple) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # The mtime doubles as the last-used time for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def set_bytes(self, key: tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".tmp_{os.getpid()}_{threading.get_ident()}_{path.name}")
+        tmp_path.write_bytes(data)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path.replace(path)
+        with self._lock:
+            self._total += len(data) - replaced
+            over_budget = self._total > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def entries(self) -> list[tuple[Path, int, float]]:
+        found = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            if path.name.startswith(".tmp_"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((path, stat.st_size, stat.st_mtime))
+        return found
+
+    def evict(self) -> None:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        # Least recently used first; another worker may be evicting the same files, which is harmless.
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._total = total
+
+
+def _shared_cache(directory: Path, max_bytes: int, suffix: str) -> DiskCache:
+    # One instance per directory and process, so the size scan runs once rather than on every callback.
+    key = (directory, max_bytes, suffix)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = DiskCache(directory, max_bytes, suffix)
+        return cache
+
+
+def result_cache(cache_dir: Path, max_mb: int) -> DiskCache:
+    return _shared_cache(cache_dir / "results", max_mb * _MB, ".arrow")
+
+
+def figure_cache(cache_dir: Path, max_mb: int) -> DiskCache:
+    return _shared_cache(cache_dir / "figures", max_mb * _MB, ".json")
+
+
+def day_cache(cache_dir: Path, max_mb: int) -> DiskCache:
+    return _shared_cache(cache_dir / "days", max_mb * _MB, ".arrow")
+
+
+def get_frame(cache: DiskCache, key: tuple) -> pd.DataFrame | None:
+    data = cache.get_bytes(key)
+    if data is None:
+        return None
+    return feather.read_feather(io.BytesIO(data))
+
+
+def set_frame(cache: DiskCache, key: tuple, df: pd.DataFrame) -> None:
+    buffer = io.BytesIO()
+    feather.write_feather(df.reset_index(drop=True), buffer, compression="zstd")
+    cache.set_bytes(key, buffer.getvalue())
+
+
+def get_figure(cache: DiskCache, key: tuple) -> dict[str, Any] | None:
+    data = cache.get_bytes(key)
+    if data is None:
+        return None
+    # Dash serialises a figure dict exactly like a Figure, without re-validating every trace.
+    return json.loads(data)
+
+
+def set_figure(cache: DiskCache, key: tuple, fig: Figure) -> None:
+    cache.set_bytes(key, fig.to_json().encode("utf-8"))
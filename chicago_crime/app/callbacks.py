@@ -1,35 +1,28 @@
 from __future__ import annotations
 
-from collections import OrderedDict
-from datetime import datetime, timezone
-from typing import Any
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Callable
+
+import pandas as pd
 import plotly.express as px
 from dash import Input, Output, State, callback, dcc
+from dash.exceptions import PreventUpdate
 
 from chicago_crime.analytics import aggregations, geo, queries
+from chicago_crime.app.cache import day_cache, figure_cache, get_figure, get_frame, result_cache, set_figure, set_frame
+from chicago_crime.app.components import district_options, primary_type_options
+from chicago_crime.app.day_cache import DayPlan, day_bounds, plan_days, save_days
 from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import catalog_date_range, catalog_stamp, catalog_version, pinned_catalog
 from chicago_crime.ingest.state import load_state
 
 
-class LRUCache:
-    def __init__(self, max_size: int = 32) -> None:
-        self.max_size = max_size
-        self._data: OrderedDict[tuple, Any] = OrderedDict()
-
-    def get(self, key: tuple) -> Any | None:
-        if key not in self._data:
-            return None
-        self._data.move_to_end(key)
-        return self._data[key]
-
-    def set(self, key: tuple, value: Any) -> None:
-        self._data[key] = value
-        self._data.move_to_end(key)
-        if len(self._data) > self.max_size:
-            self._data.popitem(last=False)
-
-
-_cache = LRUCache(max_size=64)
+# Day fetches still running, so concurrent callbacks in one process share them; finished results live on disk.
+_in_flight: dict[tuple, tuple[list[pd.DataFrame], list[Future]]] = {}
+_in_flight_lock = threading.RLock()
+_executor: ThreadPoolExecutor | None = None
 _geojson_cache: dict[str, Any] | None = None
 
 
@@ -43,18 +36,6 @@ def _parse_dates(start_date: str | None, end_date: str | None) -> tuple[datetime
     return start, end
 
 
-def _filters_key(start_date, end_date, primary_types, district, flags, map_mode, metric) -> tuple:
-    return (
-        start_date,
-        end_date,
-        tuple(primary_types) if primary_types else None,
-        district,
-        tuple(flags) if flags else None,
-        map_mode,
-        metric,
-    )
-
-
 def _get_filter_values(start_date, end_date, primary_types, district, flags):
     date_start, date_end = _parse_dates(start_date, end_date)
     arrest = True if flags and "arrest" in flags else None
@@ -79,14 +60,137 @@ def _load_geojson() -> dict[str, Any]:
     return _geojson_cache
 
 
+RESULT_NAMES = ("time_series", "top_types", "heatmap", "arrest_rate", "community_areas")
+
+
+def _query_pool() -> ThreadPoolExecutor:
+    global _executor
+    with _in_flight_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().dash_query_workers, thread_name_prefix="dash-query"
+            )
+        return _executor
+
+
+def _query_args(filters: dict) -> tuple:
+    date_start, date_end = _parse_dates(filters["start_date"], filters["end_date"])
+    return date_start, date_end, filters["primary_types"], filters["district"], filters["arrest"], filters["domestic"]
+
+
+def _filters_key(filters: dict) -> tuple:
+    primary_types = tuple(filters["primary_types"]) if filters["primary_types"] else None
+    return (primary_types, filters["district"], filters["arrest"], filters["domestic"])
+
+
+def _results_key(filters: dict) -> tuple:
+    # Cached results are shared on disk across workers and restarts, so the key names the exact lake snapshot.
+    # Map mode and metric only change how results are drawn, so they do not re-run the aggregates.
+    return (filters["version"], filters["stamp"], filters["start_date"], filters["end_date"], *_filters_key(filters))
+
+
+def _result_store():
+    settings = get_settings()
+    return result_cache(settings.cache_dir, settings.result_cache_max_mb)
+
+
+def _figure_store():
+    settings = get_settings()
+    return figure_cache(settings.cache_dir, settings.figure_cache_max_mb)
+
+
+def _day_store():
+    settings = get_settings()
+    return day_cache(settings.cache_dir, settings.day_cache_max_mb)
+
+
+def _date_span(filters: dict) -> tuple[date, date] | None:
+    # An open end of the date picker means the edge of the (pinned) lake.
+    date_start, date_end = _parse_dates(filters["start_date"], filters["end_date"])
+    lake_start, lake_end = catalog_date_range(get_settings().lake_dir)
+    if lake_start is None or lake_end is None:
+        return None
+    first = date_start.date() if date_start else lake_start.astimezone(timezone.utc).date()
+    last = date_end.date() if date_end else lake_end.astimezone(timezone.utc).date()
+    return (first, last) if first <= last else None
+
+
+def _fetch_days(version: int, filters_key: tuple, first: date, last: date) -> pd.DataFrame:
+    settings = get_settings()
+    # Pool threads do not inherit the caller's context, so each fetch pins the snapshot itself.
+    with pinned_catalog(settings.lake_dir, version):
+        partials = queries.daily_partials(*day_bounds(first, last), *filters_key)
+        save_days(_day_store(), settings.lake_dir, first, last, filters_key, partials)
+    return partials
+
+
+def _forget(key: tuple, pending: tuple[list[pd.DataFrame], list[Future]]) -> None:
+    with _in_flight_lock:
+        if _in_flight.get(key) is pending and all(future.done() for future in pending[1]):
+            del _in_flight[key]
+
+
+def _start_days(filters: dict) -> tuple[list[pd.DataFrame], list[Future]]:
+    # The first callback for a filter set reads the cached days and submits one fetch per missing run of days;
+    # the rest join those fetches.
+    key = _results_key(filters)
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+    if pending is not None:
+        return pending
+    settings = get_settings()
+    filters_key = _filters_key(filters)
+    with pinned_catalog(settings.lake_dir, filters["version"]):
+        span = _date_span(filters)
+        plan = plan_days(_day_store(), settings.lake_dir, *span, filters_key) if span else DayPlan()
+    pool = _query_pool()
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        if pending is not None:
+            return pending
+        futures = [pool.submit(_fetch_days, filters["version"], filters_key, *run) for run in plan.missing]
+        pending = (plan.cached, futures)
+        if futures:
+            _in_flight[key] = pending
+            for future in futures:
+                future.add_done_callback(lambda _done: _forget(key, pending))
+    return pending
+
+
+def _query_results(filters: dict) -> dict[str, pd.DataFrame]:
+    cached, futures = _start_days(filters)
+    # A failed fetch is never cached, so the next render retries those days.
+    frames = [frame for frame in [*cached, *(future.result() for future in futures)] if not frame.empty]
+    partials = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=queries.DAILY_PARTIAL_COLUMNS)
+    bundle = queries.bundle_from_daily(partials)
+    results = {name: getattr(bundle, name) for name in RESULT_NAMES}
+    store = _result_store()
+    key = _results_key(filters)
+    for name, df in results.items():
+        set_frame(store, (*key, name), df)
+    return results
+
+
+def _query_result(filters: dict, name: str) -> pd.DataFrame:
+    cached = get_frame(_result_store(), (*_results_key(filters), name))
+    if cached is not None:
+        return cached
+    return _query_results(filters)[name]
+
+
+def _cached_figure(filters: dict, figure_id: str, name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+    key = (figure_id, *_results_key(filters))
+    cache = _figure_store()
+    cached = get_figure(cache, key)
+    if cached is not None:
+        return cached
+    fig = build(_query_result(filters, name))
+    set_figure(cache, key, fig)
+    return fig
+
+
 @callback(
-    Output("time-series", "figure"),
-    Output("top-types", "figure"),
-    Output("top-community", "figure"),
-    Output("heatmap", "figure"),
-    Output("map", "figure"),
-    Output("arrest-rate", "figure"),
-    Output("map-warning", "children"),
+    Output("filters", "data"),
     Input("date-range", "start_date"),
     Input("date-range", "end_date"),
     Input("primary-type", "value"),
@@ -96,147 +200,195 @@ def _load_geojson() -> dict[str, Any]:
     Input("choropleth-metric", "value"),
 )
 
-def update_charts(start_date, end_date, primary_types, district, flags, map_mode, metric):
-    date_start, date_end, primary_types, district, arrest, domestic = _get_filter_values(
+def resolve_filters(start_date, end_date, primary_types, district, flags, map_mode, metric):
+    settings = get_settings()
+    _, _, primary_types, district, arrest, domestic = _get_filter_values(
         start_date, end_date, primary_types, district, flags
     )
-    settings = get_settings()
-    map_mode = map_mode or settings.map_mode_default
-    metric = metric or settings.choropleth_metric_default
-    cache_key = _filters_key(start_date, end_date, primary_types, district, flags, map_mode, metric)
-
-    cached = _cache.get(cache_key)
-    if cached:
-        return cached
-
-    ts = queries.time_series_counts(date_start, date_end, primary_types, district, arrest, domestic)
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "primary_types": list(primary_types) if primary_types else None,
+        "district": district,
+        "map_mode": map_mode or settings.map_mode_default,
+        "metric": metric or settings.choropleth_metric_default,
+        "arrest": arrest,
+        "domestic": domestic,
+        # Every figure pins this snapshot, so they agree even if an ingest commits mid-render.
+        "version": catalog_version(settings.lake_dir),
+        "stamp": catalog_stamp(settings.lake_dir),
+    }
+    _start_days(filters)
+    return filters
+
+
+def _time_series_figure(ts: pd.DataFrame):
     if ts.empty:
-        time_series_fig = _empty_figure("Time Series")
-    else:
-        time_series_fig = px.line(ts, x="bucket", y="count", title="Incidents Over Time")
+        return _empty_figure("Time Series")
+    return px.line(ts, x="bucket", y="count", title="Incidents Over Time")
+
 
-    top_types = queries.top_n_primary_types(date_start, date_end, primary_types, district, arrest, domestic)
+def _top_types_figure(top_types: pd.DataFrame):
     if top_types.empty:
-        top_fig = _empty_figure("Top Primary Types")
-    else:
-        top_fig = px.bar(top_types, x="primary_type", y="count", title="Top Primary Types")
+        return _empty_figure("Top Primary Types")
+    return px.bar(top_types, x="primary_type", y="count", title="Top Primary Types")
 
-    heatmap_df = queries.dow_hour_heatmap(date_start, date_end, primary_types, district, arrest, domestic)
+
+def _heatmap_figure(heatmap_df: pd.DataFrame):
     if heatmap_df.empty:
-        heatmap_fig = _empty_figure("Day/Hour Heatmap")
-    else:
-        heatmap_fig = px.density_heatmap(
-            heatmap_df,
-            x="hour",
-            y="dow",
-            z="count",
-            color_continuous_scale="Blues",
-            title="Day of Week vs Hour",
-        )
-        heatmap_fig.update_yaxes(ticktext=["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"], tickvals=["0", "1", "2", "3", "4", "5", "6"])
+        return _empty_figure("Day/Hour Heatmap")
+    heatmap_fig = px.density_heatmap(
+        heatmap_df,
+        x="hour",
+        y="dow",
+        z="count",
+        color_continuous_scale="Blues",
+        title="Day of Week vs Hour",
+    )
+    heatmap_fig.update_yaxes(ticktext=["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"], tickvals=["0", "1", "2", "3", "4", "5", "6"])
+    return heatmap_fig
 
-    warning = ""
-    map_df = queries.filter_crimes(date_start, date_end, primary_types, district, arrest, domestic)
-    if map_df.empty:
-        map_fig = _empty_figure("Map")
-    else:
-        use_points = map_mode == "points"
-        use_choropleth = map_mode == "choropleth"
-        if map_mode == "auto":
-            max_days = settings.map_max_days_points
-            within_days = date_start and date_end and (date_end - date_start).days <= max_days
-            within_points = len(map_df) <= settings.max_map_points
-            use_points = bool(within_days and within_points)
-            use_choropleth = not use_points
-            if use_choropleth:
-                warning = "Auto-switched to choropleth for performance."
-
-        if use_points:
-            map_df = map_df.dropna(subset=["latitude", "longitude"])
-            if len(map_df) > settings.max_map_points:
-                warning = f"Map points exceed {settings.max_map_points}; downsampled for performance."
-                map_df = aggregations.downsample(map_df, settings.max_map_points)
-            if map_df.empty:
-                map_fig = _empty_figure("Map")
-            else:
-                map_fig = px.scatter_mapbox(
-                    map_df,
-                    lat="latitude",
-                    lon="longitude",
-                    hover_data=["primary_type", "description", "date", "community_area_name"],
-                    zoom=9,
-                    title="Incident Map (Points)",
-                    labels={"community_area_name": "Community"},
-                )
-                map_fig.update_layout(mapbox_style=geo.MAPBOX_STYLE, margin={"l": 0, "r": 0, "t": 40, "b": 0})
-        else:
-            geojson = _load_geojson()
-            if not geojson:
-                warning = "Community area boundaries not available yet — run ingest."
-                map_fig = _empty_figure("Choropleth Map")
-            else:
-                if metric == "arrest_rate":
-                    ca_df = queries.community_area_arrest_rate(
-                        date_start, date_end, primary_types, district, arrest, domestic
-                    )
-                    color_col = "arrest_rate"
-                    title = "Arrest Rate by Community Area"
-                else:
-                    ca_df = queries.community_area_counts(
-                        date_start, date_end, primary_types, district, arrest, domestic
-                    )
-                    color_col = "crime_count"
-                    title = "Crimes by Community Area"
-                if ca_df.empty:
-                    map_fig = _empty_figure("Choropleth Map")
-                else:
-                    hover_data = {}
-                    if "crime_count" in ca_df.columns:
-                        hover_data["crime_count"] = True
-                    if "arrest_rate" in ca_df.columns:
-                        hover_data["arrest_rate"] = ":.1%"
-                    map_fig = px.choropleth_mapbox(
-                        ca_df,
-                        geojson=geojson,
-                        locations="community_area",
-                        featureidkey="id",
-                        color=color_col,
-                        hover_name="community_area_name",
-                        hover_data=hover_data,
-                        center={"lat": 41.8781, "lon": -87.6298},
-                        zoom=9,
-                        title=title,
-                        mapbox_style=geo.MAPBOX_STYLE,
-                        labels={"community_area_name": "Community", "crime_count": "Crimes", "arrest_rate": "Arrest Rate"},
-                    )
-
-    arrest_rate = queries.arrest_rate_by_type(date_start, date_end, primary_types, district, arrest, domestic)
+
+def _arrest_rate_figure(arrest_rate: pd.DataFrame):
     if arrest_rate.empty:
-        arrest_fig = _empty_figure("Arrest Rate")
-    else:
-        arrest_rate["arrest_rate"] = arrest_rate["arrest_rate"] * 100
-        arrest_fig = px.bar(
-            arrest_rate,
-            x="primary_type",
-            y="arrest_rate",
-            title="Arrest Rate by Primary Type (%)",
-        )
+        return _empty_figure("Arrest Rate")
+    arrest_rate = arrest_rate.assign(arrest_rate=arrest_rate["arrest_rate"] * 100)
+    return px.bar(
+        arrest_rate,
+        x="primary_type",
+        y="arrest_rate",
+        title="Arrest Rate by Primary Type (%)",
+    )
 
-    top_community = queries.community_area_counts(date_start, date_end, primary_types, district, arrest, domestic)
+
+def _top_community_figure(top_community: pd.DataFrame):
     if top_community.empty:
-        top_community_fig = _empty_figure("Top Community Areas")
-    else:
-        top_community_fig = px.bar(
-            top_community.head(15),
-            x="community_area_name",
-            y="crime_count",
-            title="Top Community Areas",
-            labels={"community_area_name": "Community", "crime_count": "Crimes"},
-        )
+        return _empty_figure("Top Community Areas")
+    return px.bar(
+        top_community.head(15),
+        x="community_area_name",
+        y="crime_count",
+        title="Top Community Areas",
+        labels={"community_area_name": "Community", "crime_count": "Crimes"},
+    )
+
+
+@callback(Output("time-series", "figure"), Input("filters", "data"))
+
+def update_time_series(filters):
+    return _cached_figure(filters, "time-series", "time_series", _time_series_figure)
+
+
+@callback(Output("top-types", "figure"), Input("filters", "data"))
+
+def update_top_types(filters):
+    return _cached_figure(filters, "top-types", "top_types", _top_types_figure)
+
+
+@callback(Output("heatmap", "figure"), Input("filters", "data"))
+
+def update_heatmap(filters):
+    return _cached_figure(filters, "heatmap", "heatmap", _heatmap_figure)
+
+
+@callback(Output("arrest-rate", "figure"), Input("filters", "data"))
 
-    payload = (time_series_fig, top_fig, top_community_fig, heatmap_fig, map_fig, arrest_fig, warning)
-    _cache.set(cache_key, payload)
-    return payload
+def update_arrest_rate(filters):
+    return _cached_figure(filters, "arrest-rate", "arrest_rate", _arrest_rate_figure)
+
+
+@callback(Output("top-community", "figure"), Input("filters", "data"))
+
+def update_top_community(filters):
+    return _cached_figure(filters, "top-community", "community_areas", _top_community_figure)
+
+
+@callback(
+    Output("map", "figure"),
+    Output("map-warning", "children"),
+    Input("filters", "data"),
+)
+
+def update_map(filters):
+    # Not figure-cached: a choropleth embeds the full GeoJSON, so it is rebuilt from the cached results instead.
+    settings = get_settings()
+    map_mode = filters["map_mode"]
+    metric = filters["metric"]
+    date_start, date_end, primary_types, district, arrest, domestic = _query_args(filters)
+    ts = _query_result(filters, "time_series")
+    total = int(ts["count"].sum()) if not ts.empty else 0
+
+    warning = ""
+    if total == 0:
+        return _empty_figure("Map"), warning
+
+    use_points = map_mode == "points"
+    use_choropleth = map_mode == "choropleth"
+    if map_mode == "auto":
+        max_days = settings.map_max_days_points
+        within_days = date_start and date_end and (date_end - date_start).days <= max_days
+        within_points = total <= settings.max_map_points
+        use_points = bool(within_days and within_points)
+        use_choropleth = not use_points
+        if use_choropleth:
+            warning = "Auto-switched to choropleth for performance."
+
+    if use_points:
+        with pinned_catalog(settings.lake_dir, filters["version"]):
+            map_df = queries.filter_crimes(date_start, date_end, primary_types, district, arrest, domestic)
+        map_df = map_df.dropna(subset=["latitude", "longitude"])
+        if len(map_df) > settings.max_map_points:
+            warning = f"Map points exceed {settings.max_map_points}; downsampled for performance."
+            map_df = aggregations.downsample(map_df, settings.max_map_points)
+        if map_df.empty:
+            return _empty_figure("Map"), warning
+        map_fig = px.scatter_mapbox(
+            map_df,
+            lat="latitude",
+            lon="longitude",
+            hover_data=["primary_type", "description", "date", "community_area_name"],
+            zoom=9,
+            title="Incident Map (Points)",
+            labels={"community_area_name": "Community"},
+        )
+        map_fig.update_layout(mapbox_style=geo.MAPBOX_STYLE, margin={"l": 0, "r": 0, "t": 40, "b": 0})
+        return map_fig, warning
+
+    geojson = _load_geojson()
+    if not geojson:
+        warning = "Community area boundaries not available yet — run ingest."
+        return _empty_figure("Choropleth Map"), warning
+    areas = _query_result(filters, "community_areas")
+    if metric == "arrest_rate":
+        ca_df = areas
+        color_col = "arrest_rate"
+        title = "Arrest Rate by Community Area"
+    else:
+        ca_df = areas[["community_area", "community_area_name", "crime_count"]] if not areas.empty else areas
+        color_col = "crime_count"
+        title = "Crimes by Community Area"
+    if ca_df.empty:
+        return _empty_figure("Choropleth Map"), warning
+    hover_data = {}
+    if "crime_count" in ca_df.columns:
+        hover_data["crime_count"] = True
+    if "arrest_rate" in ca_df.columns:
+        hover_data["arrest_rate"] = ":.1%"
+    map_fig = px.choropleth_mapbox(
+        ca_df,
+        geojson=geojson,
+        locations="community_area",
+        featureidkey="id",
+        color=color_col,
+        hover_name="community_area_name",
+        hover_data=hover_data,
+        center={"lat": 41.8781, "lon": -87.6298},
+        zoom=9,
+        title=title,
+        mapbox_style=geo.MAPBOX_STYLE,
+        labels={"community_area_name": "Community", "crime_count": "Crimes", "arrest_rate": "Arrest Rate"},
+    )
+    return map_fig, warning
 
 
 @callback(
@@ -254,7 +406,8 @@ def download_data(n_clicks, start_date, end_date, primary_types, district, flags
     date_start, date_end, primary_types, district, arrest, domestic = _get_filter_values(
         start_date, end_date, primary_types, district, flags
     )
-    df = queries.filter_crimes(date_start, date_end, primary_types, district, arrest, domestic)
+    with pinned_catalog(get_settings().lake_dir):
+        df = queries.filter_crimes(date_start, date_end, primary_types, district, arrest, domestic)
     return dcc.send_data_frame(df.to_csv, "filtered_crimes.csv", index=False)
 
 
@@ -271,3 +424,30 @@ def update_freshness(_):
     watermark = state.watermark_max_date.isoformat() if state.watermark_max_date else "unknown"
     last_run = state.last_run_at.isoformat() if state.last_run_at else "unknown"
     return f"Data freshness: last run {last_run}, watermark {watermark}."
+
+
+@callback(
+    Output("primary-type", "options"),
+    Output("district", "options"),
+    Output("date-range", "min_date_allowed"),
+    Output("date-range", "max_date_allowed"),
+    Output("options-version", "data"),
+    Input("refresh-interval", "n_intervals"),
+    State("options-version", "data"),
+)
+
+def refresh_filter_options(_, known_version):
+    # Runs on page load and then on every refresh tick, but only re-reads the options once the lake has moved.
+    settings = get_settings()
+    version = [catalog_version(settings.lake_dir), catalog_stamp(settings.lake_dir)]
+    if version == known_version:
+        raise PreventUpdate
+    primary_types, districts = queries.filter_options()
+    min_date, max_date = queries.get_available_date_range()
+    return (
+        primary_type_options(primary_types),
+        district_options(districts),
+        min_date.date() if min_date else None,
+        max_date.date() if max_date else None,
+        version,
+    )
@@ -9,8 +9,8 @@ from chicago_crime.analytics import queries
 from chicago_crime.config import get_settings
 
 
-def filter_panel() -> html.Div:
-    settings = get_settings()
+def default_date_range() -> tuple[datetime, datetime]:
+    # The one-year view the dashboard opens on; cache warm-up precomputes exactly this range.
     min_date, max_date = queries.get_available_date_range()
     if max_date is None:
         default_end = datetime.now(timezone.utc)
@@ -19,13 +19,20 @@ def filter_panel() -> html.Div:
     default_start = default_end - timedelta(days=365)
     if min_date and default_start < min_date:
         default_start = min_date
+    return default_start, default_end
+
+
+def primary_type_options(primary_types: list[str]) -> list[dict]:
+    return [{"label": pt, "value": pt} for pt in primary_types]
+
 
-    primary_options = [
-        {"label": pt, "value": pt} for pt in queries.distinct_primary_types()
-    ]
-    district_options = [
-        {"label": str(dist), "value": dist} for dist in queries.distinct_districts()
-    ]
+def district_options(districts: list[int]) -> list[dict]:
+    return [{"label": str(dist), "value": dist} for dist in districts]
+
+
+def filter_panel() -> html.Div:
+    settings = get_settings()
+    default_start, default_end = default_date_range()
 
     return html.Div(
         [
@@ -35,21 +42,21 @@ def filter_panel() -> html.Div:
                 id="date-range",
                 start_date=default_start.date() if default_start else None,
                 end_date=default_end.date() if default_end else None,
-                min_date_allowed=min_date.date() if min_date else None,
-                max_date_allowed=max_date.date() if max_date else None,
+                # Bounds come from the refresh callback along with the other filter options.
                 updatemode="singledate",
             ),
             html.Label("Primary type"),
             dcc.Dropdown(
                 id="primary-type",
-                options=primary_options,
+                # Filled by the refresh callback on page load, so building the layout never scans the lake.
+                options=[],
                 multi=True,
                 placeholder="All types",
             ),
             html.Label("District"),
             dcc.Dropdown(
                 id="district",
-                options=district_options,
+                options=[],
                 clearable=True,
                 placeholder="All districts",
             ),
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime.app.cache import DiskCache, get_frame, set_frame
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import load_catalog
+
+
+@dataclass
+class DayPlan:
+    cached: list[pd.DataFrame] = field(default_factory=list)
+    missing: list[tuple[date, date]] = field(default_factory=list)
+
+
+def day_bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    # Same bounds the dashboard filters use: midnight to 23:59:59 UTC.
+    return (
+        datetime.combine(first, time(), tzinfo=timezone.utc),
+        datetime.combine(last, time(23, 59, 59), tzinfo=timezone.utc),
+    )
+
+
+def _month_end(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _months(first: date, last: date) -> list[tuple[date, date, date]]:
+    # (month, first day in range, last day in range) for every month the range touches.
+    months = []
+    month = first.replace(day=1)
+    while month <= last:
+        months.append((month, max(first, month), min(last, _month_end(month))))
+        month = _month_end(month) + timedelta(days=1)
+    return months
+
+
+def _days(frame: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(frame["day"], utc=True).dt.date
+
+
+def _block_keys(lake_dir: Path, first: date, last: date, filters_key: tuple) -> dict[date, tuple]:
+    # Lake files are immutable and uniquely named, so a month only changes when the files covering it do.
+    months = {month: [] for month, _, _ in _months(first, last)}
+    catalog = load_catalog(lake_dir)
+    for key in sorted(catalog):
+        entry = catalog[key]
+        # Same overlap rule as catalog_files: a file without dates may hold any month.
+        lo = entry.min_date.astimezone(timezone.utc).date() if entry.min_date else first
+        hi = entry.max_date.astimezone(timezone.utc).date() if entry.max_date else last
+        for month, _, _ in _months(max(lo, first.replace(day=1)), min(hi, _month_end(last))):
+            months[month].append(str(lake_dir / key))
+    dim_path = get_settings().data_dir / "dim" / "community_areas" / "community_areas.parquet"
+    dim_stamp = dim_path.stat().st_mtime_ns if dim_path.exists() else None
+    return {
+        month: (
+            "days",
+            month.isoformat(),
+            hashlib.sha256("\n".join(files).encode("utf-8")).hexdigest(),
+            dim_stamp,
+            *filters_key,
+        )
+        for month, files in months.items()
+    }
+
+
+def plan_days(cache: DiskCache, lake_dir: Path, first: date, last: date, filters_key: tuple) -> DayPlan:
+    plan = DayPlan()
+    keys = _block_keys(lake_dir, first, last, filters_key)
+    for month, lo, hi in _months(first, last):
+        block = get_frame(cache, keys[month])
+        covered: set[date] = set()
+        if block is not None:
+            days = _days(block)
+            covered = set(days[block["kind"] == "covered"])
+            plan.cached.append(block[(block["kind"] != "covered") & (days >= lo) & (days <= hi)])
+        day = lo
+        while day <= hi:
+            if day not in covered:
+                previous = plan.missing[-1] if plan.missing else None
+                # Runs continue across months but not years, so a cold multi-year range fans out per year.
+                if previous and previous[1] == day - timedelta(days=1) and previous[1].year == day.year:
+                    plan.missing[-1] = (previous[0], day)
+                else:
+                    plan.missing.append((day, day))
+            day += timedelta(days=1)
+    return plan
+
+
+def save_days(
+    cache: DiskCache, lake_dir: Path, first: date, last: date, filters_key: tuple, partials: pd.DataFrame
+) -> None:
+    days = _days(partials)
+    keys = _block_keys(lake_dir, first, last, filters_key)
+    for month, lo, hi in _months(first, last):
+        key = keys[month]
+        covered = pd.DataFrame(
+            {"kind": "covered", "day": pd.date_range(lo, hi, tz="UTC"), "count": 0, "arrests": 0}
+        )
+        frames = [partials[(days >= lo) & (days <= hi)], covered]
+        block = get_frame(cache, key)
+        if block is not None:
+            # Another worker may have filled some of these days meanwhile; keep one copy of each.
+            block_days = _days(block)
+            frames.append(block[(block_days < lo) | (block_days > hi)])
+        # Two fetches landing in one month can race here; the loser's days are only re-queried later.
+        set_frame(cache, key, pd.concat([frame for frame in frames if not frame.empty], ignore_index=True))
@@ -7,6 +7,8 @@ def create_layout() -> html.Div:
     return html.Div(
         [
             dcc.Interval(id="refresh-interval", interval=60 * 1000, n_intervals=0),
+            dcc.Store(id="filters"),
+            dcc.Store(id="options-version"),
             html.Div(
                 [
                     filter_panel(),
@@ -4,6 +4,7 @@ from dash import Dash
 
 from chicago_crime.app import callbacks  # noqa: F401
 from chicago_crime.app.layout import create_layout
+from chicago_crime.app.warmup import start_warmer
 from chicago_crime.config import get_settings
 from chicago_crime.logging_config import setup_logging
 
@@ -12,13 +13,16 @@ def create_app() -> Dash:
     settings = get_settings()
     setup_logging(settings.log_level)
     app = Dash(__name__)
-    app.layout = create_layout()
+    # Built per page load, so a restart is not needed to pick up the lake's current date range.
+    app.layout = create_layout
     return app
 
 
 def main() -> None:
     settings = get_settings()
     app = create_app()
+    # Warms in the background, so the server accepts requests straight away.
+    start_warmer()
     app.run(host=settings.dash_host, port=settings.dash_port, debug=False)
 
 
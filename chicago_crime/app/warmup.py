@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable
+
+from chicago_crime.analytics import queries
+from chicago_crime.app import callbacks
+from chicago_crime.app.components import default_date_range
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import catalog_version
+from chicago_crime.ingest.state import load_state
+
+logger = logging.getLogger(__name__)
+
+WARM_PRESETS = ("default", "last_30_days", "districts", "top_types")
+
+_FIGURE_CALLBACKS = (
+    callbacks.update_time_series,
+    callbacks.update_top_types,
+    callbacks.update_heatmap,
+    callbacks.update_arrest_rate,
+    callbacks.update_top_community,
+)
+
+
+def _render(start_date: str, end_date: str, primary_types: list[str] | None = None, district: str | None = None):
+    # Goes through the same callbacks as a browser, so the warmed keys are exactly the ones a page load asks for.
+    filters = callbacks.resolve_filters(start_date, end_date, primary_types, district, None, None, None)
+    for update in _FIGURE_CALLBACKS:
+        update(filters)
+    return filters
+
+
+def warm_cache(presets: Iterable[str] | None = None) -> int:
+    settings = get_settings()
+    presets = tuple(presets if presets is not None else settings.warm_presets)
+    unknown = set(presets) - set(WARM_PRESETS)
+    if unknown:
+        raise ValueError(f"Unknown warm-up presets: {', '.join(sorted(unknown))}")
+    if not queries.get_available_date_range()[1]:
+        return 0
+
+    start, end = default_date_range()
+    start_date, end_date = start.date().isoformat(), end.date().isoformat()
+    warmed = 0
+    if "default" in presets or "top_types" in presets:
+        default = _render(start_date, end_date)
+        warmed += 1
+    if "last_30_days" in presets:
+        _render(max(start, end - timedelta(days=29)).date().isoformat(), end_date)
+        warmed += 1
+    if "districts" in presets:
+        for district in queries.filter_options()[1]:
+            _render(start_date, end_date, district=district)
+            warmed += 1
+    if "top_types" in presets:
+        top_types = callbacks._query_result(default, "top_types")
+        for primary_type in top_types["primary_type"].head(settings.warm_top_types) if not top_types.empty else []:
+            _render(start_date, end_date, primary_types=[primary_type])
+            warmed += 1
+    return warmed
+
+
+def _lake_marker() -> tuple:
+    # Backfilled corrections can land without moving the watermark, so the snapshot version counts too.
+    settings = get_settings()
+    return load_state(settings.state_path).watermark_max_date, catalog_version(settings.lake_dir)
+
+
+def _warm_loop(interval_seconds: int) -> None:
+    warmed_for = None
+    while True:
+        try:
+            marker = _lake_marker()
+            if marker != warmed_for:
+                started = time.monotonic()
+                count = warm_cache()
+                warmed_for = marker
+                logger.info("Warmed %s dashboard views in %.1fs", count, time.monotonic() - started)
+        except Exception:
+            logger.exception("Cache warm-up failed; retrying in %ss", interval_seconds)
+        time.sleep(interval_seconds)
+
+
+def start_warmer() -> threading.Thread | None:
+    settings = get_settings()
+    if settings.warm_interval_seconds <= 0 or not settings.warm_presets:
+        return None
+    thread = threading.Thread(
+        target=_warm_loop, args=(settings.warm_interval_seconds,), name="dash-cache-warmer", daemon=True
+    )
+    thread.start()
+    return thread
@@ -39,6 +39,13 @@ class Settings:
     log_level: str
     dash_host: str
     dash_port: int
+    dash_query_workers: int
+    result_cache_max_mb: int
+    figure_cache_max_mb: int
+    day_cache_max_mb: int
+    warm_presets: tuple[str, ...]
+    warm_top_types: int
+    warm_interval_seconds: int
     max_map_points: int
     map_max_days_points: int
     community_areas_dataset_id: str
@@ -55,11 +62,36 @@ class Settings:
     acs_dim_max_age_days: int
     map_mode_default: str
     choropleth_metric_default: str
+    soda_base_url: str
+    fetch_workers: int
+    fetch_window_days: int
+    soda_max_requests_per_second: float
+    soda_pagination: str
+    soda_transport: str
+    sync_mode: str
+    cold_partition_granularity: str
+    compact_after_days: int
+    parquet_compression: str
+    parquet_compression_level: int | None
+    parquet_row_group_size: int
+    parquet_sort_by_date: bool
+    parquet_drop_partition_columns: bool
+    parquet_spatial_sort: str
+    snapshot_retention_minutes: int
+    shadow_backfill_tolerance: float
 
     @property
     def lake_dir(self) -> Path:
         return self.data_dir / "lake" / "crimes"
 
+    @property
+    def shadow_lake_dir(self) -> Path:
+        return self.data_dir / "lake_shadow" / "crimes"
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.data_dir / "cache"
+
     @property
     def state_path(self) -> Path:
         return self.data_dir / "state" / "ingest_state.json"
@@ -89,6 +121,7 @@ def get_settings() -> Settings:
     start_date_env = _parse_date(os.getenv("START_DATE"))
     if start_date_env is None:
         start_date_env = _utc_now() - timedelta(days=365)
+    compression_level_env = os.getenv("PARQUET_COMPRESSION_LEVEL", "3").strip()
 
     settings = Settings(
         dataset_id=os.getenv("CHI_CRIME_DATASET_ID", DEFAULT_DATASET_ID),
@@ -100,6 +133,17 @@ def get_settings() -> Settings:
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         dash_host=os.getenv("DASH_HOST", "0.0.0.0"),
         dash_port=int(os.getenv("DASH_PORT", "8050")),
+        dash_query_workers=int(os.getenv("DASH_QUERY_WORKERS", "8")),
+        result_cache_max_mb=int(os.getenv("RESULT_CACHE_MAX_MB", "256")),
+        figure_cache_max_mb=int(os.getenv("FIGURE_CACHE_MAX_MB", "64")),
+        day_cache_max_mb=int(os.getenv("DAY_CACHE_MAX_MB", "256")),
+        warm_presets=tuple(
+            name.strip().lower()
+            for name in os.getenv("WARM_PRESETS", "default,last_30_days,districts,top_types").split(",")
+            if name.strip()
+        ),
+        warm_top_types=int(os.getenv("WARM_TOP_TYPES", "5")),
+        warm_interval_seconds=int(os.getenv("WARM_INTERVAL_SECONDS", "60")),
         max_map_points=int(os.getenv("MAX_MAP_POINTS", "25000")),
         map_max_days_points=int(os.getenv("MAP_MAX_DAYS_POINTS", "90")),
         community_areas_dataset_id=os.getenv("COMMUNITY_AREAS_DATASET_ID", "igwz-8jzy"),
@@ -119,6 +163,23 @@ def get_settings() -> Settings:
         acs_dim_max_age_days=int(os.getenv("ACS_DIM_MAX_AGE_DAYS", "30")),
         map_mode_default=os.getenv("MAP_MODE_DEFAULT", "choropleth"),
         choropleth_metric_default=os.getenv("CHOROPLETH_METRIC_DEFAULT", "count"),
+        soda_base_url=os.getenv("SODA_BASE_URL", "https://data.cityofchicago.org/resource"),
+        fetch_workers=int(os.getenv("FETCH_WORKERS", "1")),
+        fetch_window_days=int(os.getenv("FETCH_WINDOW_DAYS", "90")),
+        soda_max_requests_per_second=float(os.getenv("SODA_MAX_REQUESTS_PER_SECOND", "4")),
+        soda_pagination=os.getenv("SODA_PAGINATION", "keyset").strip().lower(),
+        soda_transport=os.getenv("SODA_TRANSPORT", "json").strip().lower(),
+        sync_mode=os.getenv("SYNC_MODE", "window").strip().lower(),
+        cold_partition_granularity=os.getenv("COLD_PARTITION_GRANULARITY", "day").strip().lower(),
+        compact_after_days=int(os.getenv("COMPACT_AFTER_DAYS", "45")),
+        parquet_compression=os.getenv("PARQUET_COMPRESSION", "zstd").strip().lower(),
+        parquet_compression_level=int(compression_level_env) if compression_level_env else None,
+        parquet_row_group_size=int(os.getenv("PARQUET_ROW_GROUP_SIZE", "122880")),
+        parquet_sort_by_date=os.getenv("PARQUET_SORT_BY_DATE", "1") == "1",
+        parquet_drop_partition_columns=os.getenv("PARQUET_DROP_PARTITION_COLUMNS", "1") == "1",
+        parquet_spatial_sort=os.getenv("PARQUET_SPATIAL_SORT", "none").strip().lower(),
+        snapshot_retention_minutes=int(os.getenv("SNAPSHOT_RETENTION_MINUTES", "30")),
+        shadow_backfill_tolerance=float(os.getenv("SHADOW_BACKFILL_TOLERANCE", "0.001")),
     )
     _SETTINGS = settings
     return settings
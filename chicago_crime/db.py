@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import threading
+
+import duckdb
+
+_lock = threading.Lock()
+_local = threading.local()
+_database: duckdb.DuckDBPyConnection | None = None
+_generation = 0
+
+
+def _root() -> tuple[duckdb.DuckDBPyConnection, int]:
+    global _database
+    with _lock:
+        if _database is None:
+            con = duckdb.connect()
+            con.execute("SET enable_object_cache = true")
+            _database = con
+        return _database, _generation
+
+
+def get_cursor() -> duckdb.DuckDBPyConnection:
+    # Each thread gets its own cursor on one shared in-memory database, so concurrent
+    # callbacks run in parallel while sharing the object and Parquet metadata caches.
+    database, generation = _root()
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None or getattr(_local, "generation", None) != generation:
+        cursor = database.cursor()
+        cursor.execute("SET parquet_metadata_cache = true")
+        cursor.execute("SET TimeZone = 'UTC'")
+        _local.cursor = cursor
+        _local.generation = generation
+    return cursor
+
+
+def execute(sql: str, params: list | None = None) -> duckdb.DuckDBPyConnection:
+    return get_cursor().execute(sql, params or [])
+
+
+def reset_pool() -> None:
+    global _database, _generation
+    with _lock:
+        database, _database = _database, None
+        _generation += 1
+    if database is not None:
+        database.close()
@@ -3,6 +3,10 @@ __all__ = [
     "soda_client",
     "state",
     "parquet_writer",
+    "catalog",
+    "rollup",
+    "id_index",
+    "compact",
     "lake_inspector",
     "ingest_dimensions",
 ]
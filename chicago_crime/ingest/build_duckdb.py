@@ -8,6 +8,7 @@ from pathlib import Path
 import duckdb
 
 from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import current_files_dir, load_catalog, sync_current_files
 from chicago_crime.logging_config import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -17,8 +18,8 @@ def _duckdb_path(settings) -> Path:
     return settings.lake_dir.parent / "chicago_crime.duckdb"
 
 
-def _lake_glob(data_dir: Path) -> str:
-    return str(data_dir / "lake" / "crimes" / "**" / "*.parquet")
+def _lake_dir(data_dir: Path) -> Path:
+    return data_dir / "lake" / "crimes"
 
 
 def _community_areas_path(data_dir: Path) -> Path:
@@ -71,8 +72,8 @@ def build_duckdb(rebuild: bool = False) -> Path:
             )
             view_data_dir = settings.data_dir
 
-    lake_files = list(settings.lake_dir.rglob("*.parquet"))
-    if not lake_files:
+    catalog = load_catalog(settings.lake_dir)
+    if not catalog:
         raise ValueError(f"No parquet files found under {settings.lake_dir}")
 
     db_path = _duckdb_path(settings)
@@ -82,9 +83,12 @@ def build_duckdb(rebuild: bool = False) -> Path:
 
     con = duckdb.connect(str(db_path))
 
-    lake_glob = _escape_path(_lake_glob(view_data_dir))
+    # The view globs the mirror of the head snapshot that every commit maintains, so it follows new ingests
+    # without a rebuild and never names a file that garbage collection may delete.
+    sync_current_files(settings.lake_dir)
+    lake_glob = _escape_path(str(current_files_dir(_lake_dir(view_data_dir)) / "**" / "*.parquet"))
     con.execute(
-        f"CREATE OR REPLACE VIEW crimes AS SELECT * FROM read_parquet('{lake_glob}')"
+        f"CREATE OR REPLACE VIEW crimes AS SELECT * FROM read_parquet('{lake_glob}', union_by_name = true)"
     )
 
     community_cols: set[str] | None = None
@@ -118,7 +122,7 @@ def build_duckdb(rebuild: bool = False) -> Path:
     if community_cols and "community_area" in community_cols:
         joins.append(
             "LEFT JOIN community_areas ca "
-            "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(ca.community_area AS INTEGER)"
+            "ON c.community_area = ca.community_area"
         )
         if "community_area_name" in community_cols:
             select_parts.append("ca.community_area_name AS community_area_name")
@@ -133,7 +137,7 @@ def build_duckdb(rebuild: bool = False) -> Path:
     if population_cols and "community_area" in population_cols:
         joins.append(
             "LEFT JOIN population p "
-            "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(p.community_area AS INTEGER)"
+            "ON c.community_area = p.community_area"
         )
         if "population" in population_cols:
             select_parts.append("p.population AS population")
@@ -150,7 +154,7 @@ def build_duckdb(rebuild: bool = False) -> Path:
         if acs_extra:
             joins.append(
                 "LEFT JOIN acs_demographics a "
-                "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(a.community_area AS INTEGER)"
+                "ON c.community_area = a.community_area"
             )
             select_parts.append("a.* EXCLUDE (community_area)")
         else:
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+
+import duckdb
+
+from chicago_crime.ingest.schema import LAKE_SQL_TYPES, lake_columns_sql
+from chicago_crime.ingest.write_profile import get_write_profile
+
+logger = logging.getLogger(__name__)
+
+BULK_FORMATS = {".csv": "csv", ".csv.gz": "csv", ".parquet": "parquet"}
+
+# The portal's bulk export writes dates as "01/31/2024 11:59:00 PM"; the API and most dumps use ISO timestamps.
+BULK_DATE_FORMATS = ("%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M:%S")
+
+
+def bulk_format(source: Path) -> str:
+    # Only the last two suffixes matter, so "crimes.2024.csv.gz" is still a gzipped CSV and "x.json.gz" is not.
+    suffix = "".join(source.suffixes[-2:]).lower() if source.suffix.lower() == ".gz" else source.suffix.lower()
+    if suffix not in BULK_FORMATS:
+        raise ValueError(f"Cannot import {source.name}; expected a .csv, .csv.gz or .parquet file")
+    return BULK_FORMATS[suffix]
+
+
+def _escape_path(path: str) -> str:
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def _normalize_name(name: str) -> str:
+    # "Primary Type" and "FBI Code" in the export header become the API's primary_type and fbi_code.
+    return re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _date_expr(column: str, column_type: str) -> str:
+    if column_type != "VARCHAR":
+        return f"TRY_CAST({column} AS TIMESTAMP WITH TIME ZONE)"
+    parsed = [f"TRY_STRPTIME({column}, '{fmt}')" for fmt in BULK_DATE_FORMATS]
+    # Naive timestamps are read as UTC, the same way API rows are.
+    return f"COALESCE({', '.join(parsed)}, TRY_CAST({column} AS TIMESTAMP))::TIMESTAMP WITH TIME ZONE"
+
+
+def _source_sql(source: Path, file_format: str) -> str:
+    path = _escape_path(str(source))
+    if file_format == "parquet":
+        return f"read_parquet('{path}', hive_partitioning = false, union_by_name = true)"
+    # All columns arrive as text and are cast once below; DuckDB splits the file into chunks parsed on every thread.
+    return f"read_csv('{path}', header = true, all_varchar = true, parallel = true)"
+
+
+def _renamed_columns(con: duckdb.DuckDBPyConnection, source_sql: str) -> dict[str, str]:
+    selected: dict[str, str] = {}
+    for name, column_type, *_ in con.execute(f"DESCRIBE SELECT * FROM {source_sql}").fetchall():
+        target = _normalize_name(name)
+        if target not in LAKE_SQL_TYPES or target in selected:
+            continue
+        column = _quote(name)
+        selected[target] = _date_expr(column, column_type) if target == "date" else column
+    if "id" not in selected or "date" not in selected:
+        raise ValueError("Bulk file needs at least an ID and a Date column")
+    return selected
+
+
+def stage_bulk_file(source: Path, staged_path: Path) -> int:
+    file_format = bulk_format(source)
+    profile = get_write_profile()
+    staged_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = staged_path.with_name(f".tmp_{staged_path.name}")
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    try:
+        source_sql = _source_sql(source, file_format)
+        selected = _renamed_columns(con, source_sql)
+        renamed = ", ".join(f"{expr} AS {target}" for target, expr in selected.items())
+        # Same casts as the merge, so the staged file already carries the lake types.
+        con.execute(
+            f"COPY (SELECT * FROM (SELECT {lake_columns_sql(selected)} FROM "
+            f"(SELECT {renamed} FROM {source_sql})) WHERE id IS NOT NULL AND date IS NOT NULL) "
+            f"TO '{_escape_path(str(tmp_path))}' ({profile.copy_options()})"
+        )
+        rows = con.execute("SELECT COUNT(*) FROM read_parquet(?)", [str(tmp_path)]).fetchone()[0]
+    finally:
+        con.close()
+    tmp_path.replace(staged_path)
+    logger.info("Staged %s rows from %s", rows, source)
+    return int(rows)
@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from chicago_crime import db
+from chicago_crime.config import get_settings
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "_catalog.json"
+SNAPSHOTS_DIRNAME = "_snapshots"
+CURRENT_LINK = "head"
+
+_CATALOG_CACHE: dict[Path, tuple[int, int, dict[str, "CatalogEntry"]]] = {}
+_SNAPSHOT_CACHE: dict[Path, dict[str, "CatalogEntry"]] = {}
+_SNAPSHOT_CACHE_SIZE = 8
+_PINNED: ContextVar[dict[Path, dict[str, "CatalogEntry"]]] = ContextVar("pinned_catalogs", default={})
+
+
+class CatalogConflictError(RuntimeError):
+    pass
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _dt_to_str(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _parse_id(value) -> int | None:
+    # Catalogs written before ids were stored as BIGINT hold them as strings.
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_utc(value) -> datetime | None:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass
+class CatalogEntry:
+    path: str
+    rows: int
+    bytes: int
+    min_date: datetime | None
+    max_date: datetime | None
+    min_id: int | None
+    max_id: int | None
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "min_date": _dt_to_str(self.min_date),
+            "max_date": _dt_to_str(self.max_date),
+            "min_id": self.min_id,
+            "max_id": self.max_id,
+        }
+
+
+def _entry_from_dict(payload: dict) -> CatalogEntry:
+    return CatalogEntry(
+        path=payload["path"],
+        rows=int(payload.get("rows", 0)),
+        bytes=int(payload.get("bytes", 0)),
+        min_date=_parse_datetime(payload.get("min_date")),
+        max_date=_parse_datetime(payload.get("max_date")),
+        min_id=_parse_id(payload.get("min_id")),
+        max_id=_parse_id(payload.get("max_id")),
+    )
+
+
+def catalog_path(lake_dir: Path) -> Path:
+    return lake_dir / CATALOG_FILENAME
+
+
+def _relative_key(lake_dir: Path, path: Path) -> str:
+    return path.relative_to(lake_dir).as_posix()
+
+
+def describe_file(lake_dir: Path, path: Path) -> CatalogEntry:
+    rows, min_date, max_date, min_id, max_id = db.execute(
+        "SELECT COUNT(*), MIN(date), MAX(date), MIN(id), MAX(id) FROM read_parquet(?)",
+        [str(path)],
+    ).fetchone()
+    return CatalogEntry(
+        path=_relative_key(lake_dir, path),
+        rows=int(rows),
+        bytes=path.stat().st_size,
+        min_date=_as_utc(min_date),
+        max_date=_as_utc(max_date),
+        min_id=_parse_id(min_id),
+        max_id=_parse_id(max_id),
+    )
+
+
+def snapshots_dir(lake_dir: Path) -> Path:
+    return lake_dir / SNAPSHOTS_DIRNAME
+
+
+def snapshot_path(lake_dir: Path, version: int) -> Path:
+    return snapshots_dir(lake_dir) / f"{version:08d}.json"
+
+
+def snapshot_versions(lake_dir: Path) -> list[int]:
+    directory = snapshots_dir(lake_dir)
+    if not directory.exists():
+        return []
+    return sorted(int(path.stem) for path in directory.glob("*.json") if path.stem.isdigit())
+
+
+def read_snapshot(lake_dir: Path, version: int) -> tuple[datetime | None, set[str]]:
+    with snapshot_path(lake_dir, version).open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    return _parse_datetime(payload.get("updated_at")), {item["path"] for item in payload.get("files", [])}
+
+
+def snapshot_entries(lake_dir: Path, version: int) -> dict[str, CatalogEntry] | None:
+    # Snapshots are immutable once claimed, so a parsed one can be reused until garbage collection removes it.
+    path = snapshot_path(lake_dir, version)
+    cached = _SNAPSHOT_CACHE.get(path)
+    if cached is not None and path.exists():
+        return cached
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except FileNotFoundError:
+        return None
+    entries = {item["path"]: _entry_from_dict(item) for item in payload.get("files", [])}
+    _SNAPSHOT_CACHE[path] = entries
+    while len(_SNAPSHOT_CACHE) > _SNAPSHOT_CACHE_SIZE:
+        _SNAPSHOT_CACHE.pop(next(iter(_SNAPSHOT_CACHE)))
+    return entries
+
+
+def _superseded_keys(lake_dir: Path) -> set[str]:
+    versions = snapshot_versions(lake_dir)
+    if not versions:
+        return set()
+    referenced: set[str] = set()
+    for version in versions[:-1]:
+        referenced |= read_snapshot(lake_dir, version)[1]
+    return referenced - read_snapshot(lake_dir, versions[-1])[1]
+
+
+def scan_catalog(lake_dir: Path) -> dict[str, CatalogEntry]:
+    entries: dict[str, CatalogEntry] = {}
+    if not lake_dir.exists():
+        return entries
+    # Files replaced by a later snapshot stay on disk until garbage collection; they are not part of the lake.
+    superseded = _superseded_keys(lake_dir)
+    for path in sorted(lake_dir.rglob("*.parquet")):
+        if any(part.startswith(".tmp_") for part in path.relative_to(lake_dir).parts):
+            continue
+        if _relative_key(lake_dir, path) in superseded:
+            continue
+        entry = describe_file(lake_dir, path)
+        entries[entry.path] = entry
+    return entries
+
+
+def _read_pointer(lake_dir: Path) -> tuple[int, dict[str, CatalogEntry]] | None:
+    path = catalog_path(lake_dir)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _CATALOG_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    with path.open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    # Catalogs written before snapshots existed carry no version and count as version 0.
+    version = int(payload.get("version", 0))
+    entries = {item["path"]: _entry_from_dict(item) for item in payload.get("files", [])}
+    _CATALOG_CACHE[path] = (mtime, version, entries)
+    return version, entries
+
+
+def _head_version(lake_dir: Path, current: tuple[int, dict[str, CatalogEntry]] | None) -> int:
+    if current is not None:
+        return current[0]
+    versions = snapshot_versions(lake_dir)
+    return versions[-1] if versions else 0
+
+
+def catalog_version(lake_dir: Path) -> int:
+    return _head_version(lake_dir, _read_pointer(lake_dir))
+
+
+def catalog_stamp(lake_dir: Path) -> int:
+    # Changes with every commit, and unlike the version it never repeats if the lake is rebuilt from scratch.
+    try:
+        return catalog_path(lake_dir).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _payload(version: int, entries: dict[str, CatalogEntry]) -> dict:
+    return {
+        "version": version,
+        "updated_at": _dt_to_str(datetime.now(timezone.utc)),
+        "files": [entries[key].to_dict() for key in sorted(entries)],
+    }
+
+
+def _claim_snapshot(lake_dir: Path, version: int, payload: dict) -> None:
+    path = snapshot_path(lake_dir, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        # Exclusive create: two writers committing on the same parent cannot both claim the next version.
+        with path.open("x", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+    except FileExistsError as exc:
+        raise CatalogConflictError(f"Lake snapshot {version} was committed by another writer") from exc
+
+
+def save_catalog(lake_dir: Path, entries: dict[str, CatalogEntry], parent_version: int | None = None) -> Path:
+    current = _read_pointer(lake_dir)
+    current_version = _head_version(lake_dir, current)
+    if parent_version is not None and parent_version != current_version:
+        raise CatalogConflictError(
+            f"Lake catalog moved from version {parent_version} to {current_version} during the write"
+        )
+    if current is not None and current_version == 0 and not snapshot_versions(lake_dir):
+        # Record the pre-snapshot catalog so garbage collection knows which files it referenced.
+        _claim_snapshot(lake_dir, 0, _payload(0, current[1]))
+    version = current_version + 1
+    payload = _payload(version, entries)
+    _claim_snapshot(lake_dir, version, payload)
+
+    # The pointer swap is the commit: readers see either the previous snapshot or this one, never a mix.
+    path = catalog_path(lake_dir)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    tmp_path.replace(path)
+    _CATALOG_CACHE[path] = (path.stat().st_mtime_ns, version, dict(entries))
+    sync_current_files(lake_dir, version, entries)
+    return path
+
+
+def _mirror_root(lake_dir: Path) -> Path:
+    return lake_dir.parent / f"{lake_dir.name}_current"
+
+
+def current_files_dir(lake_dir: Path) -> Path:
+    # A symlink to the mirror of the head snapshot; commits swap it atomically, so a glob never mixes two versions.
+    return _mirror_root(lake_dir) / CURRENT_LINK
+
+
+def _mirror_versions(root: Path) -> list[int]:
+    if not root.exists():
+        return []
+    return sorted(int(path.name[1:]) for path in root.iterdir() if path.name[:1] == "v" and path.name[1:].isdigit())
+
+
+def _published_version(root: Path) -> int | None:
+    try:
+        return int(Path(os.readlink(root / CURRENT_LINK)).name[1:])
+    except (OSError, ValueError):
+        return None
+
+
+def _publish(root: Path, version: int) -> None:
+    tmp_link = root / f".tmp_{CURRENT_LINK}_{os.getpid()}_{threading.get_ident()}"
+    tmp_link.unlink(missing_ok=True)
+    os.symlink(f"v{version:08d}", tmp_link, target_is_directory=True)
+    tmp_link.replace(root / CURRENT_LINK)
+
+
+def _link_files(lake_dir: Path, directory: Path, keys: Iterable[str]) -> None:
+    for key in keys:
+        link = directory / key
+        link.parent.mkdir(parents=True, exist_ok=True)
+        os.link(lake_dir / key, link)
+
+
+def _unlink_files(directory: Path, keys: Iterable[str]) -> None:
+    for key in keys:
+        (directory / key).unlink(missing_ok=True)
+        parent = (directory / key).parent
+        while parent != directory:
+            try:
+                parent.rmdir()
+            except OSError:
+                # Still holds other files.
+                break
+            parent = parent.parent
+
+
+def _build_mirror(lake_dir: Path, root: Path, version: int, wanted: set[str], retired: list[int]) -> None:
+    staging = root / f".tmp_v{version:08d}_{os.getpid()}_{threading.get_ident()}"
+    recycled = None
+    for candidate in retired:
+        try:
+            # The rename claims the directory, so two committers never edit the same one.
+            (root / f"v{candidate:08d}").rename(staging)
+        except OSError:
+            continue
+        recycled = candidate
+        break
+    if recycled is not None:
+        try:
+            _, linked = read_snapshot(lake_dir, recycled)
+        except FileNotFoundError:
+            # Its snapshot was collected, so the diff is unknown; start over.
+            shutil.rmtree(staging)
+            recycled = None
+    if recycled is None:
+        staging.mkdir(parents=True)
+        linked = set()
+    _unlink_files(staging, linked - wanted)
+    _link_files(lake_dir, staging, sorted(wanted - linked))
+    try:
+        staging.rename(root / f"v{version:08d}")
+    except OSError:
+        # Another process published this version first.
+        shutil.rmtree(staging)
+
+
+def sync_current_files(
+    lake_dir: Path, version: int | None = None, entries: dict[str, CatalogEntry] | None = None
+) -> Path:
+    # Each version gets its own directory of hard links, so the DuckDB bridge views read exactly the committed lake:
+    # never files still being written, superseded files GC has not removed, or removed ones. A new version recycles
+    # an older directory and only applies the snapshot diff to it.
+    if version is None or entries is None:
+        version, entries = catalog_head(lake_dir)
+    root = _mirror_root(lake_dir)
+    published = _published_version(root)
+    if published is not None and published >= version:
+        return current_files_dir(lake_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    versions = _mirror_versions(root)
+    # The published directory and its predecessor may still be read by queries that resolved the link earlier.
+    retired = [candidate for candidate in versions if published is not None and candidate < published][:-1]
+    if version not in versions:
+        _build_mirror(lake_dir, root, version, set(entries), retired)
+    _publish(root, version)
+    # A newer commit may have published between the check above and the swap; move the link forward once more.
+    newest = max(_mirror_versions(root))
+    if newest > version:
+        _publish(root, newest)
+    return current_files_dir(lake_dir)
+
+
+def rebuild_catalog(lake_dir: Path) -> dict[str, CatalogEntry]:
+    entries = scan_catalog(lake_dir)
+    if entries:
+        save_catalog(lake_dir, entries)
+        logger.info("Rebuilt lake catalog with %s files", len(entries))
+    return entries
+
+
+def current_catalog(lake_dir: Path) -> dict[str, CatalogEntry]:
+    current = _read_pointer(lake_dir)
+    if current is None:
+        # Lakes written before the catalog existed are indexed once on first use.
+        return rebuild_catalog(lake_dir)
+    return current[1]
+
+
+def catalog_head(lake_dir: Path) -> tuple[int, dict[str, CatalogEntry]]:
+    entries = current_catalog(lake_dir)
+    return catalog_version(lake_dir), entries
+
+
+def load_catalog(lake_dir: Path) -> dict[str, CatalogEntry]:
+    # Readers honour a pin; writers always go through current_catalog so they build on the head snapshot.
+    pinned = _PINNED.get().get(lake_dir)
+    if pinned is not None:
+        return pinned
+    return current_catalog(lake_dir)
+
+
+@contextmanager
+def pinned_catalog(lake_dir: Path, version: int | None = None) -> Iterator[dict[str, CatalogEntry]]:
+    pins = _PINNED.get()
+    if lake_dir in pins:
+        yield pins[lake_dir]
+        return
+    entries = None
+    if version is not None and version != catalog_version(lake_dir):
+        # An older snapshot stays readable for the retention window; once collected, readers move to the head.
+        entries = snapshot_entries(lake_dir, version)
+    if entries is None:
+        entries = current_catalog(lake_dir)
+    token = _PINNED.set({**pins, lake_dir: entries})
+    try:
+        yield entries
+    finally:
+        _PINNED.reset(token)
+
+
+def update_catalog(
+    lake_dir: Path,
+    rewritten_dirs: Iterable[Path],
+    new_files: Iterable[Path],
+    parent_version: int | None = None,
+) -> dict[str, CatalogEntry]:
+    # Writers index a catalog-less lake up front (catalog_head); rescanning here would pick up the files being committed.
+    current = _read_pointer(lake_dir)
+    entries = dict(current[1]) if current is not None else {}
+    for directory in rewritten_dirs:
+        prefix = _relative_key(lake_dir, directory) + "/"
+        for key in [key for key in entries if key.startswith(prefix)]:
+            del entries[key]
+    for path in new_files:
+        entry = describe_file(lake_dir, path)
+        entries[entry.path] = entry
+    save_catalog(lake_dir, entries, parent_version)
+    return entries
+
+
+def _overlaps(entry: CatalogEntry, date_start: datetime | None, date_end: datetime | None) -> bool:
+    start = _as_utc(date_start)
+    end = _as_utc(date_end)
+    if start is not None and entry.max_date is not None and entry.max_date < start:
+        return False
+    if end is not None and entry.min_date is not None and entry.min_date > end:
+        return False
+    return True
+
+
+def catalog_files(
+    lake_dir: Path,
+    date_start: datetime | None = None,
+    date_end: datetime | None = None,
+) -> list[str]:
+    entries = load_catalog(lake_dir)
+    return [
+        str(lake_dir / key)
+        for key in sorted(entries)
+        if _overlaps(entries[key], date_start, date_end)
+    ]
+
+
+def _hive_keys(lake_dir: Path, path: str) -> tuple[str, ...] | None:
+    directories = Path(path).relative_to(lake_dir).parts[:-1]
+    if not directories or not all("=" in part for part in directories):
+        return None
+    return tuple(part.partition("=")[0] for part in directories)
+
+
+def is_hive_layout(lake_dir: Path, files: Iterable[str]) -> bool:
+    # DuckDB rejects explicit hive partitioning when files sit at different depths (e.g. compacted months beside days).
+    keys = {_hive_keys(lake_dir, path) for path in files}
+    return len(keys) == 1 and None not in keys
+
+
+def catalog_has_data(lake_dir: Path) -> bool:
+    return any(entry.rows > 0 for entry in load_catalog(lake_dir).values())
+
+
+def catalog_date_range(lake_dir: Path) -> tuple[datetime | None, datetime | None]:
+    entries = load_catalog(lake_dir).values()
+    min_dates = [entry.min_date for entry in entries if entry.min_date is not None]
+    max_dates = [entry.max_date for entry in entries if entry.max_date is not None]
+    return (min(min_dates) if min_dates else None, max(max_dates) if max_dates else None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the lake catalog")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan the lake and rewrite the catalog")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    if args.rebuild:
+        entries = rebuild_catalog(settings.lake_dir)
+    else:
+        entries = load_catalog(settings.lake_dir)
+    min_date, max_date = catalog_date_range(settings.lake_dir)
+    logger.info(
+        "Lake catalog: %s files, %s rows, %s bytes, dates %s to %s",
+        len(entries),
+        sum(entry.rows for entry in entries.values()),
+        sum(entry.bytes for entry in entries.values()),
+        _dt_to_str(min_date),
+        _dt_to_str(max_date),
+    )
+
+
+if __name__ == "__main__":
+    main()
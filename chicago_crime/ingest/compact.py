@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.parquet_writer import compact_partitions
+from chicago_crime.ingest.snapshots import collect_garbage
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def compact_lake(granularity: str | None = None, after_days: int | None = None) -> list[Path]:
+    settings = get_settings()
+    granularity = granularity or settings.cold_partition_granularity
+    if granularity == "day":
+        logger.info("Cold partition granularity is 'day'; nothing to compact")
+        return []
+    days = settings.compact_after_days if after_days is None else after_days
+    closed_before = datetime.now(timezone.utc) - timedelta(days=days)
+    compacted = compact_partitions(settings.lake_dir, granularity, closed_before)
+    collect_garbage(settings.lake_dir)
+    logger.info("Compacted %s %s partitions closed before %s", len(compacted), granularity, closed_before.date())
+    return compacted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge closed day partitions into month or year files")
+    parser.add_argument(
+        "--granularity",
+        choices=["month", "year"],
+        default=None,
+        help="Target partition size (default COLD_PARTITION_GRANULARITY)",
+    )
+    parser.add_argument(
+        "--after-days",
+        type=int,
+        default=None,
+        help="Only compact periods that ended at least N days ago (default COMPACT_AFTER_DAYS)",
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    compact_lake(args.granularity, args.after_days)
+
+
+if __name__ == "__main__":
+    main()
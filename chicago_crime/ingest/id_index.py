@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
+from typing import Iterable
+
+import duckdb
+
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import CatalogEntry, current_catalog
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "crimes_ids.duckdb"
+
+
+def index_path_for(lake_dir: Path) -> Path:
+    return lake_dir.parent / INDEX_FILENAME
+
+
+def _escape_path(path: str) -> str:
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def _source_signature(entry: CatalogEntry) -> tuple[int, int]:
+    return entry.rows, entry.bytes
+
+
+def _connect(lake_dir: Path) -> duckdb.DuckDBPyConnection:
+    path = index_path_for(lake_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(str(path))
+    id_type = con.execute(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = 'crime_ids' AND column_name = 'id'"
+    ).fetchone()
+    if id_type is not None and id_type[0] != "BIGINT":
+        # Indexes built before ids were stored as integers are dropped and rebuilt on the next lookup.
+        con.execute("DROP TABLE crime_ids")
+        con.execute("DROP TABLE IF EXISTS indexed_sources")
+    con.execute("CREATE TABLE IF NOT EXISTS crime_ids (id BIGINT, partition VARCHAR)")
+    con.execute("CREATE TABLE IF NOT EXISTS indexed_sources (source VARCHAR, rows BIGINT, bytes BIGINT)")
+    return con
+
+
+def _indexed_sources(con: duckdb.DuckDBPyConnection) -> dict[str, tuple[int, int]]:
+    rows = con.execute("SELECT source, rows, bytes FROM indexed_sources").fetchall()
+    return {source: (rows_count, size) for source, rows_count, size in rows}
+
+
+def _insert_sources(
+    con: duckdb.DuckDBPyConnection,
+    lake_dir: Path,
+    catalog: dict[str, CatalogEntry],
+    keys: list[str],
+) -> None:
+    if not keys:
+        return
+    prefix = _escape_path(str(lake_dir)) + "/"
+    # Each id maps to the directory of the file holding it, which is the unit merge_partitions rewrites.
+    con.execute(
+        "INSERT INTO crime_ids "
+        "SELECT TRY_CAST(id AS BIGINT), "
+        f"parse_dirpath(substr(replace(filename, '\\', '/'), {len(prefix) + 1}), 'forward_slash') "
+        "FROM read_parquet(?, filename = true) WHERE id IS NOT NULL ORDER BY 1",
+        [[str(lake_dir / key) for key in keys]],
+    )
+    con.executemany(
+        "INSERT INTO indexed_sources VALUES (?, ?, ?)",
+        [[key, *_source_signature(catalog[key])] for key in keys],
+    )
+
+
+def _rebuild(con: duckdb.DuckDBPyConnection, lake_dir: Path, catalog: dict[str, CatalogEntry]) -> None:
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute("DELETE FROM crime_ids")
+        con.execute("DELETE FROM indexed_sources")
+        _insert_sources(con, lake_dir, catalog, sorted(catalog))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    logger.info("Built id index for %s lake files", len(catalog))
+
+
+def _in_sync(indexed: dict[str, tuple[int, int]], catalog: dict[str, CatalogEntry], keys: set[str]) -> bool:
+    return set(indexed) == keys and all(indexed[key] == _source_signature(catalog[key]) for key in keys)
+
+
+def build_id_index(lake_dir: Path) -> Path:
+    con = _connect(lake_dir)
+    try:
+        _rebuild(con, lake_dir, current_catalog(lake_dir))
+    finally:
+        con.close()
+    return index_path_for(lake_dir)
+
+
+def update_id_index(lake_dir: Path, rewritten_dirs: Iterable[Path]) -> Path:
+    catalog = current_catalog(lake_dir)
+    prefixes = [directory.relative_to(lake_dir).as_posix() + "/" for directory in rewritten_dirs]
+
+    def rewritten(key: str) -> bool:
+        return any(key.startswith(prefix) for prefix in prefixes)
+
+    con = _connect(lake_dir)
+    try:
+        indexed = _indexed_sources(con)
+        untouched = {key for key in catalog if not rewritten(key)}
+        if not _in_sync({key: value for key, value in indexed.items() if not rewritten(key)}, catalog, untouched):
+            logger.info("Id index is out of sync with the lake catalog; rebuilding")
+            _rebuild(con, lake_dir, catalog)
+            return index_path_for(lake_dir)
+
+        con.execute("BEGIN TRANSACTION")
+        try:
+            for prefix in prefixes:
+                con.execute("DELETE FROM crime_ids WHERE starts_with(partition || '/', ?)", [prefix])
+                con.execute("DELETE FROM indexed_sources WHERE starts_with(source, ?)", [prefix])
+            _insert_sources(con, lake_dir, catalog, sorted(key for key in catalog if rewritten(key)))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+    finally:
+        con.close()
+    logger.info("Updated id index for %s rewritten partitions", len(prefixes))
+    return index_path_for(lake_dir)
+
+
+def partitions_for_ids(lake_dir: Path, staged_path: Path) -> list[str]:
+    catalog = current_catalog(lake_dir)
+    if not catalog:
+        return []
+    con = _connect(lake_dir)
+    try:
+        if not _in_sync(_indexed_sources(con), catalog, set(catalog)):
+            logger.info("Id index is missing or stale; rebuilding")
+            _rebuild(con, lake_dir, catalog)
+        rows = con.execute(
+            "SELECT DISTINCT partition FROM crime_ids "
+            "WHERE id IN (SELECT TRY_CAST(id AS BIGINT) FROM read_parquet(?))",
+            [str(staged_path)],
+        ).fetchall()
+    finally:
+        con.close()
+    return sorted(row[0] for row in rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the crime id to partition index")
+    parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    build_id_index(settings.lake_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import pandas as pd
 
 from chicago_crime.config import get_settings
 from chicago_crime.ingest.soda_client import SodaClient
+from chicago_crime.ingest.write_profile import write_dataframe
 from chicago_crime.logging_config import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -80,14 +81,8 @@ def _fetch_sample(dataset_id: str) -> dict:
 def _fetch_all_rows(dataset_id: str) -> list[dict]:
     client = SodaClient()
     rows: list[dict] = []
-    offset = 0
-    limit = client.settings.page_limit
-    while True:
-        batch = client.fetch_rows(dataset_id, limit=limit, offset=offset)
-        if not batch:
-            break
+    for batch in client.fetch_all_pages(dataset_id):
         rows.extend(batch)
-        offset += limit
     return rows
 
 
@@ -194,7 +189,7 @@ def ensure_population_dim(force: bool = False, max_age_days: int | None = None)
 
     dim_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = dim_path.with_suffix(".parquet.tmp")
-    output.to_parquet(tmp_path, index=False)
+    write_dataframe(output, tmp_path)
     tmp_path.replace(dim_path)
     logger.info("Wrote population dim with %s rows", len(output))
     return dim_path
@@ -289,7 +284,7 @@ def ensure_acs_demographics_dim(force: bool = False, max_age_days: int | None =
 
     dim_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = dim_path.with_suffix(".parquet.tmp")
-    output.to_parquet(tmp_path, index=False)
+    write_dataframe(output, tmp_path)
     tmp_path.replace(dim_path)
     logger.info("Wrote ACS demographics dim with %s rows", len(output))
     return dim_path
@@ -7,19 +7,46 @@ import shutil
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from chicago_crime.config import get_settings
+from chicago_crime.ingest.bulk_import import stage_bulk_file
+from chicago_crime.ingest.compact import compact_lake
 from chicago_crime.ingest.lake_inspector import get_max_date_from_lake
-from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
-from chicago_crime.ingest.soda_client import SodaClient
-from chicago_crime.ingest.schema import NORMALIZED_COLUMNS
-from chicago_crime.ingest.state import IngestState, load_state, save_state
+from chicago_crime.ingest.parquet_writer import (
+    add_partition_columns,
+    combine_staged_pages,
+    merge_partitions,
+    write_staged_page,
+)
+from chicago_crime.ingest.soda_client import DATE_KEYS, UPDATED_AT_FIELD, UPDATED_AT_KEYS, Page, SodaClient
+from chicago_crime.ingest.schema import (
+    NORMALIZED_COLUMNS,
+    STAGED_ARROW_SCHEMA,
+    parse_timestamps,
+    table_to_record_batch,
+    to_record_batch,
+)
+from chicago_crime.ingest.shadow_backfill import (
+    ShadowValidationError,
+    build_shadow_lake,
+    promote_shadow_lake,
+    reset_shadow_lake,
+    validate_shadow_lake,
+)
+from chicago_crime.ingest.snapshots import collect_garbage
+from chicago_crime.ingest.state import FetchCheckpoint, IngestState, WindowCheckpoint, load_state, save_state
 from chicago_crime.logging_config import setup_logging
 
 logger = logging.getLogger(__name__)
 
+# Allows for clock skew between this host and the portal that stamps :updated_at.
+UPDATED_AT_SAFETY_LAG = timedelta(minutes=5)
+
 
 def _normalize_records(records: list[dict]) -> pd.DataFrame:
     if not records:
@@ -31,23 +58,41 @@ def _normalize_records(records: list[dict]) -> pd.DataFrame:
         if col not in df.columns:
             df[col] = None
     df = df[NORMALIZED_COLUMNS]
+    df["id"] = pd.to_numeric(df["id"], errors="coerce")
     df = df[df["id"].notna()]
-    df["id"] = df["id"].astype(str)
+    df["id"] = df["id"].astype("int64")
     df["date"] = pd.to_datetime(df.get("date"), utc=True, errors="coerce")
     df = df[df["date"].notna()]
     for col in ["arrest", "domestic"]:
         if col in df:
             df[col] = df[col].astype(str).str.lower().map({"true": True, "false": False})
-    numeric_cols = ["beat", "district", "ward", "community_area", "latitude", "longitude"]
-    for col in numeric_cols:
-        if col in df:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
     return df
 
 
-def _get_query_start(settings, lake_glob: str, full_backfill: bool) -> datetime:
-    if full_backfill:
-        return settings.start_date
+def _records_to_batch(records: list[dict]) -> pa.RecordBatch:
+    df = _normalize_records(records)
+    if df.empty:
+        return pa.RecordBatch.from_pylist([], schema=STAGED_ARROW_SCHEMA)
+    return to_record_batch(add_partition_columns(df))
+
+
+def _page_to_batch(page: Page) -> pa.RecordBatch:
+    if isinstance(page, pa.Table):
+        return table_to_record_batch(page)
+    return _records_to_batch(page)
+
+
+def _page_updated_at(page: Page) -> datetime | None:
+    if isinstance(page, pa.Table):
+        if UPDATED_AT_FIELD not in page.column_names:
+            return None
+        return pc.max(parse_timestamps(page.column(UPDATED_AT_FIELD).combine_chunks())).as_py()
+    stamps = pd.to_datetime([record.get(UPDATED_AT_FIELD) for record in page], utc=True, errors="coerce")
+    page_max = stamps.max() if len(stamps) else pd.NaT
+    return page_max.to_pydatetime() if pd.notna(page_max) else None
+
+
+def _get_query_start(settings, lake_glob: str) -> datetime:
     max_date = get_max_date_from_lake(lake_glob)
     backfill = timedelta(days=settings.backfill_days)
     if max_date is None:
@@ -60,60 +105,223 @@ def _get_query_start(settings, lake_glob: str, full_backfill: bool) -> datetime:
     return query_start
 
 
-def ingest_once(full_backfill: bool = False) -> IngestState:
-    settings = get_settings()
+def _run_dir(settings, checkpoint: FetchCheckpoint) -> Path:
+    return settings.staging_dir / f"fetch-{checkpoint.run_id}"
+
+
+def _updated_at_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - UPDATED_AT_SAFETY_LAG
+
+
+def _updated_at_watermark(checkpoint: FetchCheckpoint, previous: datetime | None) -> datetime | None:
+    high_water = checkpoint.updated_at_high_water
+    if high_water is None:
+        return previous
+    cutoff = checkpoint.updated_at_cutoff
+    if cutoff is not None:
+        # Windows are fetched in parallel and in no order, so a row edited mid-run can keep its old version in a window
+        # fetched early while a later window reports a newer :updated_at. Only changes made before the run started are
+        # known to be in the lake; the next sync re-reads everything after that.
+        high_water = cutoff if checkpoint.order_by != UPDATED_AT_FIELD else min(high_water, cutoff)
+    return max(high_water, previous or high_water)
+
+
+def _plan_fetch(settings, client: SodaClient, full_backfill: bool, sync_mode: str, workers: int) -> FetchCheckpoint:
+    checkpoint = FetchCheckpoint(
+        run_id=f"{time.time_ns():x}",
+        full_backfill=full_backfill,
+        sync_mode=sync_mode,
+        order_by="date",
+        updated_at_cutoff=_updated_at_cutoff(),
+    )
+    lake_glob = str(settings.lake_dir / "**" / "*.parquet")
     if full_backfill:
-        logger.info("Full backfill enabled; clearing lake, staging, and ingest state.")
-        if settings.lake_dir.exists():
-            shutil.rmtree(settings.lake_dir)
-        if settings.staging_dir.exists():
-            shutil.rmtree(settings.staging_dir)
-        if settings.state_path.exists():
-            settings.state_path.unlink()
+        query_start = settings.start_date
+        checkpoint.expected_rows = client.count_since(query_start)
+    else:
+        query_start = _get_query_start(settings, lake_glob)
+        previous = load_state().updated_at_watermark
+        if sync_mode == "cdc" and previous is not None and get_max_date_from_lake(lake_glob) is not None:
+            logger.info("Fetching rows changed since %s", previous.isoformat())
+            checkpoint.order_by = UPDATED_AT_FIELD
+            checkpoint.windows = [WindowCheckpoint(start=previous, end=None)]
+            return checkpoint
+        if sync_mode == "cdc":
+            logger.info("No change watermark yet; bootstrapping from %s", query_start.isoformat())
+    windows = client.plan_windows(query_start, workers)
+    checkpoint.windows = [WindowCheckpoint(start=start, end=end) for start, end in windows]
+    return checkpoint
+
+
+def _resume_or_plan(
+    settings, state: IngestState, client: SodaClient, full_backfill: bool, sync_mode: str, workers: int
+) -> FetchCheckpoint:
+    previous = state.checkpoint
+    if previous is not None and (previous.full_backfill, previous.sync_mode) == (full_backfill, sync_mode):
+        done = sum(window.pages for window in previous.windows)
+        logger.info("Resuming fetch %s after %s checkpointed pages", previous.run_id, done)
+        return previous
+    if previous is not None:
+        logger.info("Discarding checkpoint %s from a different kind of run", previous.run_id)
+        shutil.rmtree(_run_dir(settings, previous), ignore_errors=True)
+    state.checkpoint = _plan_fetch(settings, client, full_backfill, sync_mode, workers)
+    save_state(state)
+    return state.checkpoint
+
+
+def _checkpoint_pages(
+    client: SodaClient, checkpoint: FetchCheckpoint, workers: int
+) -> Iterator[tuple[int, Page | None]]:
+    pending = [index for index, window in enumerate(checkpoint.windows) if not window.done]
+    if checkpoint.order_by == UPDATED_AT_FIELD:
+        for index in pending:
+            window = checkpoint.windows[index]
+            for page in client.fetch_pages_updated_since(window.start, window.cursor):
+                yield index, page
+            yield index, None
+        return
+    windows = [checkpoint.windows[index] for index in pending]
+    for position, page in client.fetch_window_pages([(w.start, w.end, w.cursor) for w in windows], workers):
+        yield pending[position], page
+
+
+def _fetch_checkpointed(settings, state: IngestState, client: SodaClient, workers: int) -> tuple[Path | None, int]:
+    checkpoint = state.checkpoint
+    run_dir = _run_dir(settings, checkpoint)
+    keys = UPDATED_AT_KEYS if checkpoint.order_by == UPDATED_AT_FIELD else DATE_KEYS
+    for index, page in _checkpoint_pages(client, checkpoint, workers):
+        window = checkpoint.windows[index]
+        if page is None:
+            window.done = True
+        else:
+            # The page is on disk before the checkpoint moves past it, so a crash can at worst refetch one page.
+            batch = _page_to_batch(page)
+            if batch.num_rows:
+                write_staged_page(batch, run_dir / f"window-{index:04d}-page-{window.pages:06d}.parquet")
+            window.pages += 1
+            window.rows += batch.num_rows
+            window.cursor = client.page_cursor(page, window.cursor, keys)
+            page_max = _page_updated_at(page) if client.track_updated_at else None
+            high_water = checkpoint.updated_at_high_water
+            if page_max is not None and (high_water is None or page_max > high_water):
+                checkpoint.updated_at_high_water = page_max
+        save_state(state)
+    return combine_staged_pages(sorted(run_dir.glob("window-*.parquet")), run_dir / "staged.parquet")
+
+
+def _finish_run(settings, state: IngestState) -> None:
+    if state.checkpoint is not None:
+        shutil.rmtree(_run_dir(settings, state.checkpoint), ignore_errors=True)
+        state.checkpoint = None
+    save_state(state)
+
+
+def _promote_backfill(settings, state: IngestState, staged_path: Path | None) -> IngestState:
+    # The new lake is built and validated beside the live one, which keeps serving until the final swap.
+    checkpoint = state.checkpoint
+    shadow_dir = settings.shadow_lake_dir
+    logger.info("Building a shadow lake in %s", shadow_dir)
+    closed_before = datetime.now(timezone.utc) - timedelta(days=settings.compact_after_days)
+    build_shadow_lake(staged_path, shadow_dir, settings.cold_partition_granularity, closed_before)
+    try:
+        rows = validate_shadow_lake(shadow_dir, checkpoint.expected_rows or 0, settings.shadow_backfill_tolerance)
+    except ShadowValidationError:
+        # Resuming would only re-validate the same pages, so a rejected fetch starts over next time.
+        _finish_run(settings, state)
+        raise
+
     settings.lake_dir.mkdir(parents=True, exist_ok=True)
-    settings.staging_dir.mkdir(parents=True, exist_ok=True)
+    promote_shadow_lake(shadow_dir, settings.lake_dir)
+    reset_shadow_lake(shadow_dir)
 
     lake_glob = str(settings.lake_dir / "**" / "*.parquet")
-    query_start = _get_query_start(settings, lake_glob, full_backfill)
+    state.dataset_id = settings.dataset_id
+    state.backfill_days = settings.backfill_days
+    state.watermark_max_date = get_max_date_from_lake(lake_glob)
+    state.last_run_at = datetime.now(timezone.utc)
+    state.rows_last_run = rows
+    state.updated_at_watermark = _updated_at_watermark(checkpoint, None)
+    _finish_run(settings, state)
+    collect_garbage(settings.lake_dir)
+    logger.info("Full backfill complete: %s rows in the lake", rows)
+    return state
 
-    client = SodaClient()
-    records: list[dict] = []
-    for row in client.fetch_since(query_start):
-        records.append(row)
 
-    df = _normalize_records(records)
-    if df.empty:
-        state = load_state()
+def ingest_once(
+    full_backfill: bool = False,
+    workers: int | None = None,
+    sync_mode: str | None = None,
+) -> IngestState:
+    settings = get_settings()
+    workers = workers or settings.fetch_workers
+    sync_mode = sync_mode or settings.sync_mode
+    settings.lake_dir.mkdir(parents=True, exist_ok=True)
+    settings.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    state = load_state()
+    client = SodaClient(track_updated_at=sync_mode == "cdc")
+    checkpoint = _resume_or_plan(settings, state, client, full_backfill, sync_mode, workers)
+    staged_path, staged_rows = _fetch_checkpointed(settings, state, client, workers)
+    if full_backfill:
+        return _promote_backfill(settings, state, staged_path)
+
+    if staged_path is None:
         state.last_run_at = datetime.now(timezone.utc)
         state.rows_last_run = 0
-        save_state(state)
+        _finish_run(settings, state)
         logger.info("No new rows to ingest")
         return state
 
-    df = add_partition_columns(df)
-    staged_path = write_staged_parquet(df, settings.staging_dir)
+    logger.info("Staged %s rows to %s", staged_rows, staged_path)
     rows_written, max_date = merge_partitions(settings.lake_dir, staged_path)
 
-    try:
-        staged_path.unlink()
-    except OSError:
-        logger.warning("Failed to remove staged file %s", staged_path)
-
+    lake_glob = str(settings.lake_dir / "**" / "*.parquet")
     lake_max = get_max_date_from_lake(lake_glob) or max_date
-    state = load_state()
     state.dataset_id = settings.dataset_id
     state.backfill_days = settings.backfill_days
     state.watermark_max_date = lake_max
     state.last_run_at = datetime.now(timezone.utc)
     state.rows_last_run = rows_written
-    save_state(state)
+    state.updated_at_watermark = _updated_at_watermark(checkpoint, state.updated_at_watermark)
+    # Clearing the checkpoint is the last step; a crash before it re-merges the same pages, which is idempotent.
+    _finish_run(settings, state)
+    collect_garbage(settings.lake_dir)
     logger.info("Ingest complete: %s rows written", rows_written)
     return state
 
 
-def _loop_ingest(interval_hours: int, full_backfill: bool) -> None:
+def ingest_from_file(source: Path) -> IngestState:
+    settings = get_settings()
+    settings.lake_dir.mkdir(parents=True, exist_ok=True)
+    staged_path = settings.staging_dir / f"bulk-{time.time_ns():x}.parquet"
+    state = load_state()
+    try:
+        staged_rows = stage_bulk_file(source, staged_path)
+        if staged_rows == 0:
+            logger.info("No rows to import from %s", source)
+            return state
+        # The import upserts by id like any other merge, so it can seed an empty lake or overlay an existing one.
+        rows_written, _ = merge_partitions(settings.lake_dir, staged_path)
+    finally:
+        staged_path.unlink(missing_ok=True)
+
+    lake_glob = str(settings.lake_dir / "**" / "*.parquet")
+    state.dataset_id = settings.dataset_id
+    state.backfill_days = settings.backfill_days
+    state.watermark_max_date = get_max_date_from_lake(lake_glob)
+    state.last_run_at = datetime.now(timezone.utc)
+    state.rows_last_run = rows_written
+    save_state(state)
+    collect_garbage(settings.lake_dir)
+    logger.info("Imported %s: %s rows written", source, rows_written)
+    return state
+
+
+def _loop_ingest(interval_hours: int, full_backfill: bool, workers: int | None, sync_mode: str | None) -> None:
     while True:
-        ingest_once(full_backfill=full_backfill)
+        ingest_once(full_backfill=full_backfill, workers=workers, sync_mode=sync_mode)
+        if get_settings().cold_partition_granularity != "day":
+            compact_lake()
         time.sleep(interval_hours * 3600)
 
 
@@ -124,7 +332,25 @@ def main() -> None:
     parser.add_argument(
         "--full-backfill",
         action="store_true",
-        help="Ignore existing max date and start from START_DATE",
+        help="Rebuild the whole lake from START_DATE in a shadow directory, validate it, then swap it in",
+    )
+    parser.add_argument(
+        "--from-file",
+        type=Path,
+        default=None,
+        help="Import a local bulk export (.csv, .csv.gz or .parquet) into the lake instead of calling the API",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Fetch date windows in parallel with N workers (default FETCH_WORKERS)",
+    )
+    parser.add_argument(
+        "--sync",
+        choices=["window", "cdc"],
+        default=None,
+        help="Re-pull the BACKFILL_DAYS window, or fetch only rows changed since the last :updated_at (default SYNC_MODE)",
     )
     args = parser.parse_args()
 
@@ -134,10 +360,12 @@ def main() -> None:
     loop_env = os.getenv("CHI_INGEST_LOOP", "0") == "1"
     interval_hours = int(os.getenv("CHI_INGEST_INTERVAL_HOURS", "24"))
 
-    if args.loop or loop_env:
-        _loop_ingest(interval_hours, full_backfill=args.full_backfill)
+    if args.from_file is not None:
+        ingest_from_file(args.from_file)
+    elif args.loop or loop_env:
+        _loop_ingest(interval_hours, full_backfill=args.full_backfill, workers=args.workers, sync_mode=args.sync)
     else:
-        ingest_once(full_backfill=args.full_backfill)
+        ingest_once(full_backfill=args.full_backfill, workers=args.workers, sync_mode=args.sync)
 
 
 if __name__ == "__main__":
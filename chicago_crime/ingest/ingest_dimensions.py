@@ -10,6 +10,7 @@ import pandas as pd
 import requests
 
 from chicago_crime.config import get_settings
+from chicago_crime.ingest.write_profile import write_dataframe
 from chicago_crime.logging_config import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -99,7 +100,7 @@ def ensure_community_areas_dim(force: bool = False, max_age_days: int | None = N
     dim_path = _dim_parquet_path()
     dim_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = dim_path.with_suffix(".parquet.tmp")
-    df.to_parquet(tmp_path, index=False)
+    write_dataframe(df, tmp_path)
     tmp_path.replace(dim_path)
     logger.info("Wrote community areas dim with %s rows", len(df))
     return dim_path
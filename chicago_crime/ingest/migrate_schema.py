@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import duckdb
+
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import catalog_head, current_catalog, update_catalog
+from chicago_crime.ingest.id_index import build_id_index
+from chicago_crime.ingest.parquet_writer import data_file_name
+from chicago_crime.ingest.rollup import build_rollup
+from chicago_crime.ingest.schema import LAKE_SQL_TYPES, PARTITION_COLUMNS, lake_columns_sql
+from chicago_crime.ingest.write_profile import WriteProfile, get_write_profile
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def _escape_path(path: str) -> str:
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def _column_types(con: duckdb.DuckDBPyConnection, files: list[str]) -> dict[str, str]:
+    return {
+        name: sql_type
+        for name, sql_type, *_ in con.execute(
+            "DESCRIBE SELECT * FROM read_parquet(?, hive_partitioning = false, union_by_name = true)", [files]
+        ).fetchall()
+    }
+
+
+def _is_current(con: duckdb.DuckDBPyConnection, path: Path, profile: WriteProfile) -> bool:
+    types = _column_types(con, [str(path)])
+    if profile.drop_partition_columns and set(PARTITION_COLUMNS) & set(types):
+        return False
+    return all(types.get(name) == sql_type for name, sql_type in LAKE_SQL_TYPES.items())
+
+
+def stale_partitions(lake_dir: Path) -> dict[str, list[str]]:
+    profile = get_write_profile()
+    partitions: dict[str, list[str]] = {}
+    for key in sorted(current_catalog(lake_dir)):
+        partitions.setdefault(key.rpartition("/")[0], []).append(key)
+    con = duckdb.connect()
+    try:
+        return {
+            partition: keys
+            for partition, keys in partitions.items()
+            if not all(_is_current(con, lake_dir / key, profile) for key in keys)
+        }
+    finally:
+        con.close()
+
+
+def migrate_lake(lake_dir: Path) -> list[Path]:
+    profile = get_write_profile()
+    stale = stale_partitions(lake_dir)
+    if not stale:
+        logger.info("Lake already uses the typed schema; nothing to migrate")
+        return []
+
+    parent_version, _ = catalog_head(lake_dir)
+    rewritten: list[Path] = []
+    new_files: list[Path] = []
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    profile.prepare(con)
+    try:
+        for partition, keys in sorted(stale.items()):
+            partition_dir = lake_dir / partition
+            files = [str(lake_dir / key) for key in keys]
+            stamp = time.time_ns()
+            tmp_path = partition_dir / f".tmp_migrate_{stamp}.parquet"
+            con.execute(
+                f"COPY (SELECT {lake_columns_sql(_column_types(con, files))} "
+                "FROM read_parquet(?, hive_partitioning = false, union_by_name = true) "
+                f"{profile.order_sql()}) TO '{_escape_path(str(tmp_path))}' ({profile.copy_options()})",
+                [files],
+            )
+            migrated_path = partition_dir / data_file_name(stamp, 0)
+            tmp_path.rename(migrated_path)
+            new_files.append(migrated_path)
+            rewritten.append(partition_dir)
+            logger.info("Migrated partition %s", partition)
+    finally:
+        con.close()
+
+    # One snapshot swaps every migrated partition in; the old files are left for garbage collection.
+    update_catalog(lake_dir, rewritten, new_files, parent_version)
+    # Every id and rollup source changed bytes, so rebuilding is cheaper than diffing.
+    build_id_index(lake_dir)
+    build_rollup(lake_dir)
+    logger.info("Migrated %s partitions to the typed lake schema", len(rewritten))
+    return rewritten
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite lake partitions into the typed lake schema")
+    parser.add_argument("--dry-run", action="store_true", help="Only report partitions that need rewriting")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    if args.dry_run:
+        stale = stale_partitions(settings.lake_dir)
+        logger.info("%s partitions need migrating", len(stale))
+        for partition in sorted(stale):
+            logger.info("  %s", partition)
+        return
+    migrate_lake(settings.lake_dir)
+
+
+if __name__ == "__main__":
+    main()
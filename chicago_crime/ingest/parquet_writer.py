@@ -5,9 +5,19 @@ import shutil
 import time
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable
+from urllib.parse import unquote
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from chicago_crime.ingest.catalog import catalog_head, current_catalog, update_catalog
+from chicago_crime.ingest.id_index import partitions_for_ids, update_id_index
+from chicago_crime.ingest.rollup import update_rollup
+from chicago_crime.ingest.schema import lake_columns_sql, to_record_batch
+from chicago_crime.ingest.write_profile import WriteProfile, get_write_profile, write_table
 
 logger = logging.getLogger(__name__)
 
@@ -26,97 +36,325 @@ def write_staged_parquet(df: pd.DataFrame, staging_dir: Path) -> Path:
     staging_dir.mkdir(parents=True, exist_ok=True)
     ts = int(time.time())
     path = staging_dir / f"crimes_stage_{ts}.parquet"
-    df.to_parquet(path, index=False)
+    return write_table(pa.Table.from_batches([to_record_batch(df)]), path)
+
+
+def write_staged_page(batch: pa.RecordBatch, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".tmp_{path.name}")
+    profile = get_write_profile()
+    # Written under a temporary name so a page file that exists on disk is always complete.
+    with pq.ParquetWriter(tmp_path, batch.schema, **profile.arrow_options(batch.schema.names)) as writer:
+        writer.write_batch(batch)
+    tmp_path.replace(path)
     return path
 
 
+def combine_staged_pages(pages: Iterable[Path], path: Path) -> tuple[Path | None, int]:
+    profile = get_write_profile()
+    writer: pq.ParquetWriter | None = None
+    rows = 0
+    try:
+        # Each page stays its own row group, so only one page is held in memory at a time.
+        for page in pages:
+            table = pq.read_table(page)
+            if table.num_rows == 0:
+                continue
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, **profile.arrow_options(table.schema.names))
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return None, 0
+    return path, rows
+
+
+PARTITION_GRANULARITIES = ("day", "month", "year")
+
+
+def partition_key(year: str, month: str, day: str, granularity: str = "day") -> str:
+    parts = [f"year={year}"]
+    if granularity in ("day", "month"):
+        parts.append(f"month={month}")
+    if granularity == "day":
+        parts.append(f"day={day}")
+    return "/".join(parts)
+
+
 def _partition_dir(lake_dir: Path, year: str, month: str, day: str) -> Path:
-    return lake_dir / f"year={year}" / f"month={month}" / f"day={day}"
+    return lake_dir / partition_key(year, month, day)
+
+
+def _partition_values(partition: str) -> dict[str, str] | None:
+    segments = partition.split("/") if partition else []
+    names = [segment.partition("=")[0] for segment in segments]
+    if names not in (["year"], ["year", "month"], ["year", "month", "day"]):
+        return None
+    return dict(segment.split("=", 1) for segment in segments)
+
 
+def _lake_partitions(lake_dir: Path) -> set[str]:
+    return {key.rpartition("/")[0] for key in current_catalog(lake_dir)}
 
-def _lake_glob(lake_dir: Path) -> str:
-    return str(lake_dir / "**" / "*.parquet")
 
+def _partition_files(lake_dir: Path, partitions: Iterable[str]) -> list[str]:
+    wanted = set(partitions)
+    return [str(lake_dir / key) for key in sorted(current_catalog(lake_dir)) if key.rpartition("/")[0] in wanted]
+
+
+def data_file_name(stamp: int, number: int) -> str:
+    # Files are never rewritten in place; a fresh name per write keeps older snapshots readable until GC.
+    return f"part-{stamp:x}-{number:03d}.parquet"
+
+
+def _covering_partition(partitions: set[str], year: str, month: str, day: str) -> str:
+    # Compacted months and years absorb late rows instead of growing day directories beside them.
+    for granularity in ("month", "year"):
+        key = partition_key(year, month, day, granularity)
+        if key in partitions:
+            return key
+    return partition_key(year, month, day)
+
+
+def _escape_path(path: str) -> str:
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def _escape_literal(value: str) -> str:
+    return value.replace("'", "''")
+
+
+def _target_expr(touched: list[str]) -> str:
+    day_key = "'year=' || year || '/month=' || month || '/day=' || day"
+    whens = []
+    for key in touched:
+        values = _partition_values(key)
+        if values is None or "day" in values:
+            continue
+        condition = " AND ".join(f"{name} = '{_escape_literal(value)}'" for name, value in values.items())
+        whens.append(f"WHEN {condition} THEN '{_escape_literal(key)}'")
+    if not whens:
+        return day_key
+    return f"CASE {' '.join(whens)} ELSE {day_key} END"
 
-def _lake_has_data(lake_dir: Path) -> bool:
-    return lake_dir.exists() and any(lake_dir.rglob("*.parquet"))
+
+def _columns(con: duckdb.DuckDBPyConnection, files: list[str] | str) -> set[str]:
+    return {
+        row[0]
+        for row in con.execute(
+            "DESCRIBE SELECT * FROM read_parquet(?, hive_partitioning = false, union_by_name = true)", [files]
+        ).fetchall()
+    }
+
+
+def _merge_query(
+    con: duckdb.DuckDBPyConnection,
+    existing_files: list[str],
+    staged_path: Path,
+    touched: list[str],
+    profile: WriteProfile,
+) -> tuple[str, list]:
+    # Staged rows are the newer version of a record, so they win even if a correction moved the date back.
+    # Every source is cast to the lake schema, so partitions written before the typed schema are upgraded in passing.
+    sources = [f"SELECT {lake_columns_sql(_columns(con, str(staged_path)))}, 1 AS staged FROM read_parquet(?)"]
+    params: list = []
+    if existing_files:
+        sources.insert(
+            0,
+            f"SELECT {lake_columns_sql(_columns(con, existing_files))}, 0 AS staged "
+            "FROM read_parquet(?, hive_partitioning = false, union_by_name = true)",
+        )
+        params.append(existing_files)
+    union = " UNION ALL ".join(f"({source})" for source in sources)
+    query = (
+        f"SELECT {profile.body_columns_sql()}, {_target_expr(touched)} AS target FROM ("
+        "SELECT * EXCLUDE (rn, staged), "
+        "strftime(date, '%Y') AS year, strftime(date, '%m') AS month, strftime(date, '%d') AS day "
+        "FROM ("
+        "SELECT *, row_number() OVER (PARTITION BY id ORDER BY staged DESC, date DESC) AS rn "
+        f"FROM ({union})"
+        ") WHERE rn = 1 AND date IS NOT NULL) "
+        f"{profile.order_sql('target')}"
+    )
+    return query, params
+
+
+def _publish_partition(source_dir: Path, partition_dir: Path, stamp: int) -> list[Path]:
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    published = []
+    for number, path in enumerate(sorted(source_dir.glob("*.parquet"))):
+        target = partition_dir / data_file_name(stamp, number)
+        path.rename(target)
+        published.append(target)
+    return published
+
+
+def _discard(paths: Iterable[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _written_partitions(
+    con: duckdb.DuckDBPyConnection, out_root: Path
+) -> dict[str, tuple[Path, int, datetime | None]]:
+    written: dict[str, tuple[Path, int, datetime | None]] = {}
+    if not out_root.exists():
+        return written
+    prefix = _escape_path(str(out_root)) + "/"
+    for directory, rows, partition_max in con.execute(
+        f"SELECT parse_dirpath(substr(replace(filename, '\\', '/'), {len(prefix) + 1}), 'forward_slash'), "
+        "COUNT(*), MAX(date) "
+        "FROM read_parquet(?, filename = true, hive_partitioning = false) GROUP BY 1",
+        [str(out_root / "**" / "*.parquet")],
+    ).fetchall():
+        key = unquote(directory.partition("=")[2])
+        written[key] = (out_root / directory, rows, partition_max)
+    return written
 
 
 def merge_partitions(lake_dir: Path, staged_path: Path) -> tuple[int, datetime | None]:
+    profile = get_write_profile()
+    parent_version, _ = catalog_head(lake_dir)
     con = duckdb.connect()
-    staged_df = con.execute(
-        "SELECT DISTINCT year, month, day FROM read_parquet(?)",
-        [str(staged_path)],
-    ).fetchdf()
-
-    touched_df = staged_df.copy()
-    if _lake_has_data(lake_dir):
-        lake_partitions = con.execute(
-            "SELECT DISTINCT year, month, day FROM read_parquet(?) "
-            "WHERE id IN (SELECT DISTINCT id FROM read_parquet(?))",
-            [_lake_glob(lake_dir), str(staged_path)],
-        ).fetchdf()
-        if not lake_partitions.empty:
-            touched_df = pd.concat([touched_df, lake_partitions]).drop_duplicates()
-    con.close()
+    con.execute("SET TimeZone = 'UTC'")
+    profile.prepare(con)
+    try:
+        lake_partitions = _lake_partitions(lake_dir)
+        staged_partitions = {
+            _covering_partition(lake_partitions, *row)
+            for row in con.execute(
+                "SELECT DISTINCT strftime(date, '%Y'), strftime(date, '%m'), strftime(date, '%d') "
+                "FROM read_parquet(?) WHERE date IS NOT NULL",
+                [str(staged_path)],
+            ).fetchall()
+        }
+        id_partitions = {
+            partition
+            for partition in partitions_for_ids(lake_dir, staged_path)
+            if _partition_values(partition) is not None
+        }
+        touched = sorted(staged_partitions | id_partitions)
+        if not touched:
+            return 0, None
+
+        existing_files = _partition_files(lake_dir, touched)
+        stamp = time.time_ns()
+        out_root = lake_dir / f".tmp_merge_{stamp}"
+        lake_dir.mkdir(parents=True, exist_ok=True)
+        query, params = _merge_query(con, existing_files, staged_path, touched, profile)
+        # One dedupe pass over every touched partition; DuckDB fans the partitioned write out across its threads.
+        con.execute(
+            f"COPY ({query}) TO '{_escape_path(str(out_root))}' "
+            f"({profile.copy_options()}, PARTITION_BY (target))",
+            params + [str(staged_path)],
+        )
+        written = _written_partitions(con, out_root)
+    finally:
+        con.close()
 
     total_rows = 0
     max_date: datetime | None = None
+    rewritten_dirs: list[Path] = []
+    new_files: list[Path] = []
+    try:
+        for key in touched:
+            rewritten_dirs.append(lake_dir / key)
+            if key not in written:
+                logger.info("Removed empty partition %s", key)
+                continue
+            source_dir, rows, partition_max = written[key]
+            new_files.extend(_publish_partition(source_dir, lake_dir / key, stamp))
+            total_rows += rows
+            if partition_max is not None:
+                if partition_max.tzinfo is None:
+                    partition_max = partition_max.replace(tzinfo=timezone.utc)
+                max_date = partition_max if max_date is None else max(max_date, partition_max)
+            logger.info("Wrote partition %s with %s rows", key, rows)
+        update_catalog(lake_dir, rewritten_dirs, new_files, parent_version)
+    except Exception:
+        _discard(new_files)
+        raise
+    finally:
+        if out_root.exists():
+            shutil.rmtree(out_root)
 
-    for _, row in touched_df.iterrows():
-        year = str(row["year"])
-        month = str(row["month"])
-        day = str(row["day"])
-        partition_dir = _partition_dir(lake_dir, year, month, day)
-        existing_glob = str(partition_dir / "*.parquet")
-        has_existing = partition_dir.exists() and any(partition_dir.glob("*.parquet"))
-
-        con = duckdb.connect()
-        if has_existing:
-            query = (
-                "SELECT * EXCLUDE (rn) FROM ("
-                "SELECT *, row_number() OVER (PARTITION BY id ORDER BY date DESC) AS rn "
-                "FROM (SELECT * FROM read_parquet(?) UNION ALL SELECT * FROM read_parquet(?))"
-                ") WHERE rn = 1"
-            )
-            params = [existing_glob, str(staged_path)]
-        else:
-            query = (
-                "SELECT * EXCLUDE (rn) FROM ("
-                "SELECT *, row_number() OVER (PARTITION BY id ORDER BY date DESC) AS rn "
-                "FROM read_parquet(?)"
-                ") WHERE rn = 1"
-            )
-            params = [str(staged_path)]
-        merged_df = con.execute(
-            query + " AND year = ? AND month = ? AND day = ?",
-            params + [year, month, day],
-        ).fetchdf()
-        con.close()
+    if rewritten_dirs:
+        update_id_index(lake_dir, rewritten_dirs)
+        update_rollup(lake_dir, rewritten_dirs)
+    return total_rows, max_date
 
-        if merged_df.empty:
-            if partition_dir.exists():
-                shutil.rmtree(partition_dir)
-                logger.info("Removed empty partition %s/%s/%s", year, month, day)
-            continue
 
-        temp_dir = partition_dir.parent / f".tmp_{partition_dir.name}_{int(time.time())}"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        out_path = temp_dir / "part-000.parquet"
-        merged_df.to_parquet(out_path, index=False)
+def _compaction_key(partition: str, granularity: str) -> str | None:
+    values = _partition_values(partition)
+    if values is None:
+        return None
+    if granularity == "year":
+        return f"year={values['year']}"
+    if "month" not in values:
+        return None
+    return f"year={values['year']}/month={values['month']}"
 
-        if partition_dir.exists():
-            shutil.rmtree(partition_dir)
-        temp_dir.rename(partition_dir)
 
-        total_rows += len(merged_df)
-        max_partition_date = pd.to_datetime(merged_df["date"], utc=True).max()
-        if pd.notna(max_partition_date):
-            dt = max_partition_date.to_pydatetime()
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            max_date = dt if max_date is None else max(max_date, dt)
+def _period_end(key: str) -> datetime:
+    values = _partition_values(key) or {}
+    year = int(values["year"])
+    if "month" not in values:
+        return datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    month = int(values["month"])
+    return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
 
-        logger.info("Wrote partition %s/%s/%s with %s rows", year, month, day, len(merged_df))
 
-    return total_rows, max_date
+def compact_partitions(lake_dir: Path, granularity: str, closed_before: datetime) -> list[Path]:
+    if granularity not in ("month", "year"):
+        raise ValueError(f"Cannot compact to {granularity!r}; use 'month' or 'year'")
+    groups: dict[str, list[str]] = {}
+    for partition in sorted(_lake_partitions(lake_dir)):
+        key = _compaction_key(partition, granularity)
+        if key is not None:
+            groups.setdefault(key, []).append(partition)
+
+    profile = get_write_profile()
+    compacted: list[Path] = []
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    profile.prepare(con)
+    try:
+        for key, members in sorted(groups.items()):
+            if members == [key] or _period_end(key) > closed_before:
+                continue
+            coarse_dir = lake_dir / key
+            coarse_dir.mkdir(parents=True, exist_ok=True)
+            parent_version, _ = catalog_head(lake_dir)
+            files = _partition_files(lake_dir, members)
+            stamp = time.time_ns()
+            tmp_path = coarse_dir / f".tmp_compact_{stamp}.parquet"
+            con.execute(
+                f"COPY (SELECT * EXCLUDE (rn) FROM ("
+                "SELECT *, row_number() OVER (PARTITION BY id ORDER BY date DESC) AS rn FROM ("
+                f"SELECT {lake_columns_sql(_columns(con, files))} "
+                "FROM read_parquet(?, hive_partitioning = false, union_by_name = true))"
+                f") WHERE rn = 1 {profile.order_sql()}) "
+                f"TO '{_escape_path(str(tmp_path))}' ({profile.copy_options()})",
+                [files],
+            )
+            compacted_path = coarse_dir / data_file_name(stamp, 0)
+            tmp_path.rename(compacted_path)
+            # The catalog swap is the commit point: readers move from the member files to the compacted one at once.
+            # Member files stay on disk for readers pinned to older snapshots until garbage collection.
+            try:
+                update_catalog(lake_dir, [coarse_dir], [compacted_path], parent_version)
+            except Exception:
+                _discard([compacted_path])
+                raise
+            compacted.append(coarse_dir)
+            logger.info("Compacted %s partitions into %s", len(members), key)
+    finally:
+        con.close()
+
+    if compacted:
+        update_id_index(lake_dir, compacted)
+        update_rollup(lake_dir, compacted)
+    return compacted
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+import duckdb
+
+from chicago_crime import db
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import CatalogEntry, current_catalog, load_catalog
+from chicago_crime.ingest.write_profile import get_write_profile
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "_manifest.json"
+
+ROLLUP_KEYS = [
+    "day",
+    "hour",
+    "dow",
+    "primary_type",
+    "district",
+    "community_area",
+    "arrest",
+    "domestic",
+]
+
+_MANIFEST_CACHE: dict[Path, tuple[int, "RollupManifest"]] = {}
+
+
+@dataclass
+class RollupManifest:
+    sources: dict[str, list[int]]
+    buckets: dict[str, str]
+    retired: dict[str, str] = field(default_factory=dict)
+    # Distinct filter values per bucket file, so the dashboard lists options without scanning the lake.
+    options: dict[str, dict[str, list[str]]] = field(default_factory=dict)
+
+
+def rollup_dir_for(lake_dir: Path) -> Path:
+    return lake_dir.parent / "crimes_rollup"
+
+
+def _manifest_path(rollup_dir: Path) -> Path:
+    return rollup_dir / MANIFEST_FILENAME
+
+
+def _bucket(key: str) -> str:
+    first, _, rest = key.partition("/")
+    if first.startswith("year=") and rest:
+        return first
+    return "_root"
+
+
+def _bucket_file_name(bucket: str, stamp: int) -> str:
+    return f"{bucket}-{stamp:x}.parquet"
+
+
+def _escape_path(path: str) -> str:
+    return path.replace("\\", "/").replace("'", "''")
+
+
+def _source_signature(entry: CatalogEntry) -> list[int]:
+    return [entry.rows, entry.bytes]
+
+
+def _load_manifest(rollup_dir: Path) -> RollupManifest | None:
+    path = _manifest_path(rollup_dir)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _MANIFEST_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with path.open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    sources = payload.get("sources", {})
+    buckets = payload.get("buckets")
+    if buckets is None:
+        # Manifests written before bucket files were versioned used one fixed file per bucket.
+        buckets = {
+            bucket: f"{bucket}.parquet"
+            for bucket in {_bucket(key) for key in sources}
+            if (rollup_dir / f"{bucket}.parquet").exists()
+        }
+    manifest = RollupManifest(
+        sources=sources, buckets=buckets, retired=payload.get("retired", {}), options=payload.get("options", {})
+    )
+    _MANIFEST_CACHE[path] = (mtime, manifest)
+    return manifest
+
+
+def _save_manifest(rollup_dir: Path, manifest: RollupManifest) -> None:
+    path = _manifest_path(rollup_dir)
+    retired = {name: at for name, at in manifest.retired.items() if (rollup_dir / name).exists()}
+    live = set(manifest.buckets.values())
+    options = {name: values for name, values in manifest.options.items() if name in live}
+    payload = {"sources": manifest.sources, "buckets": manifest.buckets, "retired": retired, "options": options}
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    tmp_path.replace(path)
+    _MANIFEST_CACHE[path] = (
+        path.stat().st_mtime_ns,
+        RollupManifest(manifest.sources, manifest.buckets, retired, options),
+    )
+
+
+def _retire(manifest: RollupManifest, old_buckets: dict[str, str]) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    live = set(manifest.buckets.values())
+    for name in old_buckets.values():
+        if name not in live:
+            manifest.retired.setdefault(name, now)
+
+
+def _aggregate_sql(con: duckdb.DuckDBPyConnection, lake_dir: Path, files: list[str]) -> str:
+    available = {
+        row[0] for row in con.execute("DESCRIBE SELECT * FROM read_parquet(?)", [files]).fetchall()
+    }
+
+    def column(name: str) -> str:
+        return name if name in available else "NULL"
+
+    community_area = column("community_area")
+    prefix = _escape_path(str(lake_dir)) + "/"
+    # Keys are derived from the UTC wall clock so the rollup does not depend on the session time zone.
+    return (
+        f"SELECT substr(replace(filename, '\\', '/'), {len(prefix) + 1}) AS source, "
+        "CAST(timezone('UTC', date) AS DATE) AS day, "
+        "CAST(hour(timezone('UTC', date)) AS SMALLINT) AS hour, "
+        "CAST(dayofweek(timezone('UTC', date)) AS SMALLINT) AS dow, "
+        f"{column('primary_type')} AS primary_type, "
+        f"{column('district')} AS district, "
+        f"TRY_CAST({community_area} AS TINYINT) AS community_area, "
+        f"{column('arrest')} AS arrest, "
+        f"{column('domestic')} AS domestic, "
+        "COUNT(*) AS count, "
+        f"SUM(CASE WHEN {column('arrest')} THEN 1 ELSE 0 END) AS arrest_count "
+        "FROM read_parquet(?, filename = true) "
+        "WHERE date IS NOT NULL "
+        "GROUP BY ALL"
+    )
+
+
+def _write_bucket(
+    con: duckdb.DuckDBPyConnection,
+    lake_dir: Path,
+    rollup_dir: Path,
+    bucket: str,
+    files: list[str],
+    previous: str | None,
+    replaced_sources: set[str] | None,
+) -> str | None:
+    parts: list[str] = []
+    params: list = []
+    if replaced_sources is not None and previous is not None:
+        previous_path = str(rollup_dir / previous)
+        if replaced_sources:
+            placeholders = ",".join(["?"] * len(replaced_sources))
+            parts.append(f"SELECT * FROM read_parquet(?) WHERE source NOT IN ({placeholders})")
+            params.append(previous_path)
+            params.extend(sorted(replaced_sources))
+        else:
+            parts.append("SELECT * FROM read_parquet(?)")
+            params.append(previous_path)
+    if files:
+        parts.append(_aggregate_sql(con, lake_dir, files))
+        params.append(files)
+    if not parts:
+        return None
+    # Bucket files are immutable like lake files; the manifest swap publishes the new one.
+    name = _bucket_file_name(bucket, time.time_ns())
+    tmp_path = rollup_dir / f".tmp_{name}"
+    query = " UNION ALL BY NAME ".join(f"({part})" for part in parts)
+    con.execute(
+        f"COPY (SELECT * FROM ({query}) ORDER BY day, hour) "
+        f"TO '{_escape_path(str(tmp_path))}' ({get_write_profile().copy_options()})",
+        params,
+    )
+    tmp_path.rename(rollup_dir / name)
+    return name
+
+
+def _bucket_options(con: duckdb.DuckDBPyConnection, path: Path) -> dict[str, list[str]]:
+    primary_types, districts = con.execute(
+        "SELECT list(DISTINCT primary_type) FILTER (WHERE primary_type IS NOT NULL), "
+        "list(DISTINCT district) FILTER (WHERE district IS NOT NULL) FROM read_parquet(?)",
+        [str(path)],
+    ).fetchone()
+    return {
+        "primary_types": sorted(str(value) for value in primary_types or []),
+        "districts": sorted(str(value) for value in districts or []),
+    }
+
+
+def _fill_options(con: duckdb.DuckDBPyConnection, rollup_dir: Path, manifest: RollupManifest) -> None:
+    # Also backfills buckets written before the manifest carried options.
+    for name in manifest.buckets.values():
+        if name not in manifest.options:
+            manifest.options[name] = _bucket_options(con, rollup_dir / name)
+
+
+def build_rollup(lake_dir: Path) -> Path:
+    rollup_dir = rollup_dir_for(lake_dir)
+    rollup_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(rollup_dir)
+    catalog = current_catalog(lake_dir)
+    buckets: dict[str, list[str]] = {}
+    for key in sorted(catalog):
+        buckets.setdefault(_bucket(key), []).append(str(lake_dir / key))
+
+    con = db.get_cursor()
+    written: dict[str, str] = {}
+    for bucket, files in buckets.items():
+        name = _write_bucket(con, lake_dir, rollup_dir, bucket, files, None, None)
+        if name is not None:
+            written[bucket] = name
+
+    manifest = RollupManifest(
+        sources={key: _source_signature(entry) for key, entry in catalog.items()},
+        buckets=written,
+        retired=dict(previous.retired) if previous is not None else {},
+    )
+    if previous is not None:
+        _retire(manifest, previous.buckets)
+    _fill_options(con, rollup_dir, manifest)
+    _save_manifest(rollup_dir, manifest)
+    logger.info("Built rollup for %s lake files in %s buckets", len(catalog), len(buckets))
+    return rollup_dir
+
+
+def update_rollup(lake_dir: Path, rewritten_dirs: Iterable[Path]) -> Path:
+    rollup_dir = rollup_dir_for(lake_dir)
+    manifest = _load_manifest(rollup_dir)
+    catalog = current_catalog(lake_dir)
+    prefixes = [directory.relative_to(lake_dir).as_posix() + "/" for directory in rewritten_dirs]
+
+    def rewritten(key: str) -> bool:
+        return any(key.startswith(prefix) for prefix in prefixes)
+
+    if manifest is None:
+        return build_rollup(lake_dir)
+    sources = manifest.sources
+    untouched_catalog = {key for key in catalog if not rewritten(key)}
+    untouched_manifest = {key for key in sources if not rewritten(key)}
+    if untouched_catalog != untouched_manifest or any(
+        sources[key] != _source_signature(catalog[key]) for key in untouched_catalog
+    ):
+        logger.info("Rollup is out of sync with the lake catalog; rebuilding")
+        return build_rollup(lake_dir)
+
+    replaced: dict[str, set[str]] = {}
+    added: dict[str, list[str]] = {}
+    for key in sources:
+        if rewritten(key):
+            replaced.setdefault(_bucket(key), set()).add(key)
+    for key in sorted(catalog):
+        if rewritten(key):
+            added.setdefault(_bucket(key), []).append(str(lake_dir / key))
+
+    con = db.get_cursor()
+    buckets = dict(manifest.buckets)
+    for bucket in sorted(set(replaced) | set(added)):
+        name = _write_bucket(
+            con,
+            lake_dir,
+            rollup_dir,
+            bucket,
+            added.get(bucket, []),
+            buckets.get(bucket),
+            replaced.get(bucket, set()),
+        )
+        if name is None:
+            buckets.pop(bucket, None)
+        else:
+            buckets[bucket] = name
+
+    updated = RollupManifest(
+        sources={key: _source_signature(entry) for key, entry in catalog.items()},
+        buckets=buckets,
+        retired=dict(manifest.retired),
+        options=dict(manifest.options),
+    )
+    _retire(updated, manifest.buckets)
+    _fill_options(con, rollup_dir, updated)
+    _save_manifest(rollup_dir, updated)
+    logger.info("Updated rollup for %s rewritten partitions", len(prefixes))
+    return rollup_dir
+
+
+def current_rollup_files(lake_dir: Path) -> list[str] | None:
+    rollup_dir = rollup_dir_for(lake_dir)
+    manifest = _load_manifest(rollup_dir)
+    if manifest is None:
+        return None
+    catalog = load_catalog(lake_dir)
+    if len(manifest.sources) != len(catalog):
+        return None
+    for key, entry in catalog.items():
+        if manifest.sources.get(key) != _source_signature(entry):
+            return None
+    buckets = sorted({_bucket(key) for key in catalog})
+    if any(bucket not in manifest.buckets for bucket in buckets):
+        return None
+    return [str(rollup_dir / manifest.buckets[bucket]) for bucket in buckets]
+
+
+def rollup_filter_options(lake_dir: Path) -> dict[str, list[str]] | None:
+    # Only trusted while the rollup matches the current (or pinned) catalog, like the rollup itself.
+    if current_rollup_files(lake_dir) is None:
+        return None
+    manifest = _load_manifest(rollup_dir_for(lake_dir))
+    names = {manifest.buckets[_bucket(key)] for key in load_catalog(lake_dir)}
+    if any(name not in manifest.options for name in names):
+        return None
+    return {
+        field_name: sorted({value for name in names for value in manifest.options[name][field_name]})
+        for field_name in ("primary_types", "districts")
+    }
+
+
+def retired_rollup_files(lake_dir: Path) -> dict[Path, datetime]:
+    rollup_dir = rollup_dir_for(lake_dir)
+    manifest = _load_manifest(rollup_dir)
+    if manifest is None:
+        return {}
+    return {rollup_dir / name: datetime.fromisoformat(at) for name, at in manifest.retired.items()}
+
+
+def live_rollup_files(lake_dir: Path) -> set[Path]:
+    rollup_dir = rollup_dir_for(lake_dir)
+    manifest = _load_manifest(rollup_dir)
+    if manifest is None:
+        return set()
+    return {rollup_dir / name for name in manifest.buckets.values()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the pre-aggregated crime rollup")
+    parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    build_rollup(settings.lake_dir)
+
+
+if __name__ == "__main__":
+    main()
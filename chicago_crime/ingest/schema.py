@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 API_FIELDS: List[str] = [
     "id",
@@ -44,3 +49,172 @@ NORMALIZED_COLUMNS: List[str] = [
     "iucr",
     "fbi_code",
 ]
+
+PARTITION_COLUMNS: List[str] = ["year", "month", "day"]
+
+_CATEGORY = pa.dictionary(pa.int16(), pa.string())
+
+# Geography codes are small integers (beat < 10000, district/ward/community area < 100),
+# so joins against the dims are plain integer equality.
+ARROW_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("date", pa.timestamp("us", tz="UTC")),
+        ("primary_type", _CATEGORY),
+        ("description", _CATEGORY),
+        ("location_description", _CATEGORY),
+        ("arrest", pa.bool_()),
+        ("domestic", pa.bool_()),
+        ("beat", pa.int16()),
+        ("district", pa.int8()),
+        ("ward", pa.int8()),
+        ("community_area", pa.int8()),
+        ("latitude", pa.float32()),
+        ("longitude", pa.float32()),
+        ("iucr", _CATEGORY),
+        ("fbi_code", _CATEGORY),
+    ]
+)
+
+STAGED_ARROW_SCHEMA = pa.schema(
+    list(ARROW_SCHEMA) + [pa.field(name, pa.string()) for name in PARTITION_COLUMNS]
+)
+
+_DUCKDB_TYPES = {
+    pa.int64(): "BIGINT",
+    pa.int16(): "SMALLINT",
+    pa.int8(): "TINYINT",
+    pa.float32(): "FLOAT",
+    pa.bool_(): "BOOLEAN",
+    pa.string(): "VARCHAR",
+    pa.timestamp("us", tz="UTC"): "TIMESTAMP WITH TIME ZONE",
+}
+
+
+def duckdb_type(arrow_type: pa.DataType) -> str:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    return _DUCKDB_TYPES[arrow_type]
+
+
+LAKE_SQL_TYPES: Dict[str, str] = {field.name: duckdb_type(field.type) for field in ARROW_SCHEMA}
+
+
+def lake_columns_sql(available: Iterable[str] | None = None) -> str:
+    present = set(LAKE_SQL_TYPES if available is None else available)
+    # TRY_CAST lets files written with the old float/string columns be read into the lake types.
+    return ", ".join(
+        f"TRY_CAST({name if name in present else 'NULL'} AS {sql_type}) AS {name}"
+        for name, sql_type in LAKE_SQL_TYPES.items()
+    )
+
+
+def _integer_values(series: pd.Series, arrow_type: pa.DataType) -> pa.Array:
+    numeric = pd.to_numeric(series, errors="coerce")
+    info = np.iinfo(arrow_type.to_pandas_dtype())
+    # Out-of-range or fractional codes are data errors upstream; they become nulls instead of failing the batch.
+    valid = numeric.between(info.min, info.max) & (numeric % 1 == 0)
+    return pa.array(numeric.where(valid), from_pandas=True).cast(arrow_type, safe=False)
+
+
+def _column_values(series: pd.Series, arrow_type: pa.DataType) -> pa.Array:
+    if pa.types.is_integer(arrow_type):
+        return _integer_values(series, arrow_type)
+    if pa.types.is_floating(arrow_type):
+        return pa.array(pd.to_numeric(series, errors="coerce"), from_pandas=True).cast(arrow_type)
+    if pa.types.is_dictionary(arrow_type):
+        values = series.astype(object).where(series.notna(), None)
+        strings = pa.array(values, type=pa.string(), from_pandas=True)
+        return strings.dictionary_encode().cast(arrow_type)
+    if pa.types.is_string(arrow_type):
+        values = series.astype(object).where(series.notna(), None)
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    if pa.types.is_timestamp(arrow_type):
+        return pa.array(pd.to_datetime(series, utc=True, errors="coerce"), from_pandas=True).cast(arrow_type)
+    return pa.array(series, from_pandas=True).cast(arrow_type)
+
+
+def to_record_batch(df: pd.DataFrame, schema: pa.Schema = STAGED_ARROW_SCHEMA) -> pa.RecordBatch:
+    missing = pd.Series([None] * len(df), index=df.index, dtype=object)
+    arrays = [
+        _column_values(df[field.name] if field.name in df.columns else missing, field.type) for field in schema
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+# Socrata floating timestamps ("2024-01-14T13:00:00.000", ":updated_at" adds a "Z"), split so bad values become null.
+_TIMESTAMP_PATTERN = (
+    r"^\s*(?P<day>\d{4}-\d{2}-\d{2})(?:[T ](?P<time>\d{2}:\d{2}:\d{2})(?:\.(?P<fraction>\d{1,6})\d*)?)?Z?\s*$"
+)
+_NUMBER_PATTERN = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+
+
+def parse_timestamps(strings: pa.Array) -> pa.Array:
+    parts = pc.extract_regex(strings.cast(pa.string()), _TIMESTAMP_PATTERN)
+    time_of_day = pc.struct_field(parts, "time")
+    # Unmatched optional groups come back as empty strings rather than nulls.
+    time_of_day = pc.if_else(pc.equal(time_of_day, ""), "00:00:00", time_of_day)
+    seconds = pc.strptime(
+        pc.binary_join_element_wise(pc.struct_field(parts, "day"), time_of_day, "T"),
+        format="%Y-%m-%dT%H:%M:%S",
+        unit="us",
+        error_is_null=True,
+    )
+    fraction = pc.utf8_rpad(pc.struct_field(parts, "fraction"), 6, "0")
+    micros = pc.cast(pc.cast(fraction, pa.int64()), pa.duration("us"))
+    return pc.add(seconds, micros).cast(pa.timestamp("us", tz="UTC"))
+
+
+def _parse_numbers(strings: pa.Array) -> pa.Array:
+    valid = pc.match_substring_regex(strings, _NUMBER_PATTERN)
+    return pc.cast(pc.utf8_trim_whitespace(pc.if_else(valid, strings, None)), pa.float64())
+
+
+def _integer_array(strings: pa.Array, arrow_type: pa.DataType) -> pa.Array:
+    numeric = _parse_numbers(strings)
+    info = np.iinfo(arrow_type.to_pandas_dtype())
+    valid = pc.and_(
+        pc.and_(pc.greater_equal(numeric, float(info.min)), pc.less_equal(numeric, float(info.max))),
+        pc.equal(pc.floor(numeric), numeric),
+    )
+    return pc.cast(pc.if_else(valid, numeric, None), arrow_type)
+
+
+def _boolean_array(strings: pa.Array) -> pa.Array:
+    lowered = pc.utf8_lower(strings)
+    return pc.if_else(pc.equal(lowered, "true"), True, pc.if_else(pc.equal(lowered, "false"), False, None))
+
+
+def _arrow_values(strings: pa.Array, arrow_type: pa.DataType) -> pa.Array:
+    if pa.types.is_integer(arrow_type):
+        return _integer_array(strings, arrow_type)
+    if pa.types.is_floating(arrow_type):
+        return pc.cast(_parse_numbers(strings), arrow_type)
+    if pa.types.is_boolean(arrow_type):
+        return _boolean_array(strings)
+    if pa.types.is_timestamp(arrow_type):
+        return parse_timestamps(strings)
+    if pa.types.is_dictionary(arrow_type):
+        return strings.dictionary_encode().cast(arrow_type)
+    return strings
+
+
+def table_to_record_batch(table: pa.Table, schema: pa.Schema = STAGED_ARROW_SCHEMA) -> pa.RecordBatch:
+    # Columnar twin of to_record_batch for pages parsed straight from CSV: every API column arrives as text.
+    columns = {}
+    for field in ARROW_SCHEMA:
+        if field.name in table.column_names:
+            strings = table.column(field.name).combine_chunks().cast(pa.string())
+        else:
+            strings = pa.nulls(table.num_rows, pa.string())
+        columns[field.name] = _arrow_values(strings, field.type)
+    keep = pc.and_(pc.is_valid(columns["id"]), pc.is_valid(columns["date"]))
+    columns = {name: pc.filter(values, keep) for name, values in columns.items()}
+    date = columns["date"]
+    partitions = {
+        "year": pc.cast(pc.year(date), pa.string()),
+        "month": pc.utf8_lpad(pc.cast(pc.month(date), pa.string()), 2, "0"),
+        "day": pc.utf8_lpad(pc.cast(pc.day(date), pa.string()), 2, "0"),
+    }
+    columns.update({name: values for name, values in partitions.items() if name in schema.names})
+    return pa.RecordBatch.from_arrays([columns[field.name] for field in schema], schema=schema)
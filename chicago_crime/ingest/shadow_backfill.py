@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+
+from chicago_crime.ingest.catalog import CatalogEntry, catalog_head, current_catalog, save_catalog
+from chicago_crime.ingest.id_index import update_id_index
+from chicago_crime.ingest.parquet_writer import compact_partitions, data_file_name, merge_partitions
+from chicago_crime.ingest.rollup import update_rollup
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowValidationError(RuntimeError):
+    pass
+
+
+def reset_shadow_lake(shadow_dir: Path) -> None:
+    # The shadow root holds the lake plus its own id index and rollup, so nothing leaks into the live tree.
+    if shadow_dir.parent.exists():
+        shutil.rmtree(shadow_dir.parent)
+
+
+def build_shadow_lake(
+    staged_path: Path | None,
+    shadow_dir: Path,
+    granularity: str = "day",
+    closed_before: datetime | None = None,
+) -> int:
+    reset_shadow_lake(shadow_dir)
+    if staged_path is None:
+        return 0
+    rows, _ = merge_partitions(shadow_dir, staged_path)
+    # Matching the live layout lets promotion reuse compacted months and years as well as days.
+    if granularity != "day" and closed_before is not None:
+        compact_partitions(shadow_dir, granularity, closed_before)
+    return rows
+
+
+def shadow_rows(shadow_dir: Path) -> int:
+    return sum(entry.rows for entry in current_catalog(shadow_dir).values())
+
+
+def validate_shadow_lake(shadow_dir: Path, expected_rows: int, tolerance: float) -> int:
+    rows = shadow_rows(shadow_dir)
+    if rows == 0:
+        raise ShadowValidationError("Shadow lake is empty; refusing to replace the live lake")
+    # Rows published while the backfill ran can only push the count up, so only a shortfall is fatal.
+    minimum = int(expected_rows * (1 - tolerance))
+    if rows < minimum:
+        raise ShadowValidationError(
+            f"Shadow lake holds {rows} rows but the source reported {expected_rows} (minimum {minimum})"
+        )
+    logger.info("Shadow lake validated: %s rows against %s at the source", rows, expected_rows)
+    return rows
+
+
+def _partitions(catalog: dict[str, CatalogEntry]) -> dict[str, list[str]]:
+    partitions: dict[str, list[str]] = {}
+    for key in sorted(catalog):
+        partitions.setdefault(key.rpartition("/")[0], []).append(key)
+    return partitions
+
+
+def _fingerprint(con: duckdb.DuckDBPyConnection, lake_dir: Path, keys: list[str]) -> tuple[int, int]:
+    # Order-independent digest of every row and column, so a re-sorted but identical partition still matches.
+    count, digest = con.execute(
+        "SELECT COUNT(*), bit_xor(hash(row)) FROM ("
+        "SELECT * FROM read_parquet(?, hive_partitioning = false, union_by_name = true)) AS row",
+        [[str(lake_dir / key) for key in keys]],
+    ).fetchone()
+    return int(count), int(digest or 0)
+
+
+def _unchanged_partitions(
+    lake_dir: Path,
+    live: dict[str, CatalogEntry],
+    shadow_dir: Path,
+    shadow: dict[str, CatalogEntry],
+) -> set[str]:
+    live_partitions = _partitions(live)
+    shadow_partitions = _partitions(shadow)
+    unchanged = set()
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    try:
+        for partition, keys in shadow_partitions.items():
+            live_keys = live_partitions.get(partition)
+            # Row counts come free from the catalogs and rule out most changed partitions without a scan.
+            if live_keys is None or sum(live[key].rows for key in live_keys) != sum(shadow[key].rows for key in keys):
+                continue
+            if _fingerprint(con, lake_dir, live_keys) == _fingerprint(con, shadow_dir, keys):
+                unchanged.add(partition)
+    finally:
+        con.close()
+    return unchanged
+
+
+def promote_shadow_lake(shadow_dir: Path, lake_dir: Path) -> tuple[list[str], list[str]]:
+    parent_version, live = catalog_head(lake_dir)
+    shadow = current_catalog(shadow_dir)
+    unchanged = _unchanged_partitions(lake_dir, live, shadow_dir, shadow)
+    live_partitions = _partitions(live)
+    shadow_partitions = _partitions(shadow)
+
+    entries = {key: live[key] for partition in unchanged for key in live_partitions[partition]}
+    stamp = time.time_ns()
+    moved: list[Path] = []
+    try:
+        for partition in sorted(set(shadow_partitions) - unchanged):
+            partition_dir = lake_dir / partition
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            for number, key in enumerate(shadow_partitions[partition]):
+                target = partition_dir / data_file_name(stamp, number)
+                (shadow_dir / key).rename(target)
+                moved.append(target)
+                path = target.relative_to(lake_dir).as_posix()
+                entries[path] = replace(shadow[key], path=path)
+        # One snapshot swaps the whole lake; readers see the old lake or the new one, never a mix.
+        save_catalog(lake_dir, entries, parent_version)
+    except Exception:
+        for path in moved:
+            path.unlink(missing_ok=True)
+        raise
+
+    rewritten = sorted((set(live_partitions) | set(shadow_partitions)) - unchanged)
+    if rewritten:
+        rewritten_dirs = [lake_dir / partition for partition in rewritten]
+        update_id_index(lake_dir, rewritten_dirs)
+        update_rollup(lake_dir, rewritten_dirs)
+    logger.info("Promoted shadow lake: %s partitions reused, %s rewritten", len(unchanged), len(rewritten))
+    return sorted(unchanged), rewritten
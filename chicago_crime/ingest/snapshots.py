@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.catalog import (
+    SNAPSHOTS_DIRNAME,
+    catalog_version,
+    current_catalog,
+    read_snapshot,
+    snapshot_path,
+    snapshot_versions,
+)
+from chicago_crime.ingest.rollup import live_rollup_files, retired_rollup_files
+from chicago_crime.logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def _retained_versions(lake_dir: Path, cutoff: datetime) -> tuple[set[int], set[str]]:
+    head = catalog_version(lake_dir)
+    versions = snapshot_versions(lake_dir)
+    retained: set[int] = set()
+    referenced = set(current_catalog(lake_dir))
+    committed_at: dict[int, datetime | None] = {}
+    files: dict[int, set[str]] = {}
+    for version in versions:
+        committed_at[version], files[version] = read_snapshot(lake_dir, version)
+    for index, version in enumerate(versions):
+        successor = versions[index + 1] if index + 1 < len(versions) else None
+        # A snapshot can be pinned by readers until its successor was committed, plus the retention window.
+        superseded_at = committed_at.get(successor) if successor is not None else None
+        if version >= head or successor is None or superseded_at is None or superseded_at >= cutoff:
+            retained.add(version)
+            referenced |= files[version]
+    return retained, referenced
+
+
+def _remove_empty_dirs(directory: Path) -> None:
+    for path in sorted(directory.rglob("*"), key=lambda item: len(item.parts), reverse=True):
+        if path.is_dir() and path.name != SNAPSHOTS_DIRNAME and not any(path.iterdir()):
+            path.rmdir()
+
+
+def collect_garbage(lake_dir: Path, retention: timedelta | None = None) -> int:
+    if not lake_dir.exists():
+        return 0
+    if retention is None:
+        retention = timedelta(minutes=get_settings().snapshot_retention_minutes)
+    now = datetime.now(timezone.utc)
+    cutoff = now - retention
+    retained, referenced = _retained_versions(lake_dir, cutoff)
+
+    removed = 0
+    for path in lake_dir.rglob("*.parquet"):
+        key = path.relative_to(lake_dir).as_posix()
+        if key in referenced:
+            continue
+        # Unreferenced files younger than the window may belong to a write that has not committed yet.
+        if datetime.fromtimestamp(path.stat().st_mtime, timezone.utc) >= cutoff:
+            continue
+        path.unlink(missing_ok=True)
+        removed += 1
+    for version in snapshot_versions(lake_dir):
+        if version not in retained:
+            snapshot_path(lake_dir, version).unlink(missing_ok=True)
+    _remove_empty_dirs(lake_dir)
+
+    live = live_rollup_files(lake_dir)
+    for path, retired_at in retired_rollup_files(lake_dir).items():
+        if path not in live and retired_at < cutoff and path.exists():
+            path.unlink()
+            removed += 1
+
+    logger.info("Garbage collection removed %s files; %s snapshots retained", removed, len(retained))
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete lake files no retained snapshot references")
+    parser.add_argument(
+        "--retention-minutes",
+        type=int,
+        default=None,
+        help="Keep snapshots superseded within this window (default SNAPSHOT_RETENTION_MINUTES)",
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    retention = timedelta(minutes=args.retention_minutes) if args.retention_minutes is not None else None
+    collect_garbage(settings.lake_dir, retention)
+
+
+if __name__ == "__main__":
+    main()
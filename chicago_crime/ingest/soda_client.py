@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import io
 import logging
-from datetime import datetime, timezone
-from typing import Iterable, List
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Union
 
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
@@ -12,56 +20,255 @@ from chicago_crime.ingest.schema import API_FIELDS
 
 logger = logging.getLogger(__name__)
 
+UPDATED_AT_FIELD = ":updated_at"
+
+DATE_KEYS = ("date", "id")
+UPDATED_AT_KEYS = (UPDATED_AT_FIELD, "id")
+
+# Fact pages are JSON records, or with SODA_TRANSPORT=csv an Arrow table of text columns parsed from CSV.
+Page = Union[List[dict], pa.Table]
+
 
 class SodaError(RuntimeError):
     pass
 
 
+class RateLimiter:
+    def __init__(self, max_per_second: float) -> None:
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
 class SodaClient:
-    def __init__(self) -> None:
+    def __init__(self, base_url: str | None = None, track_updated_at: bool = False) -> None:
         self.settings = get_settings()
-        self.base_url = "https://data.cityofchicago.org/resource"
+        self.track_updated_at = track_updated_at
+        self.base_url = (base_url or self.settings.soda_base_url).rstrip("/")
+        self.rate_limiter = RateLimiter(self.settings.soda_max_requests_per_second)
+        self.tabular = self.settings.soda_transport == "csv"
 
     @retry(
         retry=retry_if_exception_type(SodaError),
         wait=wait_exponential(multiplier=1, min=1, max=32),
         stop=stop_after_attempt(5),
     )
-    def _get(self, params: dict, dataset_id: str | None = None) -> List[dict]:
+    def _request(self, params: dict, dataset_id: str | None, extension: str) -> requests.Response:
         headers = {}
         if self.settings.soda_app_token:
             headers["X-App-Token"] = self.settings.soda_app_token
+        if extension == "csv":
+            headers["Accept-Encoding"] = "gzip"
         dataset = dataset_id or self.settings.dataset_id
-        url = f"{self.base_url}/{dataset}.json"
+        url = f"{self.base_url}/{dataset}.{extension}"
+        self.rate_limiter.wait()
         response = requests.get(url, params=params, headers=headers, timeout=30)
         if response.status_code in (429, 500, 502, 503, 504):
             raise SodaError(f"Transient error {response.status_code}")
         if not response.ok:
             raise SodaError(f"Socrata error {response.status_code}: {response.text}")
-        return response.json()
+        return response
 
-    def fetch_since(self, start_date: datetime) -> Iterable[dict]:
-        offset = 0
-        limit = self.settings.page_limit
+    def _get(self, params: dict, dataset_id: str | None = None) -> List[dict]:
+        return self._request(params, dataset_id, "json").json()
+
+    def _get_csv(self, params: dict, dataset_id: str | None = None) -> pa.Table:
+        fields = [field.strip() for field in params["$select"].split(",")]
+        body = self._request(params, dataset_id, "csv").content
+        if not body.strip():
+            return pa.table({field: pa.array([], pa.string()) for field in fields})
+        # Everything is read as text: keyset cursors need the raw values, and casting happens once per column later.
+        return pacsv.read_csv(
+            io.BytesIO(body),
+            convert_options=pacsv.ConvertOptions(
+                column_types={field: pa.string() for field in fields}, strings_can_be_null=True
+            ),
+        )
+
+    def _get_page(self, params: dict, dataset_id: str, tabular: bool) -> Page:
+        return self._get_csv(params, dataset_id) if tabular else self._get(params, dataset_id=dataset_id)
+
+    def _fields(self) -> str:
         fields = ",".join(API_FIELDS)
+        return f"{UPDATED_AT_FIELD},{fields}" if self.track_updated_at else fields
+
+    def fetch_pages_since(
+        self,
+        start_date: datetime,
+        end_date: datetime | None = None,
+        after: list | None = None,
+    ) -> Iterator[Page]:
+        fields = self._fields()
         where_clause = f"date >= '{_format_soda_datetime(start_date)}'"
+        if end_date is not None:
+            where_clause += f" AND date < '{_format_soda_datetime(end_date)}'"
+        if self.settings.soda_pagination == "offset":
+            return self._offset_pages(
+                self.settings.dataset_id, fields, where_clause, "date asc", after, tabular=self.tabular
+            )
+        return self._keyset_pages(
+            self.settings.dataset_id, fields, where_clause, DATE_KEYS, after, tabular=self.tabular
+        )
+
+    def count_since(self, start_date: datetime) -> int:
+        rows = self.fetch_rows(
+            self.settings.dataset_id,
+            select="count(*) AS count",
+            where=f"date >= '{_format_soda_datetime(start_date)}'",
+            limit=1,
+        )
+        return int(rows[0]["count"]) if rows else 0
+
+    def fetch_pages_updated_since(self, updated_since: datetime, after: list | None = None) -> Iterator[Page]:
+        fields = f"{UPDATED_AT_FIELD},{','.join(API_FIELDS)}"
+        where_clause = f"{UPDATED_AT_FIELD} > '{_format_soda_datetime(updated_since)}'"
+        if self.settings.soda_pagination == "offset":
+            return self._offset_pages(
+                self.settings.dataset_id,
+                fields,
+                where_clause,
+                f"{UPDATED_AT_FIELD} asc, id asc",
+                after,
+                tabular=self.tabular,
+            )
+        return self._keyset_pages(
+            self.settings.dataset_id, fields, where_clause, UPDATED_AT_KEYS, after, tabular=self.tabular
+        )
+
+    def page_cursor(self, page: Page, cursor: list | None, keys: tuple[str, ...]) -> list:
+        # The position after `page`, in the form fetch_pages_since/fetch_pages_updated_since accept as `after`.
+        if self.settings.soda_pagination == "offset":
+            return [(cursor[0] if cursor else 0) + len(page)]
+        return list(_last_key(page, keys))
+
+    def fetch_all_pages(self, dataset_id: str, where: str | None = None) -> Iterator[List[dict]]:
+        if self.settings.soda_pagination == "offset":
+            return self._offset_pages(dataset_id, None, where, None)
+        return self._strip_row_ids(self._keyset_pages(dataset_id, ":id,*", where, (":id",)))
 
+    def _offset_pages(
+        self,
+        dataset_id: str,
+        select: str | None,
+        where: str | None,
+        order: str | None,
+        after: list | None = None,
+        tabular: bool = False,
+    ) -> Iterator[Page]:
+        offset = after[0] if after else 0
+        limit = self.settings.page_limit
         while True:
-            params = {
-                "$select": fields,
-                "$limit": limit,
-                "$offset": offset,
-                "$where": where_clause,
-                "$order": "date asc",
-            }
-            batch = self._get(params)
-            if not batch:
+            params = _row_params(select, where, limit, offset, order)
+            batch = self._get_page(params, dataset_id, tabular)
+            if not len(batch):
                 break
             logger.info("Fetched %s rows at offset %s", len(batch), offset)
-            for row in batch:
-                yield row
+            yield batch
             offset += limit
 
+    def _keyset_pages(
+        self,
+        dataset_id: str,
+        select: str,
+        where: str | None,
+        keys: tuple[str, ...],
+        after: list | None = None,
+        tabular: bool = False,
+    ) -> Iterator[Page]:
+        limit = self.settings.page_limit
+        order = ", ".join(f"{key} asc" for key in keys)
+        last: tuple | None = tuple(after) if after else None
+        while True:
+            clauses = [f"({where})"] if where else []
+            if last is not None:
+                clauses.append(_keyset_predicate(keys, last))
+            params = {"$select": select, "$limit": limit, "$order": order}
+            if clauses:
+                params["$where"] = " AND ".join(clauses)
+            batch = self._get_page(params, dataset_id, tabular)
+            if not len(batch):
+                break
+            logger.info("Fetched %s rows after key %s", len(batch), last)
+            yield batch
+            if len(batch) < limit:
+                break
+            last = _last_key(batch, keys)
+            if any(value is None for value in last):
+                raise SodaError(f"Cannot page {dataset_id} by {keys}: last row has a null key")
+
+    @staticmethod
+    def _strip_row_ids(pages: Iterator[List[dict]]) -> Iterator[List[dict]]:
+        for page in pages:
+            yield [{key: value for key, value in row.items() if key != ":id"} for row in page]
+
+    def plan_windows(self, start_date: datetime, workers: int) -> list[tuple[datetime, datetime | None]]:
+        if workers <= 1:
+            return [(start_date, None)]
+        return _date_windows(start_date, self.settings.fetch_window_days)
+
+    def fetch_window_pages(
+        self,
+        windows: list[tuple[datetime, datetime | None, list | None]],
+        workers: int,
+    ) -> Iterator[tuple[int, Page | None]]:
+        # Yields (window index, page) and a final (window index, None) once a window is exhausted.
+        if workers <= 1 or len(windows) == 1:
+            for index, (window_start, window_end, after) in enumerate(windows):
+                for page in self.fetch_pages_since(window_start, window_end, after):
+                    yield index, page
+                yield index, None
+            return
+
+        pages: queue.Queue = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+
+        def _put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _fetch_window(index: int, window_start: datetime, window_end: datetime | None, after) -> None:
+            try:
+                for page in self.fetch_pages_since(window_start, window_end, after):
+                    if not _put((index, page)):
+                        return
+            except BaseException as exc:
+                _put(exc)
+                return
+            _put((index, None))
+
+        logger.info("Fetching %s windows with %s workers", len(windows), workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="soda-fetch")
+        try:
+            for index, (window_start, window_end, after) in enumerate(windows):
+                executor.submit(_fetch_window, index, window_start, window_end, after)
+            remaining = len(windows)
+            while remaining:
+                item = pages.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if item[1] is None:
+                    remaining -= 1
+                yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def fetch_rows(
         self,
         dataset_id: str,
@@ -71,17 +278,57 @@ class SodaClient:
         offset: int = 0,
         order: str | None = None,
     ) -> List[dict]:
-        params = {
-            "$limit": limit or self.settings.page_limit,
-            "$offset": offset,
-        }
-        if select:
-            params["$select"] = select
-        if where:
-            params["$where"] = where
-        if order:
-            params["$order"] = order
-        return self._get(params, dataset_id=dataset_id)
+        return self._get(_row_params(select, where, limit or self.settings.page_limit, offset, order), dataset_id)
+
+
+def _row_params(select: str | None, where: str | None, limit: int, offset: int, order: str | None) -> dict:
+    params = {
+        "$limit": limit,
+        "$offset": offset,
+    }
+    if select:
+        params["$select"] = select
+    if where:
+        params["$where"] = where
+    if order:
+        params["$order"] = order
+    return params
+
+
+def _last_key(page: Page, keys: tuple[str, ...]) -> tuple:
+    if isinstance(page, pa.Table):
+        return tuple(page.column(key)[-1].as_py() if key in page.column_names else None for key in keys)
+    return tuple(page[-1].get(key) for key in keys)
+
+
+def _date_windows(start_date: datetime, window_days: int) -> list[tuple[datetime, datetime | None]]:
+    if start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    step = timedelta(days=max(window_days, 1))
+    windows: list[tuple[datetime, datetime | None]] = []
+    window_start = start_date
+    while window_start + step < now:
+        windows.append((window_start, window_start + step))
+        window_start += step
+    windows.append((window_start, None))
+    return windows
+
+
+def _soql_literal(value) -> str:
+    if isinstance(value, (int, float)) or re.fullmatch(r"-?\d+(\.\d+)?", str(value)):
+        return str(value)
+    escaped = str(value).replace("'", "''")
+    return f"'{escaped}'"
+
+
+def _keyset_predicate(keys: tuple[str, ...], values: tuple) -> str:
+    terms = []
+    for position, key in enumerate(keys):
+        equal = [f"{name} = {_soql_literal(value)}" for name, value in zip(keys[:position], values[:position])]
+        term = " AND ".join(equal + [f"{key} > {_soql_literal(values[position])}"])
+        terms.append(f"({term})" if equal else term)
+    return "(" + " OR ".join(terms) + ")"
 
 
 def _format_soda_datetime(value: datetime) -> str:
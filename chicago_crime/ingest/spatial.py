@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+SPATIAL_SORTS = ("none", "hilbert", "zorder")
+
+# Slightly wider than the city limits; points outside are clamped onto the edge of the grid.
+CHICAGO_BOUNDS = (41.60, -87.96, 42.03, -87.51)
+
+CURVE_ORDER = 16
+
+
+def _grid_coordinates(latitude: np.ndarray, longitude: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    min_lat, min_lon, max_lat, max_lon = CHICAGO_BOUNDS
+    cells = (1 << CURVE_ORDER) - 1
+    x = np.clip((longitude - min_lon) / (max_lon - min_lon), 0.0, 1.0) * cells
+    y = np.clip((latitude - min_lat) / (max_lat - min_lat), 0.0, 1.0) * cells
+    return x.astype(np.int64), y.astype(np.int64)
+
+
+def hilbert_index(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    x, y = _grid_coordinates(latitude, longitude)
+    n = 1 << CURVE_ORDER
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return d
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    values = values & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+def zorder_index(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    x, y = _grid_coordinates(latitude, longitude)
+    return _spread_bits(x) | (_spread_bits(y) << 1)
+
+
+_CURVES = {"hilbert": hilbert_index, "zorder": zorder_index}
+
+
+def _curve_udf(curve: str):
+    index = _CURVES[curve]
+
+    def udf(latitude: pa.Array, longitude: pa.Array) -> pa.Array:
+        lat = latitude.to_numpy(zero_copy_only=False).astype(np.float64)
+        lon = longitude.to_numpy(zero_copy_only=False).astype(np.float64)
+        missing = np.isnan(lat) | np.isnan(lon)
+        keys = index(np.where(missing, 0.0, lat), np.where(missing, 0.0, lon))
+        return pa.array(keys, type=pa.int64(), mask=missing)
+
+    return udf
+
+
+def curve_function(curve: str) -> str:
+    return f"{curve}_key"
+
+
+def register_curve_function(con: duckdb.DuckDBPyConnection, curve: str) -> None:
+    if curve not in _CURVES:
+        raise ValueError(f"Unknown spatial sort {curve!r}; use one of {', '.join(SPATIAL_SORTS)}")
+    con.create_function(
+        curve_function(curve),
+        _curve_udf(curve),
+        ["DOUBLE", "DOUBLE"],
+        "BIGINT",
+        type="arrow",
+        null_handling="special",
+        side_effects=False,
+    )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -26,6 +26,75 @@ def _dt_to_str(value: datetime | None) -> str | None:
     return value.astimezone(timezone.utc).isoformat()
 
 
+@dataclass
+class WindowCheckpoint:
+    start: datetime
+    end: datetime | None
+    cursor: list | None = None
+    pages: int = 0
+    rows: int = 0
+    done: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "start": _dt_to_str(self.start),
+            "end": _dt_to_str(self.end),
+            "cursor": self.cursor,
+            "pages": self.pages,
+            "rows": self.rows,
+            "done": self.done,
+        }
+
+
+@dataclass
+class FetchCheckpoint:
+    run_id: str
+    full_backfill: bool
+    sync_mode: str
+    order_by: str
+    windows: list[WindowCheckpoint] = field(default_factory=list)
+    expected_rows: int | None = None
+    updated_at_high_water: datetime | None = None
+    updated_at_cutoff: datetime | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "full_backfill": self.full_backfill,
+            "sync_mode": self.sync_mode,
+            "order_by": self.order_by,
+            "windows": [window.to_dict() for window in self.windows],
+            "expected_rows": self.expected_rows,
+            "updated_at_high_water": _dt_to_str(self.updated_at_high_water),
+            "updated_at_cutoff": _dt_to_str(self.updated_at_cutoff),
+        }
+
+
+def _checkpoint_from_dict(payload: dict | None) -> FetchCheckpoint | None:
+    if not payload:
+        return None
+    return FetchCheckpoint(
+        run_id=payload["run_id"],
+        full_backfill=bool(payload.get("full_backfill", False)),
+        sync_mode=payload.get("sync_mode", "window"),
+        order_by=payload.get("order_by", "date"),
+        windows=[
+            WindowCheckpoint(
+                start=_parse_datetime(item["start"]),
+                end=_parse_datetime(item.get("end")),
+                cursor=item.get("cursor"),
+                pages=int(item.get("pages", 0)),
+                rows=int(item.get("rows", 0)),
+                done=bool(item.get("done", False)),
+            )
+            for item in payload.get("windows", [])
+        ],
+        expected_rows=payload.get("expected_rows"),
+        updated_at_high_water=_parse_datetime(payload.get("updated_at_high_water")),
+        updated_at_cutoff=_parse_datetime(payload.get("updated_at_cutoff")),
+    )
+
+
 @dataclass
 class IngestState:
     dataset_id: str
@@ -33,6 +102,8 @@ class IngestState:
     last_run_at: datetime | None
     backfill_days: int
     rows_last_run: int
+    updated_at_watermark: datetime | None = None
+    checkpoint: FetchCheckpoint | None = None
 
     def to_dict(self) -> dict:
         return {
@@ -41,6 +112,8 @@ class IngestState:
             "last_run_at": _dt_to_str(self.last_run_at),
             "backfill_days": self.backfill_days,
             "rows_last_run": self.rows_last_run,
+            "updated_at_watermark": _dt_to_str(self.updated_at_watermark),
+            "checkpoint": self.checkpoint.to_dict() if self.checkpoint is not None else None,
         }
 
 
@@ -68,6 +141,8 @@ def load_state(path: Path | None = None) -> IngestState:
         last_run_at=_parse_datetime(payload.get("last_run_at")),
         backfill_days=int(payload.get("backfill_days", settings.backfill_days)),
         rows_last_run=int(payload.get("rows_last_run", 0)),
+        updated_at_watermark=_parse_datetime(payload.get("updated_at_watermark")),
+        checkpoint=_checkpoint_from_dict(payload.get("checkpoint")),
     )
 
 
@@ -75,5 +150,8 @@ def save_state(state: IngestState, path: Path | None = None) -> None:
     settings = get_settings()
     state_path = path or settings.state_path
     state_path.parent.mkdir(parents=True, exist_ok=True)
-    with state_path.open("w", encoding="utf-8") as handle:
+    # Checkpoints are saved after every page, so a crash mid-write must never leave a truncated file behind.
+    tmp_path = state_path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
         json.dump(state.to_dict(), handle, indent=2)
+    tmp_path.replace(state_path)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from chicago_crime.config import get_settings
+from chicago_crime.ingest.schema import PARTITION_COLUMNS
+from chicago_crime.ingest.spatial import curve_function, register_curve_function
+
+DICTIONARY_COLUMNS = ["primary_type", "description", "location_description", "iucr", "fbi_code"]
+# pyarrow rejects a compression level for any other codec; DuckDB only takes one for zstd.
+ARROW_LEVEL_CODECS = {"zstd", "gzip", "brotli"}
+
+
+@dataclass(frozen=True)
+class WriteProfile:
+    compression: str = "zstd"
+    compression_level: int | None = 3
+    row_group_size: int = 122_880
+    dictionary_columns: tuple[str, ...] = tuple(DICTIONARY_COLUMNS)
+    sort_by_date: bool = True
+    drop_partition_columns: bool = True
+    spatial_sort: str = "none"
+
+    def copy_options(self) -> str:
+        options = [
+            "FORMAT parquet",
+            # DuckDB spells no compression "uncompressed".
+            f"COMPRESSION {'uncompressed' if self.compression == 'none' else self.compression}",
+            f"ROW_GROUP_SIZE {self.row_group_size}",
+        ]
+        if self.compression_level is not None and self.compression == "zstd":
+            options.append(f"COMPRESSION_LEVEL {self.compression_level}")
+        return ", ".join(options)
+
+    def arrow_options(self, columns: Iterable[str]) -> dict:
+        present = set(columns)
+        options = {
+            "compression": self.compression,
+            "use_dictionary": [column for column in self.dictionary_columns if column in present],
+            "write_statistics": True,
+        }
+        if self.compression_level is not None and self.compression in ARROW_LEVEL_CODECS:
+            options["compression_level"] = self.compression_level
+        return options
+
+    def body_columns_sql(self, excluded: Iterable[str] = ()) -> str:
+        dropped = list(excluded) + (PARTITION_COLUMNS if self.drop_partition_columns else [])
+        if not dropped:
+            return "*"
+        names = ", ".join(f"'{name}'" for name in dropped)
+        return f"COLUMNS(column_name -> column_name NOT IN ({names}))"
+
+    def order_sql(self, *leading: str) -> str:
+        keys = list(leading)
+        if self.spatial_sort != "none":
+            # Clustering along the curve keeps each row group's lat/lon min/max tight enough to skip on bbox filters.
+            keys.append(f"{curve_function(self.spatial_sort)}(latitude, longitude)")
+        if self.sort_by_date:
+            keys.append("date")
+        return f"ORDER BY {', '.join(keys)}" if keys else ""
+
+    def prepare(self, con: duckdb.DuckDBPyConnection) -> None:
+        if self.spatial_sort != "none":
+            register_curve_function(con, self.spatial_sort)
+        if not self.sort_by_date and self.spatial_sort == "none":
+            con.execute("SET preserve_insertion_order = false")
+
+
+def get_write_profile() -> WriteProfile:
+    settings = get_settings()
+    return WriteProfile(
+        compression=settings.parquet_compression,
+        compression_level=settings.parquet_compression_level,
+        row_group_size=settings.parquet_row_group_size,
+        sort_by_date=settings.parquet_sort_by_date,
+        drop_partition_columns=settings.parquet_drop_partition_columns,
+        spatial_sort=settings.parquet_spatial_sort,
+    )
+
+
+def write_table(table: pa.Table, path: Path, profile: WriteProfile | None = None) -> Path:
+    profile = profile or get_write_profile()
+    if profile.sort_by_date and "date" in table.column_names:
+        table = table.sort_by("date")
+    pq.write_table(
+        table, path, row_group_size=profile.row_group_size, **profile.arrow_options(table.column_names)
+    )
+    return path
+
+
+def write_dataframe(df: pd.DataFrame, path: Path, profile: WriteProfile | None = None) -> Path:
+    return write_table(pa.Table.from_pandas(df, preserve_index=False), path, profile)
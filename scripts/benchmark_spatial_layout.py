@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import duckdb
+import pyarrow.parquet as pq
+
+from chicago_crime.ingest.spatial import CHICAGO_BOUNDS, SPATIAL_SORTS
+from chicago_crime.ingest.write_profile import get_write_profile
+
+BBOX_QUERY = (
+    "SELECT COUNT(*), AVG(latitude) FROM read_parquet(?) "
+    "WHERE latitude BETWEEN CAST(? AS FLOAT) AND CAST(? AS FLOAT) "
+    "AND longitude BETWEEN CAST(? AS FLOAT) AND CAST(? AS FLOAT)"
+)
+
+
+def _escape_path(path: Path) -> str:
+    return str(path).replace("\\", "/").replace("'", "''")
+
+
+def _create_sample(con: duckdb.DuckDBPyConnection, rows: int, seed: int) -> None:
+    min_lat, min_lon, max_lat, max_lon = CHICAGO_BOUNDS
+    con.execute(f"SELECT setseed({(seed % 1000) / 1000})")
+    # Crimes cluster around hot spots, so points are drawn around a few hundred random centres.
+    con.execute(
+        "CREATE TABLE centres AS SELECT range AS centre, "
+        f"{min_lat} + random() * {max_lat - min_lat} AS lat, {min_lon} + random() * {max_lon - min_lon} AS lon "
+        "FROM range(300)"
+    )
+    con.execute(
+        "CREATE TABLE sample AS SELECT "
+        "CAST(10000000 + s.range AS BIGINT) AS id, "
+        "TIMESTAMPTZ '2023-01-01 00:00:00+00' + to_seconds(CAST(random() * 365 * 86400 AS BIGINT)) AS date, "
+        "CAST(c.lat + (random() + random() + random() - 1.5) * 0.02 AS FLOAT) AS latitude, "
+        "CAST(c.lon + (random() + random() + random() - 1.5) * 0.02 AS FLOAT) AS longitude, "
+        "'THEFT' AS primary_type "
+        f"FROM range({rows}) AS s JOIN centres AS c ON c.centre = s.range % 300"
+    )
+
+
+def _write_layout(con: duckdb.DuckDBPyConnection, out_dir: Path, spatial_sort: str, row_group_size: int) -> None:
+    profile = replace(get_write_profile(), spatial_sort=spatial_sort, row_group_size=row_group_size)
+    profile.prepare(con)
+    # One file per month, the shape month compaction leaves behind.
+    con.execute(
+        f"COPY (SELECT *, strftime(date, '%m') AS p_month FROM sample {profile.order_sql('p_month')}) "
+        f"TO '{_escape_path(out_dir)}' ({profile.copy_options()}, PARTITION_BY (p_month))"
+    )
+
+
+def _row_groups_touched(files: list[str], bbox: tuple[float, float, float, float]) -> tuple[int, int]:
+    south, west, north, east = bbox
+    touched = total = 0
+    for path in files:
+        metadata = pq.ParquetFile(path).metadata
+        names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+        lat_index, lon_index = names.index("latitude"), names.index("longitude")
+        for number in range(metadata.num_row_groups):
+            group = metadata.row_group(number)
+            lat, lon = group.column(lat_index).statistics, group.column(lon_index).statistics
+            total += 1
+            if lat.max >= south and lat.min <= north and lon.max >= west and lon.min <= east:
+                touched += 1
+    return touched, total
+
+
+def _viewports(count: int, size: float, seed: int) -> list[tuple[float, float, float, float]]:
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = CHICAGO_BOUNDS
+    boxes = []
+    for _ in range(count):
+        south = rng.uniform(min_lat, max_lat - size)
+        west = rng.uniform(min_lon, max_lon - size)
+        boxes.append((south, west, south + size, west + size))
+    return boxes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare bounding-box query latency across spatial sort orders")
+    parser.add_argument("--rows", type=int, default=3_000_000, help="Synthetic rows to generate")
+    parser.add_argument("--row-group-size", type=int, default=16_384, help="Rows per Parquet row group")
+    parser.add_argument("--viewports", type=int, default=25, help="Random bounding boxes to query")
+    parser.add_argument("--size", type=float, default=0.03, help="Bounding box edge in degrees")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per viewport; the median is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="spatial_bench_"))
+    try:
+        con = duckdb.connect()
+        con.execute("SET TimeZone = 'UTC'")
+        _create_sample(con, args.rows, args.seed)
+        layouts = {}
+        for spatial_sort in SPATIAL_SORTS:
+            out_dir = work_dir / spatial_sort
+            _write_layout(con, out_dir, spatial_sort, args.row_group_size)
+            layouts[spatial_sort] = sorted(str(path) for path in out_dir.rglob("*.parquet"))
+        con.close()
+
+        boxes = _viewports(args.viewports, args.size, args.seed)
+        print(f"{args.rows:,} rows, {args.row_group_size:,}-row groups, {len(boxes)} viewports of {args.size} deg")
+        print(f"{'layout':<10}{'median ms':>12}{'p90 ms':>10}{'row groups read':>18}")
+        baseline = None
+        for name, files in layouts.items():
+            con = duckdb.connect()
+            latencies = []
+            touched = total = 0
+            for box in boxes:
+                south, west, north, east = box
+                runs = []
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    con.execute(BBOX_QUERY, [files, south, north, west, east]).fetchall()
+                    runs.append(time.perf_counter() - started)
+                latencies.append(statistics.median(runs))
+                box_touched, box_total = _row_groups_touched(files, box)
+                touched += box_touched
+                total += box_total
+            con.close()
+            median = statistics.median(latencies) * 1000
+            p90 = sorted(latencies)[int(len(latencies) * 0.9) - 1] * 1000
+            baseline = baseline or median
+            print(
+                f"{name:<10}{median:>12.1f}{p90:>10.1f}{touched / total:>17.1%} "
+                f"({baseline / median:.2f}x vs none)"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from chicago_crime.ingest.write_profile import WriteProfile, get_write_profile
+
+PRIMARY_TYPES = [
+    "THEFT", "BATTERY", "CRIMINAL DAMAGE", "NARCOTICS", "ASSAULT", "OTHER OFFENSE", "BURGLARY",
+    "MOTOR VEHICLE THEFT", "DECEPTIVE PRACTICE", "ROBBERY", "CRIMINAL TRESPASS", "WEAPONS VIOLATION",
+]
+
+QUERIES = {
+    "month by type": (
+        "SELECT primary_type, COUNT(*) FROM read_parquet(?, union_by_name = true) "
+        "WHERE date >= TIMESTAMPTZ '2023-06-01 00:00:00+00' AND date < TIMESTAMPTZ '2023-07-01 00:00:00+00' "
+        "GROUP BY 1"
+    ),
+    "daily series": (
+        "SELECT date_trunc('day', date), COUNT(*) FROM read_parquet(?, union_by_name = true) GROUP BY 1"
+    ),
+    "week of rows": (
+        "SELECT * FROM read_parquet(?, union_by_name = true) "
+        "WHERE date >= TIMESTAMPTZ '2023-03-01 00:00:00+00' AND date < TIMESTAMPTZ '2023-03-08 00:00:00+00'"
+    ),
+}
+
+
+def _escape_path(path: Path) -> str:
+    return str(path).replace("\\", "/").replace("'", "''")
+
+
+def _create_sample(con: duckdb.DuckDBPyConnection, rows: int) -> None:
+    types = ", ".join(f"'{name}'" for name in PRIMARY_TYPES)
+    con.execute(
+        "CREATE TABLE sample AS SELECT "
+        "CAST(10000000 + range AS VARCHAR) AS id, "
+        "TIMESTAMPTZ '2023-01-01 00:00:00+00' + to_seconds(CAST(random() * 365 * 86400 AS BIGINT)) AS date, "
+        f"list_element([{types}], CAST(floor(random() * {len(PRIMARY_TYPES)}) AS INTEGER) + 1) AS primary_type, "
+        "'DESCRIPTION ' || CAST(floor(random() * 300) AS INTEGER) AS description, "
+        "'LOCATION ' || CAST(floor(random() * 150) AS INTEGER) AS location_description, "
+        "random() < 0.2 AS arrest, random() < 0.15 AS domestic, "
+        "CAST(floor(random() * 2500) AS DOUBLE) AS beat, CAST(floor(random() * 25) AS DOUBLE) AS district, "
+        "CAST(floor(random() * 50) AS DOUBLE) AS ward, CAST(floor(random() * 77) + 1 AS DOUBLE) AS community_area, "
+        "41.64 + random() * 0.38 AS latitude, -87.94 + random() * 0.42 AS longitude, "
+        "lpad(CAST(floor(random() * 2000) AS VARCHAR), 4, '0') AS iucr, "
+        "CAST(floor(random() * 30) AS VARCHAR) AS fbi_code "
+        f"FROM range({rows})"
+    )
+    con.execute(
+        "ALTER TABLE sample ADD COLUMN year VARCHAR; ALTER TABLE sample ADD COLUMN month VARCHAR; "
+        "ALTER TABLE sample ADD COLUMN day VARCHAR; "
+        "UPDATE sample SET year = strftime(date, '%Y'), month = strftime(date, '%m'), day = strftime(date, '%d')"
+    )
+
+
+def _write_legacy(con: duckdb.DuckDBPyConnection, out_dir: Path) -> None:
+    con.execute(
+        f"COPY (SELECT * FROM sample) TO '{_escape_path(out_dir)}' "
+        "(FORMAT parquet, COMPRESSION snappy, PARTITION_BY (year, month, day), WRITE_PARTITION_COLUMNS true)"
+    )
+
+
+def _write_profiled(con: duckdb.DuckDBPyConnection, out_dir: Path, profile: WriteProfile) -> None:
+    con.execute(
+        f"COPY (SELECT {profile.body_columns_sql()}, year AS p_year, month AS p_month, day AS p_day FROM sample "
+        f"{profile.order_sql('year', 'month', 'day')}) "
+        f"TO '{_escape_path(out_dir)}' ({profile.copy_options()}, PARTITION_BY (p_year, p_month, p_day))"
+    )
+
+
+def _measure(files: list[str], repeats: int) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for name, query in QUERIES.items():
+        runs = []
+        for _ in range(repeats):
+            con = duckdb.connect()
+            con.execute("SET TimeZone = 'UTC'")
+            started = time.perf_counter()
+            con.execute(query, [files]).fetchall()
+            runs.append(time.perf_counter() - started)
+            con.close()
+        timings[name] = statistics.median(runs)
+    return timings
+
+
+def _layout_stats(out_dir: Path) -> tuple[list[str], int]:
+    files = sorted(str(path) for path in out_dir.rglob("*.parquet"))
+    return files, sum(Path(path).stat().st_size for path in files)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the lake write profile with the legacy pandas-style layout")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Synthetic rows to generate")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per query; the median is reported")
+    parser.add_argument("--keep", type=Path, default=None, help="Copy both layouts here instead of deleting them")
+    args = parser.parse_args()
+
+    profile = get_write_profile()
+    work_dir = Path(tempfile.mkdtemp(prefix="write_profile_bench_"))
+    try:
+        con = duckdb.connect()
+        con.execute("SET TimeZone = 'UTC'")
+        _create_sample(con, args.rows)
+        layouts = {"legacy": work_dir / "legacy", "profile": work_dir / "profile"}
+        profile.prepare(con)
+        _write_legacy(con, layouts["legacy"])
+        _write_profiled(con, layouts["profile"], profile)
+        con.close()
+
+        results = {}
+        for name, out_dir in layouts.items():
+            files, size = _layout_stats(out_dir)
+            results[name] = (size, _measure(files, args.repeats))
+
+        print(f"{args.rows:,} rows; profile: {profile}")
+        header = f"{'layout':<10}{'MiB':>10}" + "".join(f"{name:>16}" for name in QUERIES)
+        print(header)
+        for name, (size, timings) in results.items():
+            row = f"{name:<10}{size / 2**20:>10.1f}" + "".join(f"{timings[q] * 1000:>14.1f}ms" for q in QUERIES)
+            print(row)
+        legacy_size, legacy_timings = results["legacy"]
+        profile_size, profile_timings = results["profile"]
+        print(f"size change: {(profile_size / legacy_size - 1) * 100:+.1f}%")
+        for query in QUERIES:
+            print(f"{query}: {legacy_timings[query] / profile_timings[query]:.2f}x")
+        if args.keep is not None:
+            shutil.copytree(work_dir, args.keep, dirs_exist_ok=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,14 @@ def _escape_path(path: str) -> str:
 
 
 def _lake_glob(data_dir: Path) -> str:
-    return str(data_dir / "lake" / "crimes" / "**" / "*.parquet")
+    # lake/crimes_current/head links to a mirror of the committed lake snapshot that every ingest commit swaps
+    # atomically, so the view follows new data without a rebuild and never sees superseded or half-written files.
+    current_dir = data_dir / "lake" / "crimes_current" / "head"
+    if not any(current_dir.rglob("*.parquet")):
+        raise ValueError(
+            f"No committed lake snapshot under {current_dir}; run an ingest (or `make duckdb`) on the host first"
+        )
+    return str(current_dir / "**" / "*.parquet")
 
 
 def _dim_path(data_dir: Path, *parts: str) -> Path:
@@ -23,8 +30,6 @@ def _dim_path(data_dir: Path, *parts: str) -> Path:
 
 def build_duckdb(data_dir: Path, rebuild: bool = False) -> Path:
     lake_glob = _lake_glob(data_dir)
-    if not Path(lake_glob.split("**")[0]).exists():
-        raise ValueError(f"No parquet files found under {data_dir / 'lake' / 'crimes'}")
 
     db_path = data_dir / "lake" / "chicago_crime.duckdb"
     db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -33,7 +38,8 @@ def build_duckdb(data_dir: Path, rebuild: bool = False) -> Path:
 
     con = duckdb.connect(str(db_path))
     con.execute(
-        f"CREATE OR REPLACE VIEW crimes AS SELECT * FROM read_parquet('{_escape_path(lake_glob)}')"
+        "CREATE OR REPLACE VIEW crimes AS "
+        f"SELECT * FROM read_parquet('{_escape_path(lake_glob)}', union_by_name = true)"
     )
 
     community_path = _dim_path(data_dir, "community_areas", "community_areas.parquet")
@@ -63,7 +69,7 @@ def build_duckdb(data_dir: Path, rebuild: bool = False) -> Path:
     if community_path.exists():
         join_parts.append(
             "LEFT JOIN community_areas ca "
-            "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(ca.community_area AS INTEGER)"
+            "ON c.community_area = ca.community_area"
         )
         select_parts.append("ca.community_area_name AS community_area_name")
     else:
@@ -72,7 +78,7 @@ def build_duckdb(data_dir: Path, rebuild: bool = False) -> Path:
     if population_path.exists():
         join_parts.append(
             "LEFT JOIN population p "
-            "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(p.community_area AS INTEGER)"
+            "ON c.community_area = p.community_area"
         )
         select_parts.append("p.population AS population")
     else:
@@ -81,7 +87,7 @@ def build_duckdb(data_dir: Path, rebuild: bool = False) -> Path:
     if acs_path.exists():
         join_parts.append(
             "LEFT JOIN acs_demographics a "
-            "ON TRY_CAST(c.community_area AS INTEGER) = TRY_CAST(a.community_area AS INTEGER)"
+            "ON c.community_area = a.community_area"
         )
         select_parts.append("a.* EXCLUDE (community_area)")
 
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+
+import duckdb
+import pandas as pd
+import pytest
+
+from chicago_crime import config
+
+_SYSTEM_FIELDS = {":id": "_id", ":updated_at": "_updated_at"}
+
+
+def _to_sql(soql: str) -> str:
+    for field, column in _SYSTEM_FIELDS.items():
+        soql = soql.replace(field, column)
+    return soql
+
+
+class FakeSoda:
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.requests: list[dict] = []
+        self.latency = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.on_request: Callable[[dict], None] | None = None
+        self.gzipped_responses = 0
+        self.base_url = ""
+        self._lock = threading.Lock()
+        self._next_row_id = 0
+
+    def add_rows(self, rows: list[dict]) -> None:
+        with self._lock:
+            for row in rows:
+                self._next_row_id += 1
+                self.rows.append({":id": f"row-{self._next_row_id:08d}", **row})
+
+    def remove_rows(self, predicate: Callable[[dict], bool]) -> None:
+        with self._lock:
+            self.rows = [row for row in self.rows if not predicate(row)]
+
+    def query(self, params: dict) -> list[dict]:
+        with self._lock:
+            rows = list(self.rows)
+        select = params.get("$select")
+        if select and select.replace(" ", "").lower().startswith("count(*)"):
+            return [{"count": str(len(self._matching(rows, params, paged=False)))}]
+        fields = [field.strip() for field in select.split(",")] if select else ["*"]
+        result = []
+        for index in self._matching(rows, params, paged=True):
+            row = rows[index]
+            keys: list[str] = []
+            for field in fields:
+                keys.extend([key for key in row if not key.startswith(":")] if field == "*" else [field])
+            result.append({key: row[key] for key in keys if row.get(key) is not None})
+        return result
+
+    def query_csv(self, params: dict) -> bytes:
+        rows = self.query(params)
+        select = params.get("$select")
+        if select:
+            fields = [field.strip() for field in select.split(",")]
+        else:
+            fields = sorted({key for row in rows for key in row})
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        # Socrata writes booleans in lower case and missing values as empty fields.
+        for row in rows:
+            writer.writerow({key: str(value).lower() if isinstance(value, bool) else value for key, value in row.items()})
+        return buffer.getvalue().encode()
+
+    def _matching(self, rows: list[dict], params: dict, paged: bool) -> list[int]:
+        if not rows:
+            return []
+        raw = pd.DataFrame(rows).rename(columns=_SYSTEM_FIELDS)
+        raw["_row"] = range(len(raw))
+        casts = [
+            f"CAST({column} AS {sql_type}) AS {column}"
+            for column, sql_type in [("id", "BIGINT"), ("date", "TIMESTAMP"), ("_updated_at", "TIMESTAMP")]
+            if column in raw.columns
+        ]
+        replace = f" REPLACE ({', '.join(casts)})" if casts else ""
+        sql = f"SELECT _row FROM (SELECT *{replace} FROM raw)"
+        if params.get("$where"):
+            sql += f" WHERE {_to_sql(params['$where'])}"
+        if paged:
+            order = _to_sql(params["$order"]) + ", _row" if params.get("$order") else "_row"
+            sql += f" ORDER BY {order} LIMIT {int(params.get('$limit', 1000))} OFFSET {int(params.get('$offset', 0))}"
+        con = duckdb.connect()
+        try:
+            con.register("raw", raw)
+            return [row[0] for row in con.execute(sql).fetchall()]
+        finally:
+            con.close()
+
+
+def _handler_for(fake: FakeSoda) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            with fake._lock:
+                fake.requests.append(params)
+                fake.in_flight += 1
+                fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+            try:
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.on_request is not None:
+                    fake.on_request(params)
+                is_csv = url.path.endswith(".csv")
+                body = fake.query_csv(params) if is_csv else json.dumps(fake.query(params)).encode()
+            finally:
+                with fake._lock:
+                    fake.in_flight -= 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv" if is_csv else "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+                with fake._lock:
+                    fake.gzipped_responses += 1
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return _Handler
+
+
+@pytest.fixture
+def fake_soda(monkeypatch):
+    fake = FakeSoda()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(fake))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.base_url = f"http://127.0.0.1:{server.server_port}/resource"
+    monkeypatch.setenv("SODA_BASE_URL", fake.base_url)
+    monkeypatch.setenv("SODA_MAX_REQUESTS_PER_SECOND", "0")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    config._SETTINGS = None
+    yield fake
+    server.shutdown()
+    server.server_close()
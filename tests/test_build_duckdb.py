@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import duckdb
@@ -8,7 +8,9 @@ import pandas as pd
 
 from chicago_crime import config
 from chicago_crime.ingest import build_duckdb
-from chicago_crime.ingest.parquet_writer import add_partition_columns
+from chicago_crime.ingest.catalog import current_files_dir
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.snapshots import collect_garbage
 
 
 def _reset_settings(monkeypatch, data_dir: Path) -> None:
@@ -75,3 +77,65 @@ def test_build_duckdb_creates_views(tmp_path: Path, monkeypatch) -> None:
     ).fetchall()
     assert enriched == [("Rogers Park", 55000), ("Rogers Park", 55000)]
     con.close()
+
+
+def test_bridge_follows_commits_and_garbage_collection(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    _reset_settings(monkeypatch, data_dir)
+    settings = config.get_settings()
+
+    def _merge(ids: list[str], primary_type: str) -> None:
+        crimes = pd.DataFrame(
+            {
+                "id": ids,
+                "date": [datetime(2024, 3, 1, 10 + i, tzinfo=timezone.utc) for i in range(len(ids))],
+                "primary_type": [primary_type] * len(ids),
+            }
+        )
+        merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+    _merge(["1", "2"], "THEFT")
+    db_path = build_duckdb.build_duckdb(rebuild=True)
+
+    # Rewriting the partition supersedes its file; GC then deletes it without a bridge rebuild.
+    _merge(["2", "3"], "BATTERY")
+    collect_garbage(settings.lake_dir, retention=timedelta(0))
+    # Half-written output inside the lake is not part of any snapshot.
+    stray = settings.lake_dir / ".tmp_merge_0" / "year=2024"
+    stray.mkdir(parents=True)
+    (stray / "part-0.parquet").write_bytes(b"not parquet yet")
+
+    con = duckdb.connect(str(db_path), read_only=True)
+    rows = con.execute("SELECT id, primary_type FROM crimes ORDER BY id").fetchall()
+    con.close()
+    assert rows == [(1, "THEFT"), (2, "BATTERY"), (3, "BATTERY")]
+
+
+def test_each_commit_publishes_a_separate_mirror(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    _reset_settings(monkeypatch, data_dir)
+    settings = config.get_settings()
+
+    def _merge(day: int) -> None:
+        crimes = pd.DataFrame({"id": [str(day)], "date": [datetime(2024, 3, day, 10, tzinfo=timezone.utc)]})
+        merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+    def _ids(directory: Path) -> list[int]:
+        glob = str(directory / "**" / "*.parquet")
+        return [row[0] for row in duckdb.sql(f"SELECT id FROM read_parquet('{glob}') ORDER BY id").fetchall()]
+
+    head = current_files_dir(settings.lake_dir)
+    _merge(1)
+    _merge(2)
+    # The version a reader resolved earlier stays intact after the link moves on.
+    previous = head.resolve()
+    _merge(3)
+    assert _ids(head) == [1, 2, 3]
+    assert _ids(previous) == [1, 2]
+
+    # Older directories are recycled by applying the snapshot diff, so the mirror holds a bounded number of versions.
+    _merge(4)
+    _merge(1)
+    _merge(5)
+    assert _ids(head) == [1, 2, 3, 4, 5]
+    assert len([path for path in head.parent.iterdir() if path.name.startswith("v")]) == 3
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes
+from chicago_crime.ingest.bulk_import import bulk_format, stage_bulk_file
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.state import load_state
+
+EXPORT_HEADER = [
+    "ID", "Case Number", "Date", "Block", "IUCR", "Primary Type", "Description", "Location Description",
+    "Arrest", "Domestic", "Beat", "District", "Ward", "Community Area", "FBI Code", "Latitude", "Longitude",
+]
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def _export_row(crime_id: str, date: str, primary_type: str = "THEFT") -> list[str]:
+    return [
+        crime_id, "JH100000", date, "001XX N STATE ST", "0820", primary_type, "$500 AND UNDER", "STREET",
+        "false", "true", "0111", "001", "42", "32", "06", "41.88", "-87.63",
+    ]
+
+
+def _write_export(path: Path, rows: list[list[str]]) -> Path:
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(EXPORT_HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def _lake(lake_dir: Path) -> pd.DataFrame:
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    df = con.execute(
+        "SELECT id, date, primary_type, arrest, domestic, beat, district, community_area "
+        "FROM read_parquet(?) ORDER BY id",
+        [catalog_files(lake_dir)],
+    ).df()
+    con.close()
+    return df
+
+
+def test_bulk_export_csv_seeds_the_lake(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    export = _write_export(
+        tmp_path / "Crimes_-_2001_to_Present.csv",
+        [
+            _export_row("11", "01/31/2024 11:59:00 PM"),
+            _export_row("12", "02/01/2024 12:05:00 AM", "BATTERY"),
+            _export_row("13", "not a date"),
+            _export_row("", "02/02/2024 08:00:00 AM"),
+        ],
+    )
+
+    state = ingest_crimes.ingest_from_file(export)
+
+    df = _lake(settings.lake_dir)
+    assert df["id"].tolist() == [11, 12]
+    assert [str(ts) for ts in df["date"]] == ["2024-01-31 23:59:00+00:00", "2024-02-01 00:05:00+00:00"]
+    assert df["primary_type"].tolist() == ["THEFT", "BATTERY"]
+    assert df[["arrest", "domestic", "beat", "district", "community_area"]].iloc[0].tolist() == [
+        False, True, 111, 1, 32
+    ]
+    assert {Path(path).parent.name for path in catalog_files(settings.lake_dir)} == {"day=31", "day=01"}
+    assert state.rows_last_run == 2
+    assert load_state().watermark_max_date.isoformat() == "2024-02-01T00:05:00+00:00"
+    assert not list(settings.staging_dir.glob("*.parquet"))
+
+
+def test_parquet_dump_overlays_an_existing_lake(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    ingest_crimes.ingest_from_file(
+        _write_export(tmp_path / "export.csv", [_export_row("11", "01/31/2024 11:59:00 PM")])
+    )
+    dump = tmp_path / "dump.parquet"
+    pd.DataFrame(
+        {
+            "id": ["11", "21"],
+            "date": pd.to_datetime(["2024-01-31T23:59:00", "2024-03-05T10:00:00"], utc=True),
+            "primary_type": ["ROBBERY", "ASSAULT"],
+        }
+    ).to_parquet(dump)
+
+    ingest_crimes.ingest_from_file(dump)
+
+    df = _lake(settings.lake_dir)
+    assert df["id"].tolist() == [11, 21]
+    assert df["primary_type"].tolist() == ["ROBBERY", "ASSAULT"]
+
+
+def test_bulk_file_without_dates_is_rejected(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    export = tmp_path / "ids.csv"
+    export.write_text("ID,Primary Type\n1,THEFT\n")
+    with pytest.raises(ValueError):
+        stage_bulk_file(export, tmp_path / "staged.parquet")
+    with pytest.raises(ValueError):
+        stage_bulk_file(tmp_path / "export.json", tmp_path / "staged.parquet")
+
+
+def test_only_gzipped_csv_counts_as_a_gz_export() -> None:
+    assert bulk_format(Path("crimes.CSV.gz")) == "csv"
+    assert bulk_format(Path("crimes.2024.csv.gz")) == "csv"
+    for name in ["crimes.parquet.gz", "crimes.json.gz", "crimes.gz"]:
+        with pytest.raises(ValueError):
+            bulk_format(Path(name))
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.app import callbacks, warmup
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("WARM_TOP_TYPES", "2")
+    config._SETTINGS = None
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+
+
+def _add_crimes(settings) -> None:
+    first = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    count = 120
+    crimes = pd.DataFrame(
+        {
+            "id": [str(i) for i in range(count)],
+            "date": [first + timedelta(days=3 * i) for i in range(count)],
+            "primary_type": [["THEFT", "BATTERY", "ROBBERY"][i % 3] for i in range(count)],
+            "arrest": [i % 4 == 0 for i in range(count)],
+            "district": [["001", "002"][i % 2] for i in range(count)],
+            "community_area": [1 + i % 3 for i in range(count)],
+        }
+    )
+    merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+
+def test_warm_up_precomputes_the_default_view_and_presets(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    _add_crimes(config.get_settings())
+
+    # default + last 30 days + two districts + the top two types
+    assert warmup.warm_cache() == 6
+
+    calls: list[tuple] = []
+    daily_partials = queries.daily_partials
+
+    def _counted(*args):
+        calls.append(args)
+        return daily_partials(*args)
+
+    monkeypatch.setattr(queries, "daily_partials", _counted)
+    # A fresh worker rendering the page as a browser would finds every figure ready.
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+    start, end = warmup.default_date_range()
+    for district in [None, 1, 2]:
+        filters = callbacks.resolve_filters(
+            start.date().isoformat(), end.date().isoformat(), None, district, None, None, None
+        )
+        assert isinstance(callbacks.update_time_series(filters), dict)
+        assert isinstance(callbacks.update_top_types(filters), dict)
+    assert calls == []
+
+
+def test_warm_up_rejects_unknown_presets(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    with pytest.raises(ValueError, match="last_week"):
+        warmup.warm_cache(["default", "last_week"])
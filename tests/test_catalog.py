@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.catalog import catalog_path, load_catalog
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def test_merge_partitions_maintains_catalog(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    _reset_settings(monkeypatch, data_dir)
+    settings = config.get_settings()
+
+    staged = pd.DataFrame(
+        {
+            "id": ["9", "10", "3"],
+            "date": [
+                datetime(2024, 3, 1, 10, tzinfo=timezone.utc),
+                datetime(2024, 3, 1, 18, tzinfo=timezone.utc),
+                datetime(2024, 3, 2, 11, tzinfo=timezone.utc),
+            ],
+            "primary_type": ["THEFT", "BATTERY", "THEFT"],
+        }
+    )
+    staged_path = write_staged_parquet(add_partition_columns(staged), settings.staging_dir)
+    merge_partitions(settings.lake_dir, staged_path)
+
+    assert catalog_path(settings.lake_dir).exists()
+    entries = {key.rpartition("/")[0]: entry for key, entry in load_catalog(settings.lake_dir).items()}
+    assert sorted(entries) == ["year=2024/month=03/day=01", "year=2024/month=03/day=02"]
+    first = entries["year=2024/month=03/day=01"]
+    assert first.rows == 2
+    assert first.bytes > 0
+    assert first.min_date == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+    assert first.max_date == datetime(2024, 3, 1, 18, tzinfo=timezone.utc)
+    # Ids compare as numbers, not text.
+    assert (first.min_id, first.max_id) == (9, 10)
+
+    def _no_walk(self, pattern):
+        raise AssertionError("queries must not walk the lake")
+
+    monkeypatch.setattr(Path, "rglob", _no_walk)
+    min_date, max_date = queries.get_available_date_range()
+    assert min_date == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+    assert max_date == datetime(2024, 3, 2, 11, tzinfo=timezone.utc)
+    top = queries.top_n_primary_types(min_date, max_date, None, None, None, None)
+    assert dict(zip(top["primary_type"], top["count"])) == {"THEFT": 2, "BATTERY": 1}
+
+
+def test_catalogs_with_string_ids_load_as_integers(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake"
+    lake_dir.mkdir()
+    entry = {"path": "year=2024/month=03/day=01/part-0.parquet", "rows": 2, "bytes": 10, "min_id": "9", "max_id": "10"}
+    catalog_path(lake_dir).write_text(json.dumps({"version": 1, "files": [entry]}), encoding="utf-8")
+
+    loaded = load_catalog(lake_dir)[entry["path"]]
+    assert (loaded.min_id, loaded.max_id) == (9, 10)
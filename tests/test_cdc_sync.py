@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes, parquet_writer
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.state import load_state
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    monkeypatch.setenv("SYNC_MODE", "cdc")
+    config._SETTINGS = None
+
+
+def _run_cutoffs(monkeypatch, *cutoffs: datetime) -> None:
+    # Each run records its start time (less the safety lag) when it plans the fetch.
+    remaining = iter(cutoffs)
+    monkeypatch.setattr(ingest_crimes, "_updated_at_cutoff", lambda: next(remaining))
+
+
+def _row(crime_id: int, day: int, updated_at: str, primary_type: str = "THEFT") -> dict:
+    return {
+        "id": str(crime_id),
+        "date": f"2024-01-{day:02d}T12:00:00.000",
+        "primary_type": primary_type,
+        "arrest": False,
+        "domestic": False,
+        ":updated_at": updated_at,
+    }
+
+
+def _lake_rows(lake_dir: Path) -> dict[str, tuple]:
+    con = duckdb.connect()
+    rows = con.execute(
+        "SELECT id, day, primary_type FROM read_parquet(?)",
+        [catalog_files(lake_dir)],
+    ).fetchall()
+    con.close()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def test_cdc_sync_fetches_and_rewrites_only_changed_rows(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _run_cutoffs(monkeypatch, datetime(2024, 2, 2, tzinfo=timezone.utc), datetime(2024, 2, 10, tzinfo=timezone.utc))
+    fake_soda.add_rows([_row(100 + i, 1 + i % 10, "2024-02-01T00:00:00.000Z") for i in range(30)])
+
+    bootstrap = ingest_crimes.ingest_once()
+    assert bootstrap.updated_at_watermark == datetime(2024, 2, 2, tzinfo=timezone.utc)
+    assert len(_lake_rows(settings.lake_dir)) == 30
+
+    fake_soda.remove_rows(lambda row: row["id"] in {"102", "105"})
+    fake_soda.add_rows(
+        [
+            _row(102, 3, "2024-02-05T08:00:00.000Z", primary_type="ROBBERY"),
+            _row(105, 2, "2024-02-05T09:00:00.000Z"),
+            _row(200, 12, "2024-02-06T00:00:00.000Z"),
+        ]
+    )
+    fake_soda.requests.clear()
+    rewritten: list[str] = []
+    real_update_catalog = parquet_writer.update_catalog
+
+    def _recording_update_catalog(lake_dir, dirs, *args):
+        rewritten.extend(Path(path).name for path in dirs)
+        return real_update_catalog(lake_dir, dirs, *args)
+
+    monkeypatch.setattr(parquet_writer, "update_catalog", _recording_update_catalog)
+
+    state = ingest_crimes.ingest_once()
+
+    assert fake_soda.requests[0]["$where"] == "(:updated_at > '2024-02-02T00:00:00')"
+    assert state.updated_at_watermark == datetime(2024, 2, 6, tzinfo=timezone.utc)
+    assert load_state().updated_at_watermark == state.updated_at_watermark
+    assert sorted(rewritten) == ["day=02", "day=03", "day=06", "day=12"]
+
+    rows = _lake_rows(settings.lake_dir)
+    assert len(rows) == 31
+    assert rows[102] == ("03", "ROBBERY")
+    assert rows[105] == ("02", "THEFT")
+    assert rows[200] == ("12", "THEFT")
+
+
+def test_cdc_sync_keeps_watermark_when_nothing_changed(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    _run_cutoffs(monkeypatch, datetime(2024, 2, 2, tzinfo=timezone.utc), datetime(2024, 2, 10, tzinfo=timezone.utc))
+    fake_soda.add_rows([_row(1, 5, "2024-02-01T00:00:00.000Z")])
+    ingest_crimes.ingest_once()
+
+    fake_soda.remove_rows(lambda row: True)
+    state = ingest_crimes.ingest_once()
+
+    assert state.rows_last_run == 0
+    assert state.updated_at_watermark == datetime(2024, 2, 2, tzinfo=timezone.utc)
+
+
+def test_bootstrap_watermark_keeps_rows_edited_between_window_fetches(
+    tmp_path: Path, monkeypatch, fake_soda
+) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    start = (now - timedelta(days=15)).replace(hour=0, minute=0, second=0)
+    # Two ten-day windows: row 1 lands in the first, row 2 in the open-ended second one.
+    monkeypatch.setenv("START_DATE", start.replace(tzinfo=None).isoformat())
+    monkeypatch.setenv("FETCH_WINDOW_DAYS", "10")
+    config._SETTINGS = None
+    settings = config.get_settings()
+
+    def _crime(crime_id: int, day: datetime, updated_at: datetime, primary_type: str) -> dict:
+        return {
+            "id": str(crime_id),
+            "date": day.strftime("%Y-%m-%dT%H:%M:%S.000"),
+            "primary_type": primary_type,
+            ":updated_at": updated_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        }
+
+    first_day, second_day = start + timedelta(days=1, hours=12), start + timedelta(days=12, hours=12)
+    edited_before = now - timedelta(days=2)
+    fake_soda.add_rows([_crime(1, first_day, edited_before, "THEFT"), _crime(2, second_day, edited_before, "THEFT")])
+    first_window_served = threading.Event()
+    query = fake_soda.query
+
+    def _query(params: dict) -> list[dict]:
+        where = params.get("$where", "")
+        if "date >=" in where and " < " not in where:
+            # Both rows are edited after the first window was read but before the second one is.
+            assert first_window_served.wait(5)
+            fake_soda.remove_rows(lambda row: True)
+            fake_soda.add_rows(
+                [
+                    _crime(1, first_day, now + timedelta(minutes=1), "ROBBERY"),
+                    _crime(2, second_day, now + timedelta(minutes=2), "BATTERY"),
+                ]
+            )
+        rows = query(params)
+        if any(row.get("id") == "1" for row in rows):
+            first_window_served.set()
+        return rows
+
+    monkeypatch.setattr(fake_soda, "query", _query)
+
+    bootstrap = ingest_crimes.ingest_once(workers=2)
+    assert _lake_rows(settings.lake_dir)[1][1] == "THEFT"
+    # The watermark is the run start, not the newer :updated_at the second window reported.
+    assert bootstrap.updated_at_watermark < now
+
+    ingest_crimes.ingest_once(workers=2)
+    assert {crime_id: row[1] for crime_id, row in _lake_rows(settings.lake_dir).items()} == {
+        1: "ROBBERY",
+        2: "BATTERY",
+    }
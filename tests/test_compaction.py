@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.catalog import is_hive_layout, load_catalog
+from chicago_crime.ingest.id_index import partitions_for_ids
+from chicago_crime.ingest.parquet_writer import (
+    add_partition_columns,
+    compact_partitions,
+    merge_partitions,
+    write_staged_parquet,
+)
+from chicago_crime.ingest.rollup import current_rollup_files
+from chicago_crime.ingest.snapshots import collect_garbage
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def _stage(staging_dir: Path, ids: list[str], dates: list[datetime], primary_type: str = "THEFT") -> Path:
+    df = pd.DataFrame({"id": ids, "date": dates, "primary_type": [primary_type] * len(ids)})
+    return write_staged_parquet(add_partition_columns(df), staging_dir)
+
+
+def _all_time_counts() -> pd.DataFrame:
+    return queries.time_series_counts(
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+        None,
+        None,
+        None,
+        None,
+    )
+
+
+def test_compaction_merges_closed_months_and_absorbs_late_rows(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    lake_dir = settings.lake_dir
+    first = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+    dates = [first + timedelta(hours=8 * offset) for offset in range(3 * 70)]
+    merge_partitions(lake_dir, _stage(settings.staging_dir, [str(i) for i in range(len(dates))], dates))
+    before = _all_time_counts()
+
+    compacted = compact_partitions(lake_dir, "month", datetime(2024, 2, 15, tzinfo=timezone.utc))
+
+    assert compacted == [lake_dir / "year=2024" / "month=01"]
+    keys = sorted(load_catalog(lake_dir))
+    assert keys[0].rpartition("/")[0] == "year=2024/month=01"
+    assert all(key.split("/")[1] in {"month=02", "month=03"} and "/day=" in key for key in keys[1:])
+    collect_garbage(lake_dir, timedelta(0))
+    assert [path.name for path in (lake_dir / "year=2024" / "month=01").iterdir()] == [Path(keys[0]).name]
+    assert not is_hive_layout(lake_dir, [str(lake_dir / key) for key in keys])
+    assert current_rollup_files(lake_dir) is not None
+    pd.testing.assert_frame_equal(_all_time_counts(), before)
+
+    merge_partitions(
+        lake_dir,
+        _stage(
+            settings.staging_dir,
+            ["0", "9999"],
+            [datetime(2024, 1, 20, tzinfo=timezone.utc), datetime(2024, 1, 7, tzinfo=timezone.utc)],
+            "ROBBERY",
+        ),
+    )
+
+    assert not (lake_dir / "year=2024" / "month=01" / "day=07").exists()
+    assert sorted(load_catalog(lake_dir))[0].rpartition("/")[0] == "year=2024/month=01"
+    probe = _stage(settings.staging_dir, ["0", "9999", "200"], [datetime(2024, 9, 1, tzinfo=timezone.utc)] * 3)
+    assert partitions_for_ids(lake_dir, probe) == ["year=2024/month=01", "year=2024/month=03/day=08"]
+    after = _all_time_counts()
+    assert after["count"].sum() == before["count"].sum() + 1
+
+
+def test_year_compaction_replaces_months_and_days(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    lake_dir = settings.lake_dir
+    dates = [datetime(2023, month, 10, tzinfo=timezone.utc) for month in range(1, 13)]
+    merge_partitions(lake_dir, _stage(settings.staging_dir, [str(i) for i in range(12)], dates))
+    compact_partitions(lake_dir, "month", datetime(2023, 7, 1, tzinfo=timezone.utc))
+
+    assert compact_partitions(lake_dir, "year", datetime(2023, 12, 31, tzinfo=timezone.utc)) == []
+    compact_partitions(lake_dir, "year", datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    entries = load_catalog(lake_dir)
+    assert [key.rpartition("/")[0] for key in entries] == ["year=2023"]
+    assert sum(entry.rows for entry in entries.values()) == 12
+    collect_garbage(lake_dir, timedelta(0))
+    assert [f"year=2023/{path.name}" for path in (lake_dir / "year=2023").iterdir()] == list(entries)
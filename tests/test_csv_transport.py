@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.soda_client import DATE_KEYS, SodaClient
+
+
+def _reset_settings(monkeypatch, data_dir: Path, transport: str) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    monkeypatch.setenv("PAGE_LIMIT", "7")
+    monkeypatch.setenv("SODA_TRANSPORT", transport)
+    config._SETTINGS = None
+
+
+def _rows(count: int) -> list[dict]:
+    first = datetime(2024, 1, 1, 6)
+    rows = []
+    for i in range(count):
+        row = {
+            "id": str(1000 + i),
+            "date": (first + timedelta(hours=9 * i)).strftime("%Y-%m-%dT%H:%M:%S.000"),
+            "primary_type": "THEFT" if i % 3 else "BATTERY",
+            "description": 'SIMPLE, "ATTEMPT"' if i % 5 == 0 else None,
+            "arrest": i % 4 == 0,
+            "domestic": False,
+            "beat": f"{111 + i:04d}",
+            "district": "004" if i % 6 else "not-a-district",
+            "community_area": str(1 + i % 77),
+            "latitude": "41.88" if i % 2 else None,
+            "longitude": "-87.63",
+            ":updated_at": f"2024-03-{1 + i % 20:02d}T12:00:00.000Z",
+        }
+        rows.append({key: value for key, value in row.items() if value is not None})
+    return rows
+
+
+def _fetch(client: SodaClient, pages) -> tuple[list[dict], list[list]]:
+    batches, cursors, cursor = [], [], None
+    for page in pages:
+        batches.append(ingest_crimes._page_to_batch(page))
+        cursor = client.page_cursor(page, cursor, DATE_KEYS)
+        cursors.append(cursor)
+    return pa.Table.from_batches(batches).to_pylist(), cursors
+
+
+def test_csv_pages_match_the_json_path(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    fake_soda.add_rows(_rows(30))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    _reset_settings(monkeypatch, tmp_path / "data", "json")
+    json_client = SodaClient(track_updated_at=True)
+    json_rows, json_cursors = _fetch(json_client, json_client.fetch_pages_since(start))
+    json_updated = [ingest_crimes._page_updated_at(page) for page in json_client.fetch_pages_updated_since(start)]
+
+    fake_soda.requests.clear()
+    fake_soda.gzipped_responses = 0
+    _reset_settings(monkeypatch, tmp_path / "data", "csv")
+    csv_client = SodaClient(track_updated_at=True)
+    pages = list(csv_client.fetch_pages_since(start))
+    assert all(isinstance(page, pa.Table) for page in pages)
+    assert fake_soda.gzipped_responses == len(fake_soda.requests) == len(pages)
+    csv_rows, csv_cursors = _fetch(csv_client, pages)
+    csv_updated = [ingest_crimes._page_updated_at(page) for page in csv_client.fetch_pages_updated_since(start)]
+
+    assert len(csv_rows) == 30
+    assert csv_rows == json_rows
+    assert csv_cursors == json_cursors
+    assert csv_updated == json_updated
+
+
+def test_ingest_over_csv_transport(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data", "csv")
+    settings = config.get_settings()
+    fake_soda.add_rows(_rows(30))
+
+    state = ingest_crimes.ingest_once()
+
+    assert state.rows_last_run == 30
+    assert all("id > " in request["$where"] for request in fake_soda.requests[1:])
+    con = duckdb.connect()
+    total, arrests, districts = con.execute(
+        "SELECT COUNT(*), COUNT(*) FILTER (arrest), COUNT(district) FROM read_parquet(?)",
+        [catalog_files(settings.lake_dir)],
+    ).fetchone()
+    con.close()
+    assert (total, arrests, districts) == (30, 8, 25)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from chicago_crime import config, db
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+@pytest.mark.parametrize(
+    "date_end",
+    [
+        datetime(2024, 3, 31, 23, 59, 59, tzinfo=timezone.utc),
+        datetime(2024, 3, 31, 23, 30, tzinfo=timezone.utc),
+    ],
+    ids=["rollup", "raw"],
+)
+def test_daily_partials_rebuild_the_individual_queries(tmp_path: Path, monkeypatch, date_end) -> None:
+    data_dir = tmp_path / "data"
+    _reset_settings(monkeypatch, data_dir)
+    settings = config.get_settings()
+
+    dim_dir = data_dir / "dim" / "community_areas"
+    dim_dir.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"community_area": [1], "community_area_name": ["Rogers Park"]}).to_parquet(
+        dim_dir / "community_areas.parquet", index=False
+    )
+
+    crimes = pd.DataFrame(
+        {
+            "id": [str(i) for i in range(8)],
+            "date": [
+                datetime(2024, 3, 1, 10, tzinfo=timezone.utc),
+                datetime(2024, 3, 1, 10, 30, tzinfo=timezone.utc),
+                datetime(2024, 3, 2, 11, tzinfo=timezone.utc),
+                datetime(2024, 3, 4, 23, tzinfo=timezone.utc),
+                datetime(2024, 3, 9, 1, tzinfo=timezone.utc),
+                datetime(2024, 3, 9, 2, tzinfo=timezone.utc),
+                datetime(2024, 3, 15, 14, tzinfo=timezone.utc),
+                datetime(2024, 3, 20, 8, tzinfo=timezone.utc),
+            ],
+            "primary_type": ["THEFT", "THEFT", "BATTERY", "THEFT", "ROBBERY", "BATTERY", "THEFT", "ASSAULT"],
+            "arrest": [True, False, True, False, False, True, True, False],
+            "domestic": [False, True, False, False, True, False, False, False],
+            "district": [1.0, 2.0, 1.0, 1.0, 2.0, 2.0, 1.0, 1.0],
+            "community_area": [1.0, 2.0, 2.0, None, 1.0, 3.0, 1.0, 2.0],
+        }
+    )
+    staged_path = write_staged_parquet(add_partition_columns(crimes), settings.staging_dir)
+    merge_partitions(settings.lake_dir, staged_path)
+
+    args = (datetime(2024, 3, 1, tzinfo=timezone.utc), date_end, None, None, None, None)
+    bundle = queries.bundle_from_daily(queries.daily_partials(*args))
+
+    assert bundle.total == 8
+    pd.testing.assert_frame_equal(bundle.time_series, queries.time_series_counts(*args), check_dtype=False)
+    pd.testing.assert_frame_equal(bundle.heatmap, queries.dow_hour_heatmap(*args), check_dtype=False)
+    pd.testing.assert_frame_equal(
+        bundle.top_types.sort_values("primary_type", ignore_index=True),
+        queries.top_n_primary_types(*args).sort_values("primary_type", ignore_index=True),
+        check_dtype=False,
+    )
+    pd.testing.assert_frame_equal(
+        bundle.arrest_rate.sort_values("primary_type", ignore_index=True),
+        queries.arrest_rate_by_type(*args).sort_values("primary_type", ignore_index=True),
+        check_dtype=False,
+    )
+    expected_areas = queries.community_area_arrest_rate(*args)
+    pd.testing.assert_frame_equal(
+        bundle.community_areas.sort_values("community_area", ignore_index=True),
+        expected_areas.sort_values("community_area", ignore_index=True),
+        check_dtype=False,
+    )
+    assert bundle.community_areas["community_area_name"].tolist()[0] in {"Rogers Park", "CA 2"}
+
+
+def test_daily_partials_run_a_single_query(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    crimes = pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "date": [
+                datetime(2024, 3, 1, 10, tzinfo=timezone.utc),
+                datetime(2024, 3, 2, 11, tzinfo=timezone.utc),
+            ],
+            "primary_type": ["THEFT", "BATTERY"],
+            "community_area": [1.0, 2.0],
+        }
+    )
+    staged_path = write_staged_parquet(add_partition_columns(crimes), settings.staging_dir)
+    merge_partitions(settings.lake_dir, staged_path)
+
+    executed: list[str] = []
+    real_execute = db.execute
+
+    def _recording_execute(sql, params=None):
+        executed.append(sql)
+        return real_execute(sql, params)
+
+    monkeypatch.setattr(db, "execute", _recording_execute)
+    bundle = queries.bundle_from_daily(queries.daily_partials(None, None, None, None, None, None))
+
+    assert len(executed) == 1
+    assert "GROUPING SETS" in executed[0]
+    assert bundle.total == 2
+    assert set(bundle.community_areas["community_area"]) == {1, 2}
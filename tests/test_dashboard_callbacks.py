@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import shutil
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.app import callbacks
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("MAP_MODE_DEFAULT", "choropleth")
+    config._SETTINGS = None
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+
+
+def _add_crimes(settings, ids: list[str], day: int) -> None:
+    crimes = pd.DataFrame(
+        {
+            "id": ids,
+            "date": [datetime(2024, 3, day, 10 + i, tzinfo=timezone.utc) for i in range(len(ids))],
+            "primary_type": ["THEFT" if i % 2 else "BATTERY" for i in range(len(ids))],
+            "arrest": [i % 3 == 0 for i in range(len(ids))],
+            "community_area": [1 + i % 3 for i in range(len(ids))],
+        }
+    )
+    merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+
+def _render(filters: dict) -> dict:
+    return {
+        "time-series": callbacks.update_time_series(filters),
+        "top-types": callbacks.update_top_types(filters),
+        "heatmap": callbacks.update_heatmap(filters),
+        "arrest-rate": callbacks.update_arrest_rate(filters),
+        "top-community": callbacks.update_top_community(filters),
+        "map": callbacks.update_map(filters),
+    }
+
+
+def test_figure_callbacks_share_one_concurrent_round_of_queries(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    _add_crimes(config.get_settings(), [str(i) for i in range(6)], 4)
+
+    # A cold range over two years fetches each year at once; run serially, the first fetch times out.
+    barrier = threading.Barrier(2, timeout=10)
+    calls: list[tuple] = []
+    daily_partials = queries.daily_partials
+
+    def _concurrent(*args):
+        calls.append((args[0].date(), args[1].date()))
+        barrier.wait()
+        return daily_partials(*args)
+
+    monkeypatch.setattr(queries, "daily_partials", _concurrent)
+
+    filters = callbacks.resolve_filters("2023-12-01", "2024-03-31", None, None, None, None, None)
+    figures = _render(filters)
+
+    assert sorted(calls) == [(date(2023, 12, 1), date(2023, 12, 31)), (date(2024, 1, 1), date(2024, 3, 31))]
+    assert sum(figures["time-series"].data[0].y) == 6
+    assert set(figures["top-types"].data[0].x) == {"THEFT", "BATTERY"}
+    assert figures["map"][1] == "Community area boundaries not available yet — run ingest."
+
+    # Redrawing the map differently reuses the same aggregates.
+    callbacks.update_map({**filters, "metric": "arrest_rate"})
+    assert len(calls) == 2
+
+
+def test_figures_read_the_snapshot_their_filters_resolved(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, ["1", "2", "3"], 4)
+    filters = callbacks.resolve_filters("2024-03-01", "2024-03-31", None, None, None, None, None)
+
+    _add_crimes(settings, ["4", "5"], 9)
+    # A callback landing on a worker that never saw this filter set still reads the pinned snapshot.
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+    assert sum(callbacks.update_time_series(filters).data[0].y) == 3
+
+    fresh = callbacks.resolve_filters("2024-03-01", "2024-03-31", None, None, None, None, None)
+    assert fresh["version"] == filters["version"] + 1
+    assert sum(callbacks.update_time_series(fresh).data[0].y) == 5
+
+
+def test_results_and_figures_are_shared_across_workers_until_the_lake_moves(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, ["1", "2", "3"], 4)
+    calls: list[tuple] = []
+    daily_partials = queries.daily_partials
+
+    def _counted(*args):
+        calls.append(args)
+        return daily_partials(*args)
+
+    monkeypatch.setattr(queries, "daily_partials", _counted)
+
+    filters = callbacks.resolve_filters("2024-03-01", "2024-03-31", None, None, None, None, None)
+    _render(filters)
+    assert len(calls) == 1
+    assert any((settings.cache_dir / "results").iterdir())
+    assert any((settings.cache_dir / "figures").iterdir())
+
+    # A second worker process starts with nothing in flight but shares the cache directory.
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+    figures = _render(callbacks.resolve_filters("2024-03-01", "2024-03-31", None, None, None, None, None))
+    assert len(calls) == 1
+    assert isinstance(figures["time-series"], dict)
+    assert figures["top-types"]["layout"]["title"]["text"] == "Top Primary Types"
+
+    _add_crimes(settings, ["4"], 9)
+    moved = callbacks.resolve_filters("2024-03-01", "2024-03-31", None, None, None, None, None)
+    assert sum(callbacks.update_time_series(moved).data[0].y) == 4
+    assert len(calls) == 2
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.app import callbacks, day_cache
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+    monkeypatch.setattr(callbacks, "_in_flight", {})
+
+
+def _add_crimes(settings, dates: list[datetime]) -> None:
+    crimes = pd.DataFrame(
+        {
+            "id": [f"{moment:%Y%m%d%H}" for moment in dates],
+            "date": dates,
+            "primary_type": ["THEFT" if i % 2 else "BATTERY" for i in range(len(dates))],
+            "arrest": [i % 3 == 0 for i in range(len(dates))],
+            "community_area": [1 + i % 3 for i in range(len(dates))],
+        }
+    )
+    merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+
+def _hours(month: int, days: range) -> list[datetime]:
+    return [datetime(2024, month, day, hour, tzinfo=timezone.utc) for day in days for hour in (1, 13, 22)]
+
+
+def test_widening_the_range_only_queries_the_new_days(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, _hours(2, range(10, 29)) + _hours(3, range(1, 20)) + _hours(4, range(1, 9)))
+    fetched: list[tuple[date, date]] = []
+    daily_partials = queries.daily_partials
+
+    def _recorded(*args):
+        fetched.append((args[0].date(), args[1].date()))
+        return daily_partials(*args)
+
+    monkeypatch.setattr(queries, "daily_partials", _recorded)
+
+    def _total(start: str, end: str) -> int:
+        ts = callbacks._query_result(callbacks.resolve_filters(start, end, None, None, None, None, None), "time_series")
+        return int(ts["count"].sum())
+
+    assert _total("2024-03-01", "2024-03-31") == 57
+    assert fetched == [(date(2024, 3, 1), date(2024, 3, 31))]
+
+    fetched.clear()
+    assert _total("2024-02-15", "2024-04-05") == 42 + 57 + 15
+    # Missing runs are fetched concurrently, so they arrive in no fixed order.
+    assert sorted(fetched) == [(date(2024, 2, 15), date(2024, 2, 29)), (date(2024, 4, 1), date(2024, 4, 5))]
+
+    # Anything inside the days already seen is assembled without touching the lake.
+    fetched.clear()
+    assert _total("2024-02-20", "2024-03-02") == 27 + 6
+    assert fetched == []
+
+    # A commit into March leaves February's and April's cached days valid.
+    _add_crimes(settings, [datetime(2024, 3, 25, 4, tzinfo=timezone.utc)])
+    assert _total("2024-02-15", "2024-04-05") == 42 + 58 + 15
+    assert fetched == [(date(2024, 3, 1), date(2024, 3, 31))]
+
+
+def test_planning_a_long_range_reads_the_catalog_once(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, _hours(2, range(10, 29)) + _hours(3, range(1, 20)))
+    loads = []
+    load_catalog = day_cache.load_catalog
+
+    def _counted(lake_dir):
+        loads.append(lake_dir)
+        return load_catalog(lake_dir)
+
+    monkeypatch.setattr(day_cache, "load_catalog", _counted)
+    store = callbacks._day_store()
+    plan = day_cache.plan_days(store, settings.lake_dir, date(2022, 1, 1), date(2024, 12, 31), ())
+    assert len(loads) == 1
+    assert plan.missing == [
+        (date(2022, 1, 1), date(2022, 12, 31)),
+        (date(2023, 1, 1), date(2023, 12, 31)),
+        (date(2024, 1, 1), date(2024, 12, 31)),
+    ]
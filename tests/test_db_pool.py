@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from chicago_crime import db
+
+
+def test_cursors_are_per_thread_on_one_database() -> None:
+    db.reset_pool()
+    main_cursor = db.get_cursor()
+    assert db.get_cursor() is main_cursor
+
+    main_cursor.execute("CREATE OR REPLACE TABLE pool_probe AS SELECT range AS value FROM range(1000)")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        cursors = list(executor.map(lambda _: id(db.get_cursor()), range(4)))
+        totals = list(
+            executor.map(lambda _: db.execute("SELECT SUM(value) FROM pool_probe").fetchone()[0], range(16))
+        )
+
+    assert id(main_cursor) not in cursors
+    assert totals == [sum(range(1000))] * 16
+    assert db.execute("SELECT current_setting('TimeZone')").fetchone()[0] == "UTC"
+    assert db.execute("SELECT current_setting('parquet_metadata_cache')").fetchone()[0] is True
+
+
+def test_reset_pool_starts_a_fresh_database() -> None:
+    db.reset_pool()
+    db.execute("CREATE TABLE reset_probe AS SELECT 1 AS value")
+    cursor = db.get_cursor()
+
+    db.reset_pool()
+    assert db.get_cursor() is not cursor
+    tables = db.execute("SELECT table_name FROM duckdb_tables() WHERE table_name = 'reset_probe'").fetchall()
+    assert tables == []
+    assert db.execute("SELECT ? + 1", [2]).fetchone()[0] == 3
@@ -6,6 +6,7 @@ from pathlib import Path
 import duckdb
 import pandas as pd
 
+from chicago_crime.ingest.catalog import catalog_files
 from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
 
 
@@ -51,12 +52,12 @@ def test_merge_partitions_dedupes_across_partitions(tmp_path: Path) -> None:
     con = duckdb.connect()
     result = con.execute(
         "SELECT id, MAX(date) AS max_date, COUNT(*) AS cnt FROM read_parquet(?) GROUP BY id",
-        [str(lake_dir / "**" / "*.parquet")],
+        [catalog_files(lake_dir)],
     ).fetchall()
     con.close()
 
     rows = {row[0]: (row[1], row[2]) for row in result}
-    assert rows["1"][1] == 1
-    assert rows["1"][0] == datetime(2024, 2, 1, 10, tzinfo=timezone.utc)
-    assert rows["2"][1] == 1
-    assert rows["3"][1] == 1
+    assert rows[1][1] == 1
+    assert rows[1][0] == datetime(2024, 2, 1, 10, tzinfo=timezone.utc)
+    assert rows[2][1] == 1
+    assert rows[3][1] == 1
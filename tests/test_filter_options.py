@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from dash.exceptions import PreventUpdate
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.app import callbacks
+from chicago_crime.app.server import create_app
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.rollup import MANIFEST_FILENAME, rollup_dir_for, update_rollup
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def _add_crimes(settings, ids: list[str], primary_types: list[str], districts: list[str], day: int) -> None:
+    crimes = pd.DataFrame(
+        {
+            "id": ids,
+            "date": [datetime(2024, 3, day, 10, tzinfo=timezone.utc)] * len(ids),
+            "primary_type": primary_types,
+            "district": districts,
+        }
+    )
+    merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(crimes), settings.staging_dir))
+
+
+def _no_scans(monkeypatch) -> None:
+    def _scan():
+        raise AssertionError("scanned the lake")
+
+    monkeypatch.setattr(queries, "distinct_primary_types", _scan)
+    monkeypatch.setattr(queries, "distinct_districts", _scan)
+
+
+def test_options_come_from_the_rollup_manifest(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, ["1", "2", "3"], ["THEFT", "BATTERY", "THEFT"], ["004", "011", None], 4)
+    expected = (queries.distinct_primary_types(), queries.distinct_districts())
+
+    _no_scans(monkeypatch)
+    assert queries.filter_options() == expected == (["BATTERY", "THEFT"], [4, 11])
+
+    # Neither starting the app nor rendering the page touches the lake.
+    create_app()
+    types, districts, _, max_date, version = callbacks.refresh_filter_options(0, None)
+    assert [option["value"] for option in types] == ["BATTERY", "THEFT"]
+    assert [option["value"] for option in districts] == [4, 11]
+    assert str(max_date) == "2024-03-04"
+    with pytest.raises(PreventUpdate):
+        callbacks.refresh_filter_options(1, version)
+
+    _add_crimes(settings, ["4"], ["ARSON"], ["002"], 9)
+    types, districts, _, max_date, _ = callbacks.refresh_filter_options(2, version)
+    assert [option["value"] for option in types] == ["ARSON", "BATTERY", "THEFT"]
+    assert [option["value"] for option in districts] == [2, 4, 11]
+    assert str(max_date) == "2024-03-09"
+
+
+def test_manifests_without_options_fall_back_and_are_backfilled(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _add_crimes(settings, ["1", "2"], ["THEFT", "BATTERY"], ["004", "011"], 4)
+    manifest_path = rollup_dir_for(settings.lake_dir) / MANIFEST_FILENAME
+    payload = json.loads(manifest_path.read_text())
+    del payload["options"]
+    manifest_path.write_text(json.dumps(payload))
+
+    assert queries.filter_options() == (["BATTERY", "THEFT"], [4, 11])
+
+    update_rollup(settings.lake_dir, [])
+    _no_scans(monkeypatch)
+    assert queries.filter_options() == (["BATTERY", "THEFT"], [4, 11])
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.id_index import index_path_for, partitions_for_ids
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _stage(staging_dir: Path, ids: list[str], dates: list[datetime]) -> Path:
+    df = pd.DataFrame({"id": ids, "date": dates, "primary_type": ["THEFT"] * len(ids)})
+    return write_staged_parquet(add_partition_columns(df), staging_dir)
+
+
+def _lake_counts(lake_dir: Path) -> dict[str, int]:
+    con = duckdb.connect()
+    rows = con.execute(
+        "SELECT id, COUNT(*) FROM read_parquet(?) GROUP BY id",
+        [catalog_files(lake_dir)],
+    ).fetchall()
+    con.close()
+    return dict(rows)
+
+
+def test_merge_uses_id_index_instead_of_scanning_the_lake(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    merge_partitions(
+        lake_dir,
+        _stage(
+            staging_dir,
+            ["1", "2", "3"],
+            [
+                datetime(2024, 1, 1, 8, tzinfo=timezone.utc),
+                datetime(2024, 1, 2, 8, tzinfo=timezone.utc),
+                datetime(2024, 1, 3, 8, tzinfo=timezone.utc),
+            ],
+        ),
+    )
+    assert index_path_for(lake_dir).exists()
+
+    probe = _stage(staging_dir, ["1", "99"], [datetime(2024, 1, 9, tzinfo=timezone.utc)] * 2)
+    assert partitions_for_ids(lake_dir, probe) == ["year=2024/month=01/day=01"]
+    probe.unlink()
+
+    # Same-sized junk keeps the catalog valid, so only a full lake scan would trip over it.
+    (untouched,) = [path for path in catalog_files(lake_dir) if "/day=03/" in path]
+    untouched = Path(untouched)
+    original = untouched.read_bytes()
+    untouched.write_bytes(b"\0" * len(original))
+
+    merge_partitions(
+        lake_dir,
+        _stage(staging_dir, ["1", "4"], [datetime(2024, 1, 5, tzinfo=timezone.utc)] * 2),
+    )
+
+    untouched.write_bytes(original)
+    assert _lake_counts(lake_dir) == {1: 1, 2: 1, 3: 1, 4: 1}
+    assert not [path for path in catalog_files(lake_dir) if "/day=01/" in path]
+
+
+def test_missing_id_index_is_rebuilt_before_lookup(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    merge_partitions(lake_dir, _stage(staging_dir, ["1"], [datetime(2024, 3, 1, tzinfo=timezone.utc)]))
+    index_path_for(lake_dir).unlink()
+
+    merge_partitions(lake_dir, _stage(staging_dir, ["1"], [datetime(2024, 3, 2, tzinfo=timezone.utc)]))
+
+    assert _lake_counts(lake_dir) == {1: 1}
+    probe = _stage(staging_dir, ["1"], [datetime(2024, 3, 9, tzinfo=timezone.utc)])
+    assert partitions_for_ids(lake_dir, probe) == ["year=2024/month=03/day=02"]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_acs
+from chicago_crime.ingest.soda_client import SodaClient
+
+
+def _reset_settings(monkeypatch, data_dir: Path, pagination: str) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("PAGE_LIMIT", "10")
+    monkeypatch.setenv("SODA_PAGINATION", pagination)
+    config._SETTINGS = None
+
+
+def _crime_rows(count: int) -> list[dict]:
+    first = datetime(2024, 1, 1)
+    return [
+        {
+            "id": str(500 + i),
+            "date": (first + timedelta(hours=i // 2)).strftime("%Y-%m-%dT%H:%M:%S.000"),
+            "primary_type": "THEFT",
+        }
+        for i in range(count)
+    ]
+
+
+def _mutate_after_third_page(fake_soda) -> None:
+    requests_seen = []
+
+    def _mutate(params: dict) -> None:
+        requests_seen.append(params)
+        if len(requests_seen) == 3:
+            fake_soda.remove_rows(lambda row: row["id"] in {"500", "501"})
+            fake_soda.add_rows([{"id": "9000", "date": "2023-12-31T00:00:00.000", "primary_type": "THEFT"}])
+
+    fake_soda.on_request = _mutate
+
+
+def _fetch_ids(monkeypatch, tmp_path: Path, fake_soda, pagination: str) -> Counter:
+    _reset_settings(monkeypatch, tmp_path / "data", pagination)
+    fake_soda.add_rows(_crime_rows(95))
+    _mutate_after_third_page(fake_soda)
+    pages = SodaClient().fetch_pages_since(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    return Counter(row["id"] for page in pages for row in page)
+
+
+def test_keyset_pages_survive_a_mutating_dataset(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    seen = _fetch_ids(monkeypatch, tmp_path, fake_soda, "keyset")
+
+    assert set(seen) == {str(500 + i) for i in range(95)}
+    assert max(seen.values()) == 1
+    assert all("$offset" not in params for params in fake_soda.requests)
+    assert len(fake_soda.requests) == 10
+    last_where = fake_soda.requests[-1]["$where"]
+    assert "date > '2024-01-02T20:00:00.000'" in last_where
+    assert "id > 589" in last_where
+
+
+def test_offset_pages_skip_rows_when_the_dataset_shifts(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    seen = _fetch_ids(monkeypatch, tmp_path, fake_soda, "offset")
+
+    assert len(set(seen)) < 95
+
+
+def test_dim_rows_page_by_row_id(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data", "keyset")
+    fake_soda.add_rows([{"community_area": str(i), "population": str(1000 * i)} for i in range(1, 78)])
+
+    rows = ingest_acs._fetch_all_rows("acs-test")
+
+    assert [row["community_area"] for row in rows] == [str(i) for i in range(1, 78)]
+    assert all(":id" not in row for row in rows)
+    assert fake_soda.requests[1]["$where"] == "(:id > 'row-00000010')"
+    assert fake_soda.requests[0]["$order"] == ":id asc"
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow.parquet as pq
+
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.snapshots import collect_garbage
+
+
+def _stage(staging_dir: Path, ids: list[str], dates: list[datetime], primary_type: str) -> Path:
+    df = pd.DataFrame({"id": ids, "date": dates, "primary_type": [primary_type] * len(ids)})
+    return write_staged_parquet(add_partition_columns(df), staging_dir)
+
+
+def test_merge_rewrites_all_touched_partitions_in_one_pass(tmp_path: Path, monkeypatch) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    first = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    dates = [first + timedelta(days=offset) for offset in range(14)]
+    merge_partitions(lake_dir, _stage(staging_dir, [str(i) for i in range(14)], dates, "THEFT"))
+
+    def _no_pandas(*args, **kwargs):
+        raise AssertionError("merge should not round-trip through pandas")
+
+    copies: list[str] = []
+    real_execute = duckdb.DuckDBPyConnection.execute
+
+    def _recording_execute(self, query, *args, **kwargs):
+        if isinstance(query, str) and query.startswith("COPY"):
+            copies.append(query)
+        return real_execute(self, query, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", _no_pandas)
+    monkeypatch.setattr(duckdb.DuckDBPyConnection, "execute", _recording_execute)
+
+    restaged = tmp_path / "restaged.parquet"
+    duckdb.sql(
+        "SELECT CAST(range AS VARCHAR) AS id, "
+        "TIMESTAMPTZ '2024-05-01 18:00:00+00' + to_days(CAST(range AS INTEGER)) AS date, "
+        "'ROBBERY' AS primary_type, "
+        "strftime(TIMESTAMP '2024-05-01' + to_days(CAST(range AS INTEGER)), '%Y') AS year, "
+        "strftime(TIMESTAMP '2024-05-01' + to_days(CAST(range AS INTEGER)), '%m') AS month, "
+        "strftime(TIMESTAMP '2024-05-01' + to_days(CAST(range AS INTEGER)), '%d') AS day "
+        "FROM range(0, 14, 2)"
+    ).write_parquet(str(restaged))
+    rows_written, max_date = merge_partitions(lake_dir, restaged)
+
+    assert len([query for query in copies if "PARTITION_BY" in query]) == 1
+    assert rows_written == 7
+    assert max_date == datetime(2024, 5, 13, 18, tzinfo=timezone.utc)
+    assert not list(lake_dir.glob(".tmp_*"))
+
+    con = duckdb.connect()
+    result = con.execute(
+        "SELECT id, primary_type, year, month, day "
+        "FROM read_parquet(?, hive_partitioning = true, hive_types_autocast = false) "
+        "ORDER BY id",
+        [catalog_files(lake_dir)],
+    ).fetchall()
+    con.close()
+    assert len(result) == 14
+    assert result[0] == (0, "ROBBERY", "2024", "05", "01")
+    assert result[1] == (1, "THEFT", "2024", "05", "02")
+    assert {row[1] for row in result[::2]} == {"ROBBERY"}
+    (day_file,) = [path for path in catalog_files(lake_dir) if "/day=03/" in path]
+    body = pq.read_schema(day_file).names
+    assert not {"year", "month", "day", "target"} & set(body)
+
+
+def test_merge_removes_partitions_emptied_by_moved_rows(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    merge_partitions(lake_dir, _stage(staging_dir, ["1"], [datetime(2024, 6, 1, tzinfo=timezone.utc)], "THEFT"))
+    merge_partitions(lake_dir, _stage(staging_dir, ["1"], [datetime(2024, 5, 31, tzinfo=timezone.utc)], "THEFT"))
+
+    assert [Path(path).parent.name for path in catalog_files(lake_dir)] == ["day=31"]
+    collect_garbage(lake_dir, timedelta(0))
+    assert not (lake_dir / "year=2024" / "month=06").exists()
+
+
+def test_merge_of_empty_stage_is_a_no_op(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staged = _stage(tmp_path / "staging", [], [], "THEFT")
+    assert merge_partitions(lake_dir, staged) == (0, None)
+    assert not list(lake_dir.glob("year=*"))
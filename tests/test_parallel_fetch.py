@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+import pytest
+import requests
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.soda_client import RateLimiter, SodaClient
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    monkeypatch.setenv("PAGE_LIMIT", "25")
+    monkeypatch.setenv("FETCH_WINDOW_DAYS", "30")
+    config._SETTINGS = None
+
+
+def _rows(count: int) -> list[dict]:
+    first = datetime(2024, 1, 1, 6)
+    return [
+        {
+            "id": str(1000 + i),
+            "date": (first + timedelta(hours=21 * i)).strftime("%Y-%m-%dT%H:%M:%S.000"),
+            "primary_type": "THEFT" if i % 3 else "BATTERY",
+            "arrest": i % 4 == 0,
+            "domestic": False,
+            "district": "004",
+            "community_area": str(1 + i % 77),
+        }
+        for i in range(count)
+    ]
+
+
+def test_parallel_backfill_fetches_windows_concurrently(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    fake_soda.add_rows(_rows(400))
+    fake_soda.latency = 0.02
+
+    state = ingest_crimes.ingest_once(full_backfill=True, workers=4)
+
+    assert state.rows_last_run == 400
+    assert fake_soda.max_in_flight > 1
+    pages = [request for request in fake_soda.requests if not request.get("$select", "").startswith("count(*)")]
+    wheres = {request["$where"] for request in pages}
+    assert sum(" AND date < " not in where for where in wheres) == 1
+    assert len(wheres) > 4
+
+    con = duckdb.connect()
+    total, distinct = con.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT id) FROM read_parquet(?)",
+        [catalog_files(settings.lake_dir)],
+    ).fetchone()
+    con.close()
+    assert (total, distinct) == (400, 400)
+
+
+def test_windowed_fetch_surfaces_worker_errors(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    fake_soda.add_rows(_rows(200))
+
+    def _fail_in_march(params: dict) -> None:
+        if "date >= '2024-03" in params.get("$where", ""):
+            raise RuntimeError("boom")
+
+    fake_soda.on_request = _fail_in_march
+    client = SodaClient()
+    windows = client.plan_windows(datetime(2024, 1, 1, tzinfo=timezone.utc), workers=3)
+    with pytest.raises(requests.RequestException):
+        list(client.fetch_window_pages([(start, end, None) for start, end in windows], workers=3))
+
+
+def test_rate_limiter_is_shared_across_threads() -> None:
+    limiter = RateLimiter(20)
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: limiter.wait(), range(7)))
+    assert time.monotonic() - started >= 0.29
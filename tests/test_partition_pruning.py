@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config, db
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def test_date_filtered_queries_only_open_overlapping_partitions(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+
+    first_day = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    dates = [first_day + timedelta(days=offset) for offset in range(60)]
+    crimes = pd.DataFrame(
+        {
+            "id": [str(i) for i in range(len(dates))],
+            "date": dates,
+            "primary_type": ["THEFT"] * len(dates),
+            "latitude": [41.8] * len(dates),
+            "longitude": [-87.6] * len(dates),
+        }
+    )
+    staged_path = write_staged_parquet(add_partition_columns(crimes), settings.staging_dir)
+    merge_partitions(settings.lake_dir, staged_path)
+
+    opened: list[list[str]] = []
+    real_execute = db.execute
+
+    def _recording_execute(sql, params=None):
+        for param in params or []:
+            if isinstance(param, list) and param and str(param[0]).startswith(str(settings.lake_dir)):
+                opened.append(param)
+        return real_execute(sql, params)
+
+    monkeypatch.setattr(db, "execute", _recording_execute)
+
+    week_start = datetime(2024, 2, 5, tzinfo=timezone.utc)
+    week_end = datetime(2024, 2, 11, 23, 30, tzinfo=timezone.utc)
+    rows = queries.filter_crimes(week_start, week_end, None, None, None, None)
+    counts = queries.time_series_counts(week_start, week_end, None, None, None, None)
+
+    assert len(rows) == 7
+    assert counts["count"].sum() == 7
+    assert [len(files) for files in opened] == [7, 7]
+    assert all("year=2024/month=02/day=" in Path(path).as_posix() for path in opened[0])
+    assert rows["year"].astype(str).unique().tolist() == ["2024"]
+
+    opened.clear()
+    assert queries.filter_crimes(
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 7, tzinfo=timezone.utc),
+        None,
+        None,
+        None,
+        None,
+    ).empty
+    assert opened == []
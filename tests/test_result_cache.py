@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime.app.cache import DiskCache, get_frame, result_cache, set_frame
+
+
+def test_disk_cache_evicts_least_recently_used_bytes(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_bytes=250, suffix=".bin")
+    cache.set_bytes(("a",), b"a" * 100)
+    cache.set_bytes(("b",), b"b" * 100)
+    os.utime(cache._path(("a",)), (1_000, 1_000))
+    os.utime(cache._path(("b",)), (2_000, 2_000))
+
+    assert cache.get_bytes(("a",)) == b"a" * 100
+    cache.set_bytes(("c",), b"c" * 100)
+
+    assert cache.get_bytes(("b",)) is None
+    assert cache.get_bytes(("a",)) is not None
+    assert cache.get_bytes(("c",)) is not None
+    assert sum(size for _, size, _ in cache.entries()) <= 250
+
+    cache.set_bytes(("huge",), b"x" * 251)
+    assert cache.get_bytes(("huge",)) is None
+    assert len(cache.entries()) == 2
+
+
+def test_writes_under_budget_do_not_walk_the_cache(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "old.bin").write_bytes(b"o" * 100)
+    cache = DiskCache(tmp_path / "cache", max_bytes=250, suffix=".bin")
+    walks = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: walks.append(1) or entries())
+
+    cache.set_bytes(("a",), b"a" * 100)
+    cache.set_bytes(("a",), b"a" * 100)
+    assert walks == []
+
+    # The size found at start-up counts towards the budget.
+    cache.set_bytes(("b",), b"b" * 100)
+    assert walks == [1]
+    assert sum(size for _, size, _ in cache.entries()) <= 250
+
+
+def test_frames_written_by_one_worker_are_read_by_another(tmp_path: Path) -> None:
+    df = pd.DataFrame(
+        {
+            "bucket": pd.to_datetime(["2024-03-01", "2024-03-02"], utc=True),
+            "count": [3, 4],
+        }
+    )
+    set_frame(result_cache(tmp_path, 1), (1, "2024-03-01", None, "time_series"), df)
+
+    other = DiskCache(tmp_path / "results", 1024 * 1024, ".arrow")
+    pd.testing.assert_frame_equal(get_frame(other, (1, "2024-03-01", None, "time_series")), df)
+    assert get_frame(other, (2, "2024-03-01", None, "time_series")) is None
+    assert get_frame(other, (1, "2024-03-01", None, "heatmap")) is None
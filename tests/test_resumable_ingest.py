@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import duckdb
+import pytest
+import requests
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.state import load_state
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    monkeypatch.setenv("PAGE_LIMIT", "10")
+    config._SETTINGS = None
+
+
+def _rows(count: int) -> list[dict]:
+    first = datetime(2024, 1, 1, 6)
+    return [
+        {
+            "id": str(1000 + i),
+            "date": (first + timedelta(hours=11 * i)).strftime("%Y-%m-%dT%H:%M:%S.000"),
+            "primary_type": "THEFT",
+        }
+        for i in range(count)
+    ]
+
+
+def _fail_after(fake_soda, pages: int) -> None:
+    served = []
+
+    def _fail(params: dict) -> None:
+        if params.get("$select", "").startswith("count(*)"):
+            return
+        served.append(params)
+        if len(served) > pages:
+            raise RuntimeError("connection dropped")
+
+    fake_soda.on_request = _fail
+
+
+def _lake_ids(lake_dir: Path) -> list[int]:
+    rows = duckdb.execute("SELECT id FROM read_parquet(?)", [catalog_files(lake_dir)]).fetchall()
+    return sorted(row[0] for row in rows)
+
+
+def _three_windows(self, start_date, workers):
+    day = timedelta(days=10)
+    return [(start_date, start_date + day), (start_date + day, start_date + 2 * day), (start_date + 2 * day, None)]
+
+
+def _fail_in_second_window(params: dict) -> None:
+    if "date >= '2024-01-11" in params.get("$where", ""):
+        raise RuntimeError("connection dropped")
+
+def test_crashed_fetch_resumes_from_its_last_checkpointed_page(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    fake_soda.add_rows(_rows(45))
+    _fail_after(fake_soda, 3)
+
+    with pytest.raises(requests.RequestException):
+        ingest_crimes.ingest_once()
+
+    checkpoint = load_state().checkpoint
+    assert checkpoint is not None
+    (window,) = checkpoint.windows
+    assert (window.pages, window.rows, window.done) == (3, 30, False)
+    assert window.cursor == ["2024-01-14T13:00:00.000", "1029"]
+    run_dir = settings.staging_dir / f"fetch-{checkpoint.run_id}"
+    assert len(list(run_dir.glob("window-*.parquet"))) == 3
+    assert not (settings.lake_dir / "_catalog.json").exists()
+
+    fake_soda.on_request = None
+    fake_soda.requests.clear()
+    state = ingest_crimes.ingest_once()
+
+    assert "id > 1029" in fake_soda.requests[0]["$where"]
+    assert len(fake_soda.requests) == 2
+    assert state.rows_last_run == 45
+    assert state.checkpoint is None
+    assert load_state().checkpoint is None
+    assert not run_dir.exists()
+    assert _lake_ids(settings.lake_dir) == list(range(1000, 1045))
+
+
+def test_windowed_backfill_only_refetches_unfinished_windows(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    fake_soda.add_rows(_rows(60))
+    monkeypatch.setattr(ingest_crimes.SodaClient, "plan_windows", _three_windows)
+    fake_soda.on_request = _fail_in_second_window
+
+    with pytest.raises(requests.RequestException):
+        ingest_crimes.ingest_once(full_backfill=True)
+
+    checkpoint = load_state().checkpoint
+    assert checkpoint.full_backfill
+    assert checkpoint.expected_rows == 60
+    assert [window.done for window in checkpoint.windows] == [True, False, False]
+
+    fake_soda.on_request = None
+    fake_soda.requests.clear()
+    ingest_crimes.ingest_once(full_backfill=True)
+
+    assert not any("date >= '2024-01-01" in request.get("$where", "") for request in fake_soda.requests)
+    assert not any(request.get("$select", "").startswith("count(*)") for request in fake_soda.requests)
+    assert _lake_ids(settings.lake_dir) == list(range(1000, 1060))
+    assert load_state().checkpoint is None
+
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.rollup import current_rollup_files, rollup_dir_for
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    config._SETTINGS = None
+
+
+def _ingest(settings, df: pd.DataFrame) -> None:
+    staged_path = write_staged_parquet(add_partition_columns(df), settings.staging_dir)
+    merge_partitions(settings.lake_dir, staged_path)
+    staged_path.unlink()
+
+
+def _crimes(ids: list[str], dates: list[datetime], types: list[str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "date": dates,
+            "primary_type": types,
+            "arrest": [i % 2 == 0 for i in range(len(ids))],
+            "domestic": [i % 3 == 0 for i in range(len(ids))],
+            "district": [float(1 + i % 2) for i in range(len(ids))],
+            "community_area": [float(1 + i % 3) for i in range(len(ids))],
+        }
+    )
+
+
+def _all_aggregates(date_start: datetime, date_end: datetime) -> dict[str, pd.DataFrame]:
+    args = (date_start, date_end, None, None, None, None)
+    return {
+        "time_series": queries.time_series_counts(*args),
+        "weekly": queries.time_series_counts(*args, grain="week"),
+        "top_types": queries.top_n_primary_types(*args),
+        "heatmap": queries.dow_hour_heatmap(*args),
+        "arrest_rate": queries.arrest_rate_by_type(*args).sort_values("primary_type", ignore_index=True),
+        "community_counts": queries.community_area_counts(*args),
+        "community_arrest": queries.community_area_arrest_rate(*args),
+        "filtered": queries.top_n_primary_types(date_start, date_end, ["THEFT"], 1.0, True, None),
+    }
+
+
+def test_rollup_matches_raw_aggregates(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+
+    _ingest(
+        settings,
+        _crimes(
+            ["1", "2", "3", "4", "5"],
+            [
+                datetime(2023, 12, 31, 23, 30, tzinfo=timezone.utc),
+                datetime(2024, 3, 1, 10, 5, tzinfo=timezone.utc),
+                datetime(2024, 3, 1, 10, 45, tzinfo=timezone.utc),
+                datetime(2024, 3, 2, 0, 0, tzinfo=timezone.utc),
+                datetime(2024, 3, 9, 18, 20, tzinfo=timezone.utc),
+            ],
+            ["THEFT", "THEFT", "BATTERY", "THEFT", "ROBBERY"],
+        ),
+    )
+    _ingest(
+        settings,
+        _crimes(
+            ["3", "6"],
+            [
+                datetime(2024, 3, 1, 11, 0, tzinfo=timezone.utc),
+                datetime(2024, 3, 2, 13, 15, tzinfo=timezone.utc),
+            ],
+            ["THEFT", "BATTERY"],
+        ),
+    )
+
+    rollup_files = current_rollup_files(settings.lake_dir)
+    assert rollup_files is not None
+    assert sorted(Path(path).name.partition("-")[0] for path in rollup_files) == ["year=2023", "year=2024"]
+    assert (rollup_dir_for(settings.lake_dir) / "_manifest.json").exists()
+
+    date_start = datetime(2023, 12, 1, tzinfo=timezone.utc)
+    date_end = datetime(2024, 3, 31, 23, 59, 59, tzinfo=timezone.utc)
+
+    def _no_raw_scan():
+        raise AssertionError("aligned ranges should be answered from the rollup")
+
+    monkeypatch.setattr(queries, "_base_from_clause", _no_raw_scan)
+    from_rollup = _all_aggregates(date_start, date_end)
+    monkeypatch.undo()
+    _reset_settings(monkeypatch, tmp_path / "data")
+
+    monkeypatch.setattr(queries, "_rollup_files", lambda date_start, date_end: None)
+    from_raw = _all_aggregates(date_start, date_end)
+
+    for name, raw_df in from_raw.items():
+        pd.testing.assert_frame_equal(from_rollup[name], raw_df, check_dtype=False, obj=name)
+    assert from_rollup["top_types"].set_index("primary_type")["count"].to_dict() == {
+        "THEFT": 4,
+        "BATTERY": 1,
+        "ROBBERY": 1,
+    }
+
+
+def test_rollup_not_used_when_lake_changes_outside_ingest(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    _ingest(
+        settings,
+        _crimes(["1"], [datetime(2024, 3, 1, 10, tzinfo=timezone.utc)], ["THEFT"]),
+    )
+    assert current_rollup_files(settings.lake_dir) is not None
+
+    (settings.lake_dir / "_catalog.json").unlink()
+    extra_dir = settings.lake_dir / "year=2024" / "month=03" / "day=05"
+    extra_dir.mkdir(parents=True)
+    add_partition_columns(
+        _crimes(["9"], [datetime(2024, 3, 5, 9, tzinfo=timezone.utc)], ["ROBBERY"])
+    ).to_parquet(extra_dir / "part-000.parquet", index=False)
+
+    assert current_rollup_files(settings.lake_dir) is None
+    top = queries.top_n_primary_types(
+        datetime(2024, 3, 1, tzinfo=timezone.utc),
+        datetime(2024, 3, 31, 23, 59, 59, tzinfo=timezone.utc),
+        None,
+        None,
+        None,
+        None,
+    )
+    assert top.set_index("primary_type")["count"].to_dict() == {"THEFT": 1, "ROBBERY": 1}
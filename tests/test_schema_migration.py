@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.catalog import catalog_files, load_catalog
+from chicago_crime.ingest.id_index import partitions_for_ids
+from chicago_crime.ingest.migrate_schema import migrate_lake, stale_partitions
+from chicago_crime.ingest.parquet_writer import add_partition_columns, write_staged_parquet
+from chicago_crime.ingest.schema import LAKE_SQL_TYPES
+
+
+def _write_legacy_partition(lake_dir: Path, day: str, ids: list[str]) -> None:
+    # The pre-typed layout: string ids, float geography codes and partition columns in the body.
+    df = pd.DataFrame(
+        {
+            "id": ids,
+            "date": pd.to_datetime([f"2024-04-{day}T10:00:00"] * len(ids), utc=True),
+            "primary_type": ["THEFT"] * len(ids),
+            "beat": [421.0] * len(ids),
+            "district": [4.0] * len(ids),
+            "ward": [None] * len(ids),
+            "community_area": [25.0] * len(ids),
+            "latitude": [41.88] * len(ids),
+            "longitude": [-87.63] * len(ids),
+            "year": ["2024"] * len(ids),
+            "month": ["04"] * len(ids),
+            "day": [day] * len(ids),
+        }
+    )
+    directory = lake_dir / "year=2024" / "month=04" / f"day={day}"
+    directory.mkdir(parents=True)
+    df.to_parquet(directory / "part-000.parquet", index=False)
+
+
+def _lake_types(lake_dir: Path) -> dict[str, str]:
+    con = duckdb.connect()
+    rows = con.execute(
+        "DESCRIBE SELECT * FROM read_parquet(?, hive_partitioning = false, union_by_name = true)",
+        [catalog_files(lake_dir)],
+    ).fetchall()
+    con.close()
+    return {row[0]: row[1] for row in rows}
+
+
+def test_migration_rewrites_legacy_partitions_into_typed_schema(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    config._SETTINGS = None
+    settings = config.get_settings()
+    lake_dir = settings.lake_dir
+    _write_legacy_partition(lake_dir, "01", ["10", "11"])
+    _write_legacy_partition(lake_dir, "02", ["12"])
+    community_dir = settings.data_dir / "dim" / "community_areas"
+    community_dir.mkdir(parents=True)
+    pd.DataFrame({"community_area": [25], "community_area_name": ["AUSTIN"]}).to_parquet(
+        community_dir / "community_areas.parquet", index=False
+    )
+
+    assert sorted(stale_partitions(lake_dir)) == ["year=2024/month=04/day=01", "year=2024/month=04/day=02"]
+    migrated = migrate_lake(lake_dir)
+
+    assert len(migrated) == 2
+    types = _lake_types(lake_dir)
+    assert {name: types[name] for name in LAKE_SQL_TYPES} == LAKE_SQL_TYPES
+    assert not {"year", "month", "day"} & set(types)
+    assert sum(entry.rows for entry in load_catalog(lake_dir).values()) == 3
+    assert stale_partitions(lake_dir) == {}
+    assert migrate_lake(lake_dir) == []
+
+    probe = write_staged_parquet(
+        add_partition_columns(pd.DataFrame({"id": ["11"], "date": pd.to_datetime(["2024-05-01"], utc=True)})),
+        settings.staging_dir,
+    )
+    assert partitions_for_ids(lake_dir, probe) == ["year=2024/month=04/day=01"]
+    rows = queries.filter_crimes(None, None, None, None, None, None)
+    assert set(rows["community_area_name"]) == {"AUSTIN"}
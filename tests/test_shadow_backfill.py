@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes
+from chicago_crime.ingest.catalog import catalog_files, catalog_version, load_catalog
+from chicago_crime.ingest.shadow_backfill import ShadowValidationError
+from chicago_crime.ingest.soda_client import SodaClient
+from chicago_crime.ingest.state import load_state
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    monkeypatch.setenv("BACKFILL_DAYS", "0")
+    config._SETTINGS = None
+
+
+def _row(crime_id: int, day: int, primary_type: str = "THEFT") -> dict:
+    return {"id": str(crime_id), "date": f"2024-01-{day:02d}T12:00:00.000", "primary_type": primary_type}
+
+
+def _lake_types(lake_dir: Path) -> dict[int, str]:
+    return dict(duckdb.execute("SELECT id, primary_type FROM read_parquet(?)", [catalog_files(lake_dir)]).fetchall())
+
+
+def _files_by_day(lake_dir: Path) -> dict[str, str]:
+    return {key.split("/")[2]: key for key in load_catalog(lake_dir)}
+
+
+def test_full_backfill_promotes_shadow_lake_and_reuses_unchanged_partitions(
+    tmp_path: Path, monkeypatch, fake_soda
+) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    fake_soda.add_rows([_row(100 + i, 1 + i % 4) for i in range(12)])
+    ingest_crimes.ingest_once()
+    before = _files_by_day(settings.lake_dir)
+    version = catalog_version(settings.lake_dir)
+
+    fake_soda.remove_rows(lambda row: row["id"] in {"101", "103"})
+    fake_soda.add_rows([_row(101, 2, "ROBBERY"), _row(200, 6)])
+    state = ingest_crimes.ingest_once(full_backfill=True)
+
+    after = _files_by_day(settings.lake_dir)
+    assert catalog_version(settings.lake_dir) == version + 1
+    assert sorted(after) == ["day=01", "day=02", "day=03", "day=04", "day=06"]
+    assert after["day=01"] == before["day=01"]
+    assert after["day=03"] == before["day=03"]
+    assert after["day=02"] != before["day=02"]
+    assert after["day=04"] != before["day=04"]
+    types = _lake_types(settings.lake_dir)
+    assert len(types) == 12
+    assert types[101] == "ROBBERY"
+    assert 103 not in types
+    assert not settings.shadow_lake_dir.parent.exists()
+    assert state.rows_last_run == 12
+    assert load_state().watermark_max_date == state.watermark_max_date
+
+
+def test_short_shadow_lake_leaves_the_live_lake_untouched(tmp_path: Path, monkeypatch, fake_soda) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    fake_soda.add_rows([_row(100 + i, 1 + i % 3) for i in range(6)])
+    ingest_crimes.ingest_once()
+    version = catalog_version(settings.lake_dir)
+    state_before = load_state()
+
+    fake_soda.add_rows([_row(300, 5)])
+    monkeypatch.setattr(SodaClient, "count_since", lambda self, start_date: 100)
+
+    with pytest.raises(ShadowValidationError):
+        ingest_crimes.ingest_once(full_backfill=True)
+
+    assert catalog_version(settings.lake_dir) == version
+    assert len(_lake_types(settings.lake_dir)) == 6
+    assert load_state() == state_before
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from chicago_crime.ingest.catalog import (
+    CatalogConflictError,
+    catalog_files,
+    catalog_version,
+    load_catalog,
+    pinned_catalog,
+    snapshot_versions,
+    update_catalog,
+)
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.rollup import current_rollup_files
+from chicago_crime.ingest.snapshots import collect_garbage
+
+
+def _stage(staging_dir: Path, ids: list[str], dates: list[datetime], primary_type: str = "THEFT") -> Path:
+    df = pd.DataFrame({"id": ids, "date": dates, "primary_type": [primary_type] * len(ids)})
+    return write_staged_parquet(add_partition_columns(df), staging_dir)
+
+
+def _types(files: list[str]) -> dict[int, str]:
+    return dict(duckdb.execute("SELECT id, primary_type FROM read_parquet(?)", [files]).fetchall())
+
+
+def test_pinned_reader_keeps_its_snapshot_until_garbage_collection(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    day = datetime(2024, 4, 2, 9, tzinfo=timezone.utc)
+    merge_partitions(lake_dir, _stage(staging_dir, ["1", "2"], [day, day]))
+    first_version = catalog_version(lake_dir)
+
+    with pinned_catalog(lake_dir):
+        merge_partitions(lake_dir, _stage(staging_dir, ["2"], [day], "ROBBERY"))
+        pinned_files = catalog_files(lake_dir)
+        assert _types(pinned_files) == {1: "THEFT", 2: "THEFT"}
+
+    assert catalog_version(lake_dir) == first_version + 1
+    assert _types(catalog_files(lake_dir)) == {1: "THEFT", 2: "ROBBERY"}
+
+    # Inside the retention window the superseded file stays readable.
+    collect_garbage(lake_dir, timedelta(minutes=30))
+    assert _types(pinned_files) == {1: "THEFT", 2: "THEFT"}
+    assert first_version in snapshot_versions(lake_dir)
+
+    collect_garbage(lake_dir, timedelta(0))
+    assert not any(Path(path).exists() for path in pinned_files)
+    assert snapshot_versions(lake_dir) == [catalog_version(lake_dir)]
+    assert _types(catalog_files(lake_dir)) == {1: "THEFT", 2: "ROBBERY"}
+    assert all(Path(path).exists() for path in current_rollup_files(lake_dir))
+
+
+def test_commit_on_a_stale_parent_is_rejected(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    staging_dir = tmp_path / "staging"
+    day = datetime(2024, 4, 2, 9, tzinfo=timezone.utc)
+    merge_partitions(lake_dir, _stage(staging_dir, ["1"], [day]))
+    parent = catalog_version(lake_dir)
+    before = dict(load_catalog(lake_dir))
+
+    merge_partitions(lake_dir, _stage(staging_dir, ["2"], [day + timedelta(days=1)]))
+
+    with pytest.raises(CatalogConflictError):
+        update_catalog(lake_dir, [], [], parent)
+    assert set(before) < set(load_catalog(lake_dir))
+
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from chicago_crime import config
+from chicago_crime.analytics import queries
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.spatial import hilbert_index
+
+
+def test_hilbert_sorted_partitions_prune_bbox_filters(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("PARQUET_SPATIAL_SORT", "hilbert")
+    monkeypatch.setenv("PARQUET_ROW_GROUP_SIZE", "2048")
+    config._SETTINGS = None
+    settings = config.get_settings()
+    rng = np.random.default_rng(3)
+    count = 8192
+    df = pd.DataFrame(
+        {
+            "id": [str(i) for i in range(count)],
+            "date": [datetime(2024, 8, 1, i % 24, tzinfo=timezone.utc) for i in range(count)],
+            "primary_type": ["THEFT"] * count,
+            "latitude": rng.uniform(41.65, 42.0, count),
+            "longitude": rng.uniform(-87.9, -87.55, count),
+        }
+    )
+    merge_partitions(settings.lake_dir, write_staged_parquet(add_partition_columns(df), settings.staging_dir))
+
+    (path,) = catalog_files(settings.lake_dir)
+    written = pq.read_table(path).to_pandas()
+    keys = hilbert_index(written["latitude"].to_numpy(np.float64), written["longitude"].to_numpy(np.float64))
+    assert (np.diff(keys) >= 0).all()
+
+    metadata = pq.ParquetFile(path).metadata
+    # Each row group covers a compact patch of the city instead of all of it.
+    areas = []
+    for number in range(metadata.num_row_groups):
+        group = metadata.row_group(number)
+        stats = [group.column(metadata.schema.names.index(name)).statistics for name in ("latitude", "longitude")]
+        areas.append((stats[0].max - stats[0].min) * (stats[1].max - stats[1].min))
+    # DuckDB rounds row groups up to its 2048-row vectors.
+    assert metadata.num_row_groups >= 4
+    assert max(areas) < 0.35 * 0.35 / 2
+
+    bbox = (41.8, -87.7, 41.9, -87.6)
+    result = queries.filter_crimes(None, None, None, None, None, None, bbox=bbox)
+    inside = df[df["latitude"].between(41.8, 41.9) & df["longitude"].between(-87.7, -87.6)]
+    assert sorted(result["id"]) == sorted(int(value) for value in inside["id"])
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+import pyarrow.parquet as pq
+
+from chicago_crime import config
+from chicago_crime.ingest import ingest_crimes, parquet_writer
+from chicago_crime.ingest.catalog import catalog_files
+from chicago_crime.ingest.schema import STAGED_ARROW_SCHEMA
+from chicago_crime.ingest.soda_client import SodaClient
+
+
+def _reset_settings(monkeypatch, data_dir: Path) -> None:
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("START_DATE", "2024-01-01T00:00:00")
+    config._SETTINGS = None
+
+
+def _page(start_id: int, day: int) -> list[dict]:
+    return [
+        {
+            "id": str(start_id + offset),
+            "date": f"2024-01-{day:02d}T{offset:02d}:15:00.000",
+            "primary_type": "THEFT",
+            "arrest": offset % 2 == 0,
+            "domestic": False,
+            "district": "004",
+            "community_area": "25",
+            "latitude": "41.88",
+            "longitude": "-87.63",
+        }
+        for offset in range(3)
+    ]
+
+
+def test_records_to_batch_uses_staged_schema() -> None:
+    batch = ingest_crimes._records_to_batch(_page(1, 2) + [{"id": None, "date": "2024-01-02T00:00:00"}])
+    assert batch.schema == STAGED_ARROW_SCHEMA
+    assert batch.num_rows == 3
+    row = batch.to_pylist()[0]
+    assert row["date"] == datetime(2024, 1, 2, 0, 15, tzinfo=timezone.utc)
+    assert (row["district"], row["community_area"], row["arrest"]) == (4.0, 25.0, True)
+    assert (row["year"], row["month"], row["day"]) == ("2024", "01", "02")
+    assert ingest_crimes._records_to_batch([]).num_rows == 0
+
+
+def test_ingest_once_streams_pages_to_staging(tmp_path: Path, monkeypatch) -> None:
+    _reset_settings(monkeypatch, tmp_path / "data")
+    settings = config.get_settings()
+    events: list[str] = []
+    staged_files: list[Path] = []
+
+    class _FakeClient(SodaClient):
+        def fetch_pages_since(self, start_date, end_date=None, after=None):
+            for number, page in enumerate([_page(1, 2), _page(10, 3), _page(20, 3)]):
+                events.append(f"fetch-{number}")
+                yield page
+
+    real_write_batch = pq.ParquetWriter.write_batch
+    real_merge = parquet_writer.merge_partitions
+
+    def _recording_write_batch(self, batch, *args, **kwargs):
+        events.append(f"write-{batch.num_rows}")
+        return real_write_batch(self, batch, *args, **kwargs)
+
+    def _recording_merge(lake_dir, staged_path, **kwargs):
+        staged_files.append(staged_path)
+        assert pq.ParquetFile(staged_path).num_row_groups == 3
+        return real_merge(lake_dir, staged_path, **kwargs)
+
+    monkeypatch.setattr(ingest_crimes, "SodaClient", _FakeClient)
+    monkeypatch.setattr(pq.ParquetWriter, "write_batch", _recording_write_batch)
+    monkeypatch.setattr(ingest_crimes, "merge_partitions", _recording_merge)
+
+    state = ingest_crimes.ingest_once()
+
+    assert events == ["fetch-0", "write-3", "fetch-1", "write-3", "fetch-2", "write-3"]
+    assert state.rows_last_run == 9
+    assert state.watermark_max_date == datetime(2024, 1, 3, 2, 15, tzinfo=timezone.utc)
+    assert not staged_files[0].exists()
+
+    con = duckdb.connect()
+    count = con.execute(
+        "SELECT COUNT(*) FROM read_parquet(?)",
+        [catalog_files(settings.lake_dir)],
+    ).fetchone()[0]
+    con.close()
+    assert count == 9
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from chicago_crime import config
+
+from chicago_crime.ingest.parquet_writer import add_partition_columns, merge_partitions, write_staged_parquet
+from chicago_crime.ingest.write_profile import WriteProfile, write_dataframe
+
+
+def test_merge_writes_zstd_files_sorted_by_date(tmp_path: Path) -> None:
+    lake_dir = tmp_path / "lake" / "crimes"
+    first = datetime(2024, 7, 4, tzinfo=timezone.utc)
+    dates = [first + timedelta(minutes=37 * offset) for offset in reversed(range(30))]
+    df = pd.DataFrame({"id": [str(i) for i in range(30)], "date": dates, "primary_type": ["THEFT"] * 30})
+    merge_partitions(lake_dir, write_staged_parquet(add_partition_columns(df), tmp_path / "staging"))
+
+    for path in lake_dir.rglob("*.parquet"):
+        metadata = pq.read_metadata(path)
+        assert metadata.row_group(0).column(0).compression == "ZSTD"
+        written = pq.read_table(path).column("date").to_pylist()
+        assert written == sorted(written)
+
+
+def test_write_dataframe_applies_profile(tmp_path: Path) -> None:
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2024-01-03", "2024-01-01", "2024-01-02"], utc=True),
+            "primary_type": ["THEFT", "BATTERY", "THEFT"],
+            "ward": [1.0, 2.0, 3.0],
+        }
+    )
+    profile = WriteProfile(compression="snappy", compression_level=None, row_group_size=2)
+    path = write_dataframe(df, tmp_path / "out.parquet", profile)
+
+    metadata = pq.read_metadata(path)
+    assert metadata.num_row_groups == 2
+    assert metadata.row_group(0).column(0).compression == "SNAPPY"
+    assert pq.read_table(path).column("primary_type").to_pylist() == ["BATTERY", "THEFT", "THEFT"]
+    encodings = metadata.row_group(0).column(1).encodings
+    assert any("DICTIONARY" in encoding for encoding in encodings)
+
+
+def test_codecs_without_levels_ignore_the_default_level(tmp_path: Path, monkeypatch) -> None:
+    df = pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "date": pd.to_datetime(["2024-01-02", "2024-01-01"], utc=True),
+            "primary_type": ["THEFT", "BATTERY"],
+        }
+    )
+    for codec, expected in [("snappy", "SNAPPY"), ("none", "UNCOMPRESSED")]:
+        monkeypatch.setenv("PARQUET_COMPRESSION", codec)
+        monkeypatch.setenv("PARQUET_COMPRESSION_LEVEL", "3")
+        monkeypatch.setenv("DATA_DIR", str(tmp_path / codec))
+        config._SETTINGS = None
+        path = write_dataframe(df, tmp_path / f"{codec}.parquet")
+        assert pq.read_metadata(path).row_group(0).column(0).compression == expected
+
+        lake_dir = tmp_path / codec / "lake"
+        merge_partitions(lake_dir, write_staged_parquet(add_partition_columns(df), tmp_path / codec / "staging"))
+        for path in lake_dir.rglob("*.parquet"):
+            assert pq.read_metadata(path).row_group(0).column(0).compression == expected